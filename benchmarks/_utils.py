@@ -0,0 +1,27 @@
+import math
+import typing
+
+from asgi_lifespan._load import percentile
+
+
+def summarize(values: typing.Sequence[float]) -> typing.Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else math.nan,
+    }
+
+
+def format_table(
+    headers: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]
+) -> str:
+    cells = [[str(cell) for cell in row] for row in [headers, *rows]]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    lines = [
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+        for row in cells
+    ]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
@@ -0,0 +1,129 @@
+"""
+Measure the cost of importing the package and of constructing a
+`LifespanManager`, for CLIs and serverless functions that start up apps on the
+hot path.
+
+Usage:
+
+    python -m benchmarks.imports [--runs N] [--json] [--max-import-ms MS]
+        [--max-construction-us US]
+
+The import is measured in a fresh interpreter for each run. Use the `--max-*`
+options to fail (exit code 1) when the best run goes over budget, e.g. to catch
+an eager import of asyncio, which makes importing the package take several
+times as long.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import typing
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._types import Receive, Scope, Send
+
+from ._utils import format_table
+
+IMPORT = """
+import time
+
+start = time.perf_counter()
+from asgi_lifespan import LifespanManager
+print(time.perf_counter() - start)
+"""
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    pass
+
+
+def measure_import(runs: int) -> typing.List[float]:
+    return [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", IMPORT],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        for _ in range(runs)
+    ]
+
+
+async def measure_construction(runs: int, managers: int) -> typing.List[float]:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(managers):
+            LifespanManager(app)
+        durations.append((time.perf_counter() - start) / managers)
+    return durations
+
+
+def check_budget(
+    results: typing.Dict[str, typing.Dict[str, float]], options: argparse.Namespace
+) -> typing.List[str]:
+    budgets = [
+        ("import", options.max_import_ms, 1e3, "ms"),
+        ("construction", options.max_construction_us, 1e6, "us"),
+    ]
+    failures = []
+    for name, limit, scale, unit in budgets:
+        if limit is None:
+            continue
+        value = results[name]["min"] * scale
+        if value > limit:
+            failures.append(
+                f"{name} min is {value:.1f}{unit} (budget: {limit:.1f}{unit})"
+            )
+    return failures
+
+
+def report(results: typing.Dict[str, typing.Dict[str, float]]) -> str:
+    rows = [
+        [name, unit]
+        + [f"{result[key] * scale:.1f}" for key in ("min", "median", "max")]
+        for (name, result), (scale, unit) in zip(
+            results.items(), [(1e3, "ms"), (1e6, "us")]
+        )
+    ]
+    return format_table(["measurement", "unit", "min", "median", "max"], rows)
+
+
+def summarize(durations: typing.List[float]) -> typing.Dict[str, float]:
+    ordered = sorted(durations)
+    return {
+        "min": ordered[0],
+        "median": ordered[len(ordered) // 2],
+        "max": ordered[-1],
+    }
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--managers", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="Output results as JSON.")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-construction-us", type=float)
+    options = parser.parse_args(argv)
+
+    results = {
+        "import": summarize(measure_import(options.runs)),
+        "construction": summarize(
+            asyncio.run(measure_construction(options.runs, options.managers))
+        ),
+    }
+    print(json.dumps(results, indent=2) if options.json else report(results))
+
+    failures = check_budget(results, options)
+    for failure in failures:
+        print(f"Over budget: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
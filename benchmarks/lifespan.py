@@ -0,0 +1,343 @@
+"""
+Measure the overhead of `LifespanManager` itself, using a no-op lifespan app.
+
+Usage:
+
+    python -m benchmarks.lifespan [--backend asyncio|uvloop|trio] [--cycles N] ...
+
+Pass `--concurrency-backend anyio` to also measure the anyio concurrency backend
+on each event loop, or `--concurrency-backend asyncio-eager` for the asyncio fast
+path. On asyncio, the number of event loop iterations spent in each phase is
+reported as well.
+
+Use the `--max-*` options to fail (exit code 1) when a measurement goes over budget.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import typing
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._types import Receive, Scope, Send
+
+from ._utils import format_table, summarize
+
+BACKENDS = ("asyncio", "uvloop", "trio")
+CONCURRENCY_BACKENDS = ("native", "asyncio-eager", "anyio")
+
+
+async def noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    message = await receive()
+    assert message["type"] == "lifespan.startup"
+    await send({"type": "lifespan.startup.complete"})
+    message = await receive()
+    assert message["type"] == "lifespan.shutdown"
+    await send({"type": "lifespan.shutdown.complete"})
+
+
+async def measure_latency(
+    cycles: int, backend: typing.Optional[str] = None
+) -> typing.Dict[str, typing.List[float]]:
+    enter: typing.List[float] = []
+    leave: typing.List[float] = []
+
+    for _ in range(cycles):
+        manager = LifespanManager(noop_app, backend=backend)
+        start = time.perf_counter()
+        await manager.__aenter__()
+        entered = time.perf_counter()
+        await manager.__aexit__(None, None, None)
+        exited = time.perf_counter()
+        enter.append(entered - start)
+        leave.append(exited - entered)
+
+    return {"enter": enter, "exit": leave}
+
+
+async def measure_restart(
+    cycles: int, backend: typing.Optional[str] = None
+) -> typing.List[float]:
+    restart: typing.List[float] = []
+
+    async with LifespanManager(noop_app, backend=backend) as manager:
+        for _ in range(cycles):
+            start = time.perf_counter()
+            await manager.restart()
+            restart.append(time.perf_counter() - start)
+
+    return restart
+
+
+async def measure_iterations(
+    backend: typing.Optional[str] = None,
+) -> typing.Optional[typing.Dict[str, int]]:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None  # Not on asyncio.
+    if not hasattr(loop, "_run_once"):
+        return None  # e.g. uvloop.
+
+    count = 0
+    run_once = loop._run_once  # type: ignore
+
+    def counting_run_once() -> None:
+        nonlocal count
+        count += 1
+        run_once()
+
+    manager = LifespanManager(noop_app, backend=backend)
+    loop._run_once = counting_run_once  # type: ignore
+    try:
+        await asyncio.sleep(0)
+        count = 0
+        await manager.__aenter__()
+        enter = count
+        count = 0
+        await manager.__aexit__(None, None, None)
+        leave = count
+    finally:
+        del loop._run_once  # type: ignore
+
+    return {"enter": enter, "exit": leave}
+
+
+def reset_peak() -> None:
+    if sys.version_info >= (3, 9):
+        tracemalloc.reset_peak()
+    else:  # pragma: no cover
+        # Approximation: older Pythons can only reset the peak along with
+        # everything else, which skews 'retained_bytes_per_cycle'.
+        tracemalloc.clear_traces()
+
+
+async def measure_allocations(
+    cycles: int, backend: typing.Optional[str] = None
+) -> typing.Dict[str, float]:
+    async def cycle() -> None:
+        async with LifespanManager(noop_app, backend=backend):
+            pass
+
+    await cycle()  # Warm up caches and imports.
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(cycles):
+            reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await cycle()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_bytes_per_cycle": sum(peaks) / len(peaks),
+        "retained_bytes_per_cycle": (after - before) / cycles,
+    }
+
+
+async def measure_alive(
+    count: int, backend: typing.Optional[str] = None
+) -> typing.Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(count):
+                await stack.enter_async_context(
+                    LifespanManager(noop_app, backend=backend)
+                )
+            alive, _ = tracemalloc.get_traced_memory()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "alive": count,
+        "peak_bytes": peak - before,
+        "bytes_per_manager": (alive - before) / count,
+    }
+
+
+async def run_all(
+    options: argparse.Namespace, backend: typing.Optional[str]
+) -> typing.Dict[str, typing.Any]:
+    latency = await measure_latency(options.cycles, backend)
+    return {
+        "enter": summarize(latency["enter"]),
+        "exit": summarize(latency["exit"]),
+        "restart": summarize(await measure_restart(options.cycles, backend)),
+        "memory": await measure_allocations(options.alloc_cycles, backend),
+        "alive": await measure_alive(options.alive, backend),
+        "iterations": await measure_iterations(backend),
+    }
+
+
+def run_backend(
+    backend: str, options: argparse.Namespace, concurrency_backend: str = "native"
+) -> typing.Dict[str, typing.Any]:
+    name = None if concurrency_backend == "native" else concurrency_backend
+
+    if backend == "trio":
+        import trio
+
+        return trio.run(run_all, options, name)
+
+    if backend == "uvloop":
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        try:
+            return asyncio.run(run_all(options, name))
+        finally:
+            asyncio.set_event_loop_policy(None)
+
+    return asyncio.run(run_all(options, name))
+
+
+def available(backend: str) -> bool:
+    try:
+        __import__(backend)
+    except ImportError:
+        return False
+    return True
+
+
+def check_budget(
+    results: typing.Dict[str, typing.Dict[str, typing.Any]], options: argparse.Namespace
+) -> typing.List[str]:
+    budgets = [
+        ("enter", "p99", options.max_enter_p99_us, 1e6, "us"),
+        ("exit", "p99", options.max_exit_p99_us, 1e6, "us"),
+        ("memory", "peak_bytes_per_cycle", options.max_bytes_per_cycle, 1, "B"),
+        ("memory", "retained_bytes_per_cycle", options.max_retained_bytes, 1, "B"),
+    ]
+    failures = []
+    for backend, result in results.items():
+        for section, key, limit, scale, unit in budgets:
+            if limit is None:
+                continue
+            value = result[section][key] * scale
+            if value > limit:
+                failures.append(
+                    f"{backend}: {section} {key} is {value:.1f}{unit} "
+                    f"(budget: {limit:.1f}{unit})"
+                )
+    return failures
+
+
+def report(results: typing.Dict[str, typing.Dict[str, typing.Any]]) -> str:
+    us = 1e6
+    latency_rows = [
+        [backend, phase]
+        + [f"{result[phase][key] * us:.1f}" for key in ("p50", "p90", "p99", "max")]
+        + [
+            "-"
+            if result["iterations"] is None or phase not in result["iterations"]
+            else result["iterations"][phase]
+        ]
+        for backend, result in results.items()
+        for phase in ("enter", "exit", "restart")
+    ]
+    memory_rows = [
+        [
+            backend,
+            f"{result['memory']['peak_bytes_per_cycle']:.0f}",
+            f"{result['memory']['retained_bytes_per_cycle']:.1f}",
+            result["alive"]["alive"],
+            f"{result['alive']['bytes_per_manager']:.0f}",
+            f"{result['alive']['peak_bytes']:.0f}",
+        ]
+        for backend, result in results.items()
+    ]
+    return "\n\n".join(
+        [
+            format_table(
+                [
+                    "backend",
+                    "phase",
+                    "p50 (us)",
+                    "p90 (us)",
+                    "p99 (us)",
+                    "max (us)",
+                    "loop iterations",
+                ],
+                latency_rows,
+            ),
+            format_table(
+                [
+                    "backend",
+                    "peak B/cycle",
+                    "retained B/cycle",
+                    "alive",
+                    "B/manager",
+                    "peak B",
+                ],
+                memory_rows,
+            ),
+        ]
+    )
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=BACKENDS,
+        help="Backend to benchmark. Can be repeated. Defaults to all available.",
+    )
+    parser.add_argument(
+        "--concurrency-backend",
+        action="append",
+        choices=CONCURRENCY_BACKENDS,
+        help=(
+            "Concurrency backend to benchmark on each event loop. Can be repeated. "
+            "Defaults to 'native'."
+        ),
+    )
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--alloc-cycles", type=int, default=200)
+    parser.add_argument("--alive", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="Output results as JSON.")
+    parser.add_argument("--max-enter-p99-us", type=float)
+    parser.add_argument("--max-exit-p99-us", type=float)
+    parser.add_argument("--max-bytes-per-cycle", type=float)
+    parser.add_argument("--max-retained-bytes", type=float)
+    options = parser.parse_args(argv)
+
+    backends = options.backend or [name for name in BACKENDS if available(name)]
+    concurrency_backends = options.concurrency_backend or ["native"]
+    results = {
+        backend
+        if concurrency_backend == "native"
+        else f"{backend}+{concurrency_backend}": run_backend(
+            backend, options, concurrency_backend
+        )
+        for backend in backends
+        for concurrency_backend in concurrency_backends
+        if not (concurrency_backend == "asyncio-eager" and backend == "trio")
+    }
+
+    print(json.dumps(results, indent=2) if options.json else report(results))
+
+    failures = check_budget(results, options)
+    for failure in failures:
+        print(f"Over budget: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
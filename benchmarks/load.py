@@ -0,0 +1,109 @@
+"""
+Measure the overhead of the `run_load()` driver itself, using a no-op HTTP app
+behind `LifespanManager`.
+
+Usage:
+
+    python -m benchmarks.load [--backend asyncio|trio] [--requests N] ...
+
+Pass `--rate` to use open-loop scheduling instead of `--concurrency` workers.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import typing
+
+from asgi_lifespan import LifespanManager, run_load
+from asgi_lifespan._types import Receive, Scope, Send
+
+from ._utils import format_table
+
+BACKENDS = ("asyncio", "trio")
+RESPONSE_START = {"type": "http.response.start", "status": 200, "headers": []}
+RESPONSE_BODY = {"type": "http.response.body", "body": b"OK"}
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        await receive()
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        await send({"type": "lifespan.shutdown.complete"})
+        return
+
+    await receive()
+    await send(RESPONSE_START)
+    await send(RESPONSE_BODY)
+
+
+async def run(options: argparse.Namespace) -> typing.Dict[str, float]:
+    async with LifespanManager(app) as manager:
+        report = await run_load(
+            manager.app,
+            requests=options.requests,
+            concurrency=options.concurrency,
+            rate=options.rate,
+        )
+    return {
+        "requests": report.requests,
+        "errors": report.errors,
+        "throughput": report.throughput,
+        **report.percentiles(),
+    }
+
+
+def run_backend(backend: str, options: argparse.Namespace) -> typing.Dict[str, float]:
+    if backend == "trio":
+        import trio
+
+        return trio.run(run, options)
+    return asyncio.run(run(options))
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=BACKENDS,
+        help="Backend to benchmark. Can be repeated. Defaults to all.",
+    )
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, help="Requests per second (open loop).")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON.")
+    options = parser.parse_args(argv)
+
+    results = {
+        backend: run_backend(backend, options)
+        for backend in options.backend or BACKENDS
+    }
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+    else:
+        us = 1e6
+        rows = [
+            [backend, f"{result['throughput']:.0f}"]
+            + [f"{result[key] * us:.1f}" for key in ("p50", "p90", "p99", "p99.9")]
+            for backend, result in results.items()
+        ]
+        print(
+            format_table(
+                [
+                    "backend",
+                    "req/s",
+                    "p50 (us)",
+                    "p90 (us)",
+                    "p99 (us)",
+                    "p99.9 (us)",
+                ],
+                rows,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
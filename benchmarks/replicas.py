@@ -0,0 +1,90 @@
+"""
+Measure how in-process HTTP throughput scales with the number of
+`LifespanReplicas`, for each way of dispatching requests to replicas.
+
+Usage:
+
+    python -m benchmarks.replicas [--replicas N] [--requests N] [--json]
+
+With `app`, one asyncio loop sends all requests to `LifespanReplicas.app`, and
+`receive` and `send` are called back on that loop. With `run_on_each`, each
+replica sends its share of the requests from its own loop. Throughput can only
+scale past one core on free-threaded builds of Python.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import typing
+
+from asgi_lifespan import LifespanReplicas, run_load
+from asgi_lifespan._types import ASGIApp
+
+from ._utils import format_table
+from .load import app
+
+DISPATCHES = ("app", "run_on_each")
+
+
+def create_app() -> ASGIApp:
+    return app
+
+
+def measure(replicas: int, dispatch: str, options: argparse.Namespace) -> float:
+    with LifespanReplicas(create_app, replicas=replicas) as pool:
+        start = time.perf_counter()
+        if dispatch == "app":
+            asyncio.run(
+                run_load(
+                    pool.app,
+                    requests=options.requests,
+                    concurrency=options.concurrency,
+                )
+            )
+            requests = options.requests
+        else:
+            share = options.requests // replicas
+            pool.run_on_each(run_load, None, share, None, options.concurrency)
+            requests = share * replicas
+        return requests / (time.perf_counter() - start)
+
+
+def report(results: typing.Dict[int, typing.Dict[str, float]]) -> str:
+    rows = [
+        [replicas]
+        + [f"{throughputs[dispatch]:.0f}" for dispatch in DISPATCHES]
+        + [f"{throughputs['run_on_each'] / results[min(results)]['run_on_each']:.2f}x"]
+        for replicas, throughputs in results.items()
+    ]
+    return format_table(
+        ["replicas", "app (req/s)", "run_on_each (req/s)", "run_on_each scaling"],
+        rows,
+    )
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        action="append",
+        help="Number of replicas. Can be repeated.",
+    )
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Output results as JSON.")
+    options = parser.parse_args(argv)
+
+    results = {
+        replicas: {
+            dispatch: measure(replicas, dispatch, options) for dispatch in DISPATCHES
+        }
+        for replicas in options.replicas or [1, 2, 4]
+    }
+    print(json.dumps(results, indent=2) if options.json else report(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
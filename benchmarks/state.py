@@ -0,0 +1,96 @@
+"""
+Compare the per-request cost of ways to give requests the lifespan state.
+
+Usage:
+
+    python -m benchmarks.state [--keys N] [--number N] [--json]
+
+Each strategy builds the state of one request, then reads a few keys from it,
+and optionally writes one key.
+"""
+import argparse
+import json
+import sys
+import timeit
+import typing
+
+from asgi_lifespan._state import StateView
+
+from ._utils import format_table
+
+
+def shared(state: typing.Dict[str, typing.Any], write: bool) -> None:
+    view = state
+    for key in ("key0", "key1", "key2", "key3", "key4"):
+        view[key]
+    if write:
+        view["user"] = None
+
+
+def dict_copy(state: typing.Dict[str, typing.Any], write: bool) -> None:
+    view = state.copy()
+    for key in ("key0", "key1", "key2", "key3", "key4"):
+        view[key]
+    if write:
+        view["user"] = None
+
+
+def copy_on_write(state: typing.Dict[str, typing.Any], write: bool) -> None:
+    view = StateView(state)
+    for key in ("key0", "key1", "key2", "key3", "key4"):
+        view[key]
+    if write:
+        view["user"] = None
+
+
+STRATEGIES = {
+    "shared": shared,
+    "dict_copy": dict_copy,
+    "copy_on_write": copy_on_write,
+}
+
+
+def measure(keys: int, number: int) -> typing.Dict[str, typing.Dict[str, float]]:
+    state = {f"key{index}": index for index in range(keys)}
+    results: typing.Dict[str, typing.Dict[str, float]] = {}
+    for name, strategy in STRATEGIES.items():
+        results[name] = {}
+        for write in (False, True):
+            timer = timeit.Timer(lambda: strategy(state, write))
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            results[name]["write" if write else "read"] = best
+    return results
+
+
+def report(results: typing.Dict[int, typing.Dict[str, typing.Dict[str, float]]]) -> str:
+    ns = 1e9
+    rows = [
+        [keys, name, f"{timings['read'] * ns:.0f}", f"{timings['write'] * ns:.0f}"]
+        for keys, by_strategy in results.items()
+        for name, timings in by_strategy.items()
+    ]
+    return format_table(["keys", "strategy", "read-only (ns)", "+1 write (ns)"], rows)
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--keys",
+        type=int,
+        action="append",
+        help="Number of keys in the lifespan state. Can be repeated.",
+    )
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Output results as JSON.")
+    options = parser.parse_args(argv)
+
+    results = {
+        keys: measure(keys, options.number)
+        for keys in options.keys or [10, 1000, 10000]
+    }
+    print(json.dumps(results, indent=2) if options.json else report(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
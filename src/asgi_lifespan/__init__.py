@@ -1,10 +1,79 @@
-from ._exceptions import LifespanNotSupported
-from ._manager import LifespanManager
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from ._admission import AdmissionController
+    from ._cache import StateCache
+    from ._exceptions import LifespanNotSupported, LifespanTimeout
+    from ._group import LifespanGroup
+    from ._load import LoadReport, run_load
+    from ._manager import LifespanManager
+    from ._memory import MemoryDiagnostics
+    from ._metrics import InMemoryMetrics, MetricsCollector
+    from ._pool import LifespanPool
+    from ._prefork import run_prefork
+    from ._replicas import LifespanReplicas
+    from ._sync import SyncLifespanManager
+    from ._teardown import TeardownSupervisor
+    from ._tenants import TenantRegistry
+    from ._tracing import PhaseTimer
 
 __version__ = "2.1.0"
 
 __all__ = [
     "__version__",
+    "AdmissionController",
+    "InMemoryMetrics",
+    "LifespanGroup",
     "LifespanManager",
     "LifespanNotSupported",
+    "LifespanPool",
+    "LifespanReplicas",
+    "LifespanTimeout",
+    "LoadReport",
+    "MemoryDiagnostics",
+    "MetricsCollector",
+    "PhaseTimer",
+    "StateCache",
+    "SyncLifespanManager",
+    "TeardownSupervisor",
+    "TenantRegistry",
+    "run_load",
+    "run_prefork",
 ]
+
+# Modules are imported on first access to one of their names, so that e.g.
+# importing `LifespanManager` doesn't import asyncio for `run_prefork()`.
+_modules = {
+    "AdmissionController": "._admission",
+    "InMemoryMetrics": "._metrics",
+    "LifespanGroup": "._group",
+    "LifespanManager": "._manager",
+    "LifespanNotSupported": "._exceptions",
+    "LifespanPool": "._pool",
+    "LifespanReplicas": "._replicas",
+    "LifespanTimeout": "._exceptions",
+    "LoadReport": "._load",
+    "MemoryDiagnostics": "._memory",
+    "MetricsCollector": "._metrics",
+    "PhaseTimer": "._tracing",
+    "StateCache": "._cache",
+    "SyncLifespanManager": "._sync",
+    "TeardownSupervisor": "._teardown",
+    "TenantRegistry": "._tenants",
+    "run_load": "._load",
+    "run_prefork": "._prefork",
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    module = _modules.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted({*globals(), *__all__})
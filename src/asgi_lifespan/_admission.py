@@ -0,0 +1,129 @@
+import collections
+import time
+import typing
+
+from ._concurrency.base import BaseEvent, ConcurrencyBackend
+
+PHASES = ("startup", "shutdown")
+
+
+class _Waiter:
+    def __init__(self, event: BaseEvent, priority: int, group: typing.Hashable) -> None:
+        self.event = event
+        self.priority = priority
+        self.group = group
+
+
+class AdmissionController:
+    """
+    Limit how many startups and shutdowns of `LifespanManager(admission=...)`
+    managers run at a time, so that they don't all hit shared resources at once.
+
+    Waiting managers are admitted by decreasing priority. Within a priority,
+    groups take turns, so that a group with many waiting managers can't starve
+    the others.
+    """
+
+    def __init__(self, max_concurrency: typing.Optional[int] = 4) -> None:
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.admitted = {phase: 0 for phase in PHASES}
+        self.total_wait = {phase: 0.0 for phase in PHASES}
+        self.max_wait = {phase: 0.0 for phase in PHASES}
+        # Priority -> group -> waiters, groups being kept in turn order.
+        self._queues: typing.Dict[
+            int,
+            "collections.OrderedDict[typing.Hashable, typing.Deque[_Waiter]]",
+        ] = {}
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of startups and shutdowns waiting to be admitted.
+        """
+        return sum(
+            len(waiters)
+            for groups in self._queues.values()
+            for waiters in groups.values()
+        )
+
+    async def acquire(
+        self,
+        backend: ConcurrencyBackend,
+        phase: str,
+        priority: int = 0,
+        group: typing.Optional[typing.Hashable] = None,
+    ) -> float:
+        """
+        Wait for a slot, and return how long that took, in seconds.
+        """
+        start = time.perf_counter()
+        if self.max_concurrency is None or (
+            self.active < self.max_concurrency and not self._queues
+        ):
+            self.active += 1
+        else:
+            waiter = _Waiter(
+                backend.create_event(),
+                priority,
+                # Default to a group of its own: first come, first served.
+                object() if group is None else group,
+            )
+            self._enqueue(waiter)
+            try:
+                await waiter.event.wait()
+            except BaseException:
+                if not self._dequeue(waiter):
+                    # We were handed a slot already: pass it on.
+                    self.release()
+                raise
+
+        wait = time.perf_counter() - start
+        self.admitted[phase] += 1
+        self.total_wait[phase] += wait
+        self.max_wait[phase] = max(self.max_wait[phase], wait)
+        return wait
+
+    def release(self) -> None:
+        waiter = self._next()
+        if waiter is None:
+            self.active -= 1
+        else:
+            # Hand the slot over.
+            waiter.event.set()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        groups = self._queues.setdefault(waiter.priority, collections.OrderedDict())
+        groups.setdefault(waiter.group, collections.deque()).append(waiter)
+
+    def _dequeue(self, waiter: _Waiter) -> bool:
+        groups = self._queues.get(waiter.priority)
+        waiters = None if groups is None else groups.get(waiter.group)
+        if waiters is None or waiter not in waiters:
+            return False
+        waiters.remove(waiter)
+        self._discard_empty(waiter.priority, waiter.group)
+        return True
+
+    def _next(self) -> typing.Optional[_Waiter]:
+        if not self._queues:
+            return None
+        priority = max(self._queues)
+        groups = self._queues[priority]
+        group, waiters = next(iter(groups.items()))
+        waiter = waiters.popleft()
+        # The group goes to the back of the line.
+        groups.move_to_end(group)
+        self._discard_empty(priority, group)
+        return waiter
+
+    def _discard_empty(self, priority: int, group: typing.Hashable) -> None:
+        groups = self._queues[priority]
+        if not groups[group]:
+            del groups[group]
+        if not groups:
+            del self._queues[priority]
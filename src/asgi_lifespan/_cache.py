@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import typing
+
+logger = logging.getLogger("asgi_lifespan")
+
+MAGIC = b"ASGILSC1"
+# Magic, SHA-256 of the fingerprint, payload offset and size, number of buffers.
+PREFIX = struct.Struct("<8s32sQQQ")
+# Offset and size of each out-of-band buffer.
+LOCATION = struct.Struct("<QQ")
+ALIGNMENT = 64
+SUFFIX = ".lifespan-cache"
+
+# Protocol 5 (Python 3.8+) pickles large buffers out-of-band, which lets us
+# memory-map them instead of copying them on load.
+OUT_OF_BAND = pickle.HIGHEST_PROTOCOL >= 5
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class StateCache:
+    """
+    Persist chosen keys of the lifespan state to a local file after startup, and
+    preload them into the state of later runs before startup, so that the app
+    can skip building them again.
+
+    Entries are keyed by `fingerprint`, which should change whenever the cached
+    values would, e.g. a hash of the input data and code version.
+    """
+
+    def __init__(
+        self,
+        directory: typing.Union[str, "os.PathLike[str]"],
+        fingerprint: str,
+        keys: typing.Iterable[str],
+        max_entries: typing.Optional[int] = 8,
+        mmap_threshold: int = 1 << 16,
+    ) -> None:
+        self.directory = os.fspath(directory)
+        self.fingerprint = fingerprint
+        self.keys = list(keys)
+        self.max_entries = max_entries
+        self.mmap_threshold = mmap_threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loaded_bytes = 0
+        self.saved_bytes = 0
+        # Maps of loaded entries, whose buffers may be used by the state.
+        self._maps: typing.List[mmap.mmap] = []
+
+    def _digest(self) -> bytes:
+        return hashlib.sha256(self.fingerprint.encode()).digest()
+
+    @property
+    def path(self) -> str:
+        """
+        Path of the cache file for the fingerprint.
+        """
+        name = self._digest().hex()[:32] + SUFFIX
+        return os.path.join(self.directory, name)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the cache files in `directory`, in bytes.
+        """
+        return sum(os.path.getsize(path) for path in self._entries())
+
+    def _entries(self) -> typing.List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith(SUFFIX)
+        ]
+
+    def load(self, state: typing.Dict[str, typing.Any]) -> bool:
+        """
+        Preload the cached keys into `state`, except those it already has.
+
+        Return whether there was a cache entry for the fingerprint. Unreadable
+        entries are logged and count as misses.
+        """
+        try:
+            values = self._read()
+        except FileNotFoundError:
+            values = None
+        except Exception:
+            logger.warning(
+                "Ignoring unreadable state cache %s", self.path, exc_info=True
+            )
+            values = None
+
+        if values is None:
+            self.misses += 1
+            return False
+
+        for key, value in values.items():
+            state.setdefault(key, value)
+        self.hits += 1
+        # Keep recently used entries from being evicted.
+        os.utime(self.path)
+        return True
+
+    def _read(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        with open(self.path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(data)
+        try:
+            return self._unpickle(data)
+        finally:
+            # Unless values use buffers of the map, it can be closed already.
+            self.close()
+
+    def _unpickle(
+        self, data: mmap.mmap
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        with memoryview(data) as view:
+            magic, digest, offset, length, count = PREFIX.unpack_from(view)
+            if magic != MAGIC:
+                raise ValueError("Not a state cache file")
+            if digest != self._digest():
+                return None  # Hash prefix collision.
+
+            locations = [
+                LOCATION.unpack_from(view, PREFIX.size + index * LOCATION.size)
+                for index in range(count)
+            ]
+            # Large buffers are views over the mapped file: they are paged in
+            # on access, and shared with other processes using the same entry.
+            buffers = [view[start : start + nbytes] for start, nbytes in locations]
+            with view[offset : offset + length] as payload:
+                if OUT_OF_BAND:
+                    values = pickle.loads(payload, buffers=buffers)
+                else:
+                    values = pickle.loads(payload)
+            # Released unless the values hold on to them.
+            del buffers
+        self.loaded_bytes = len(data)
+        return values
+
+    def close(self) -> None:
+        """
+        Close the maps of loaded entries that values no longer use.
+        """
+        maps, self._maps = self._maps, []
+        for data in maps:
+            try:
+                data.close()
+            except BufferError:
+                # Still used, e.g. by the lifespan state.
+                self._maps.append(data)
+
+    def save(self, state: typing.Dict[str, typing.Any]) -> bool:
+        """
+        Write the cached keys of `state` to the entry for the fingerprint, then
+        evict old entries.
+
+        Return whether the entry was written. Values that can't be pickled are
+        logged, and nothing is written.
+        """
+        values = {key: state[key] for key in self.keys if key in state}
+        buffers: typing.List["pickle.PickleBuffer"] = []
+
+        def out_of_band(buffer: "pickle.PickleBuffer") -> bool:
+            if buffer.raw().nbytes < self.mmap_threshold:
+                return True  # Pickle in-band.
+            buffers.append(buffer)
+            return False
+
+        try:
+            if OUT_OF_BAND:
+                payload = pickle.dumps(values, protocol=5, buffer_callback=out_of_band)
+            else:
+                payload = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            logger.warning("Could not pickle lifespan state to cache", exc_info=True)
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                self.saved_bytes = self._write(file, payload, buffers)
+            # Atomic, so that concurrent readers never see a partial entry.
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.evict()
+        return True
+
+    def _write(
+        self,
+        file: typing.BinaryIO,
+        payload: bytes,
+        buffers: typing.List["pickle.PickleBuffer"],
+    ) -> int:
+        raws = [buffer.raw() for buffer in buffers]
+        start = _align(PREFIX.size + LOCATION.size * len(raws))
+        offset = _align(start + len(payload))
+        locations = []
+        for raw in raws:
+            locations.append((offset, raw.nbytes))
+            offset = _align(offset + raw.nbytes)
+
+        file.write(PREFIX.pack(MAGIC, self._digest(), start, len(payload), len(raws)))
+        for location in locations:
+            file.write(LOCATION.pack(*location))
+        file.seek(start)
+        file.write(payload)
+        # Aligned, so that e.g. arrays can be used in place.
+        for (buffer_offset, _), raw in zip(locations, raws):
+            file.seek(buffer_offset)
+            file.write(raw)
+        return file.tell()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries over `max_entries`.
+        """
+        if self.max_entries is None:
+            return
+        entries = sorted(self._entries(), key=os.path.getmtime, reverse=True)
+        for path in entries[self.max_entries :]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:  # pragma: no cover
+                continue
+            self.evictions += 1
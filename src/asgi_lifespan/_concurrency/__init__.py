@@ -1,20 +1,60 @@
-import sniffio
+import typing
 
 from .base import ConcurrencyBackend
 
+BACKENDS = ("asyncio", "asyncio-eager", "trio", "anyio")
+
+# Backends are stateless, so one instance of each is shared by all managers.
+# Backend modules, and the async libraries they use, are imported on first use.
+_backends: typing.Dict[str, ConcurrencyBackend] = {}
+
+
+def create_concurrency_backend(name: str) -> ConcurrencyBackend:
+    backend = _backends.get(name)
+    if backend is None:
+        backend = _backends[name] = _create_concurrency_backend(name)
+    return backend
 
-def detect_concurrency_backend() -> ConcurrencyBackend:
-    library = sniffio.current_async_library()
 
-    if library == "asyncio":
+def _create_concurrency_backend(name: str) -> ConcurrencyBackend:
+    if name == "asyncio":
         from .asyncio import AsyncioBackend
 
         return AsyncioBackend()
-    elif library == "trio":
+    elif name == "asyncio-eager":
+        from .asyncio import AsyncioBackend
+
+        return AsyncioBackend(eager=True)
+    elif name == "trio":
         from .trio import TrioBackend
 
         return TrioBackend()
+    elif name == "anyio":
+        from .anyio import AnyioBackend
+
+        return AnyioBackend()
+
+    raise ValueError(f"backend must be one of {BACKENDS}, got {name!r}")
+
+
+def detect_concurrency_backend() -> ConcurrencyBackend:
+    import sniffio
+
+    library = sniffio.current_async_library()
+
+    if library not in ("asyncio", "trio"):
+        raise NotImplementedError(
+            f"Unsupported async library: {library}"
+        )  # pragma: no cover
+
+    return create_concurrency_backend(library)
+
 
-    raise NotImplementedError(
-        f"Unsupported async library: {library}"
-    )  # pragma: no cover
+def get_concurrency_backend(
+    backend: typing.Union[str, ConcurrencyBackend, None] = None
+) -> ConcurrencyBackend:
+    if backend is None:
+        return detect_concurrency_backend()
+    if isinstance(backend, ConcurrencyBackend):
+        return backend
+    return create_concurrency_backend(backend)
@@ -0,0 +1,184 @@
+import sys
+import traceback
+import types
+import typing
+
+import anyio
+import sniffio
+
+if sys.version_info < (3, 11):  # pragma: no cover
+    from exceptiongroup import ExceptionGroup
+
+from .base import (
+    BaseBackground,
+    BaseEvent,
+    BaseQueue,
+    BaseTaskGroup,
+    ConcurrencyBackend,
+    T,
+    extract_coroutine_stack,
+)
+
+
+def _unwrap(exc: BaseException) -> BaseException:
+    exceptions = getattr(exc, "exceptions", None)
+    if exceptions is not None and len(exceptions) == 1:
+        return _unwrap(exceptions[0])
+    return exc
+
+
+async def _exit_task_group(
+    task_group: anyio.abc.TaskGroup,
+    exc_type: typing.Optional[typing.Type[BaseException]],
+    exc_value: typing.Optional[BaseException],
+    traceback: typing.Optional[types.TracebackType],
+) -> None:
+    # anyio 4 raises exception groups, even for a single exception, which
+    # the other backends don't.
+    try:
+        await task_group.__aexit__(exc_type, exc_value, traceback)
+    except BaseException as exc:
+        unwrapped = _unwrap(exc)
+        if unwrapped is exc_value:
+            return  # Let the caller re-raise it.
+        if unwrapped is exc:
+            raise
+        raise unwrapped from None
+
+
+class AnyioEvent(BaseEvent):
+    def __init__(self) -> None:
+        self._event = anyio.Event()
+
+    def set(self) -> None:
+        self._event.set()
+
+    async def wait(self) -> None:
+        await self._event.wait()
+
+
+class AnyioQueue(BaseQueue):
+    def __init__(self, capacity: int) -> None:
+        streams: typing.Tuple[
+            typing.Any, typing.Any
+        ] = anyio.create_memory_object_stream(max_buffer_size=capacity)
+        self._send_stream, self._receive_stream = streams
+
+    async def get(self) -> typing.Any:
+        return await self._receive_stream.receive()
+
+    async def put(self, value: typing.Any) -> None:
+        await self._send_stream.send(value)
+
+
+class AnyioTaskGroup(BaseTaskGroup):
+    def __init__(self) -> None:
+        self._task_group = anyio.create_task_group()
+
+    async def __aenter__(self) -> "AnyioTaskGroup":
+        await self._task_group.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        await _exit_task_group(self._task_group, exc_type, exc_value, traceback)
+
+    def start_soon(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> None:
+        self._task_group.start_soon(coroutine)  # type: ignore
+
+
+class AnyioBackend(ConcurrencyBackend):
+    """
+    A backend built on anyio, which runs on top of either asyncio or trio.
+    """
+
+    def create_event(self) -> BaseEvent:
+        return AnyioEvent()
+
+    def create_queue(self, capacity: int) -> BaseQueue:
+        return AnyioQueue(capacity=capacity)
+
+    def create_task_group(self) -> BaseTaskGroup:
+        return AnyioTaskGroup()
+
+    async def sleep(self, seconds: float) -> None:
+        await anyio.sleep(seconds)
+
+    async def run_and_fail_after(
+        self,
+        seconds: typing.Optional[float],
+        coroutine: typing.Callable[[], typing.Awaitable[None]],
+    ) -> None:
+        with anyio.move_on_after(seconds):
+            await coroutine()
+            return
+        raise TimeoutError
+
+    def run_in_background(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> BaseBackground:
+        return Background(coroutine)
+
+    async def run_in_thread(
+        self, func: typing.Callable[..., T], *args: typing.Any
+    ) -> T:
+        return await anyio.to_thread.run_sync(func, *args)
+
+
+class Background(BaseBackground):
+    def __init__(self, coroutine: typing.Callable[[], typing.Awaitable[None]]) -> None:
+        self.coroutine = coroutine
+        self._coro: typing.Any = None
+        self._exception: typing.Optional[Exception] = None
+        self._task_group: typing.Optional[anyio.abc.TaskGroup] = None
+
+    async def _run(self) -> None:
+        self._coro = anyio.get_current_task().coro
+        try:
+            await self.coroutine()
+        except Exception as exc:
+            # Raised on exit, as is, instead of in an exception group.
+            self._exception = exc
+
+    async def __aenter__(self) -> None:
+        task_group = anyio.create_task_group()
+        await task_group.__aenter__()
+        task_group.start_soon(self._run)  # type: ignore
+        self._task_group = task_group
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        # Don't wait on an app that is stuck, e.g. after a timeout.
+        assert self._task_group is not None
+        self._task_group.cancel_scope.cancel()
+        await _exit_task_group(self._task_group, exc_type, exc_value, traceback)
+
+        if self._exception is None:
+            return
+        # Report errors of the app alongside an exception of the 'async with'
+        # block the same way as the native backend of the running loop.
+        if (
+            isinstance(exc_value, Exception)
+            and sniffio.current_async_library() == "trio"
+        ):
+            raise ExceptionGroup(
+                "Exceptions from the app and the 'async with' block",
+                [self._exception, exc_value],
+            )
+        # Chained to the exception of the block, if any.
+        raise self._exception
+
+    def extract_stack(self) -> traceback.StackSummary:
+        if self._coro is None:
+            return traceback.StackSummary()  # pragma: no cover
+        return extract_coroutine_stack(self._coro)
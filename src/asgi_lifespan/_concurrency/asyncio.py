@@ -1,9 +1,21 @@
 import asyncio
+import collections
 import contextlib
+import functools
+import sys
+import traceback
 import types
 import typing
 
-from .base import BaseEvent, BaseQueue, ConcurrencyBackend
+from .base import (
+    BaseBackground,
+    BaseEvent,
+    BaseQueue,
+    BaseTaskGroup,
+    ConcurrencyBackend,
+    T,
+    extract_coroutine_stack,
+)
 
 
 class AsyncioEvent(BaseEvent):
@@ -28,18 +40,189 @@ class AsyncioQueue(BaseQueue):
         await self._queue.put(value)
 
 
+class FutureEvent(BaseEvent):
+    """
+    An event that wakes up waiters by resolving their futures directly.
+    """
+
+    def __init__(self) -> None:
+        self._is_set = False
+        self._waiters: typing.List[asyncio.Future] = []
+
+    def set(self) -> None:
+        if self._is_set:
+            return
+        self._is_set = True
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait(self) -> None:
+        if self._is_set:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+
+class FutureQueue(BaseQueue):
+    """
+    A queue that hands values over to a waiting getter by resolving its future,
+    without going through the buffer.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._items: typing.Deque[typing.Any] = collections.deque()
+        self._getters: typing.Deque[asyncio.Future] = collections.deque()
+        self._putters: typing.Deque[asyncio.Future] = collections.deque()
+
+    async def get(self) -> typing.Any:
+        if self._items:
+            value = self._items.popleft()
+            _wake_up_next(self._putters)
+            return value
+
+        getter = asyncio.get_running_loop().create_future()
+        self._getters.append(getter)
+        try:
+            return await getter
+        except BaseException:
+            if getter.done() and not getter.cancelled():
+                # We were handed a value, but got cancelled before returning it.
+                self._items.appendleft(getter.result())
+            elif getter in self._getters:
+                self._getters.remove(getter)
+            raise
+
+    async def put(self, value: typing.Any) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(value)
+                return
+
+        while len(self._items) >= self._capacity:
+            putter = asyncio.get_running_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except BaseException:
+                if putter in self._putters:
+                    self._putters.remove(putter)
+                else:
+                    _wake_up_next(self._putters)
+                raise
+
+        self._items.append(value)
+
+
+def _wake_up_next(waiters: typing.Deque[asyncio.Future]) -> None:
+    while waiters:
+        waiter = waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
+            return
+
+
+class AsyncioTaskGroup(BaseTaskGroup):
+    def __init__(self) -> None:
+        self._tasks: typing.Set[asyncio.Task] = set()
+        self._exception: typing.Optional[BaseException] = None
+
+    async def __aenter__(self) -> "AsyncioTaskGroup":
+        return self
+
+    def start_soon(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> None:
+        loop = asyncio.get_event_loop()
+        task = loop.create_task(coroutine())  # type: ignore
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None and self._exception is None:
+            # Fail fast, like a trio nursery would.
+            self._exception = exc
+            self._cancel()
+
+    def _cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        if exc_value is not None:
+            self._cancel()
+
+        cancelled = False
+        while self._tasks:
+            try:
+                await asyncio.wait(set(self._tasks))
+            except asyncio.CancelledError:
+                cancelled = True
+                self._cancel()
+
+        if cancelled:
+            raise asyncio.CancelledError
+
+        if exc_value is None and self._exception is not None:
+            raise self._exception
+
+
 class AsyncioBackend(ConcurrencyBackend):
+    """
+    If `eager` is true, take a fast path for apps that start up without really
+    suspending: the app task starts eagerly (Python 3.12+), and events and
+    queues resolve futures directly, so that startup takes as few event loop
+    iterations as possible.
+    """
+
+    def __init__(self, eager: bool = False) -> None:
+        self.eager = eager
+
     def create_event(self) -> BaseEvent:
+        if self.eager:
+            return FutureEvent()
         return AsyncioEvent()
 
     def create_queue(self, capacity: int) -> BaseQueue:
+        if self.eager:
+            return FutureQueue(capacity=capacity)
         return AsyncioQueue(capacity=capacity)
 
+    def create_task_group(self) -> BaseTaskGroup:
+        return AsyncioTaskGroup()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
     async def run_and_fail_after(
         self,
         seconds: typing.Optional[float],
         coroutine: typing.Callable[[], typing.Awaitable[None]],
     ) -> None:
+        if self.eager and hasattr(asyncio, "timeout"):  # Python 3.11+
+            # Unlike 'wait_for()' on Python < 3.12, this does not run the
+            # coroutine in a separate task.
+            async with asyncio.timeout(seconds):
+                await coroutine()
+            return
+
         try:
             await asyncio.wait_for(coroutine(), timeout=seconds)
         except asyncio.TimeoutError:
@@ -47,23 +230,31 @@ class AsyncioBackend(ConcurrencyBackend):
 
     def run_in_background(
         self, coroutine: typing.Callable[[], typing.Awaitable[None]]
-    ) -> typing.AsyncContextManager:
+    ) -> BaseBackground:
+        if self.eager:
+            return EagerBackground(coroutine)
         return Background(coroutine)
 
+    async def run_in_thread(
+        self, func: typing.Callable[..., T], *args: typing.Any
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
 
-class Background:
+class Background(BaseBackground):
     def __init__(self, coroutine: typing.Callable[[], typing.Awaitable[None]]) -> None:
         self.coroutine = coroutine
         self.task: typing.Optional[asyncio.Task] = None
         self._task_exception: typing.Optional[BaseException] = None
 
     async def __aenter__(self) -> None:
-        async def run_and_silence_cancelled() -> None:
-            with contextlib.suppress(asyncio.CancelledError):
-                await self.coroutine()
-
         loop = asyncio.get_event_loop()
-        self.task = loop.create_task(run_and_silence_cancelled())
+        self.task = loop.create_task(self._run_and_silence_cancelled())
+
+    async def _run_and_silence_cancelled(self) -> None:
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.coroutine()
 
     async def __aexit__(
         self,
@@ -73,11 +264,32 @@ class Background:
     ) -> None:
         assert self.task is not None
 
-        _, pending = await asyncio.wait({self.task}, timeout=0)
-        if pending:
-            self.task.cancel()
+        if not self.task.done():
+            _, pending = await asyncio.wait({self.task}, timeout=0)
+            if pending:
+                self.task.cancel()
 
         await self.task
 
         if exc_type is None:
             self.task.result()
+
+    def extract_stack(self) -> traceback.StackSummary:
+        if self.task is None:
+            return traceback.StackSummary()  # pragma: no cover
+        # NOTE: 'Task.get_stack()' only returns the outermost frame of
+        # a suspended coroutine.
+        return extract_coroutine_stack(self.task._coro)  # type: ignore
+
+
+class EagerBackground(Background):
+    async def __aenter__(self) -> None:
+        loop = asyncio.get_running_loop()
+        if sys.version_info >= (3, 12):
+            # Run the app up to its first suspension point right away, instead
+            # of on the next event loop iteration.
+            self.task = asyncio.Task(
+                self._run_and_silence_cancelled(), loop=loop, eager_start=True
+            )
+        else:
+            self.task = loop.create_task(self._run_and_silence_cancelled())
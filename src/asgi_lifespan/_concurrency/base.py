@@ -1,5 +1,27 @@
+import traceback
+import types
 import typing
 
+T = typing.TypeVar("T")
+
+
+def extract_coroutine_stack(coroutine: typing.Any) -> traceback.StackSummary:
+    """
+    Walk down the chain of coroutines awaited by `coroutine`, outermost first.
+    """
+    frames = []
+    while coroutine is not None:
+        frame = getattr(coroutine, "cr_frame", None) or getattr(
+            coroutine, "gi_frame", None
+        )
+        if frame is None:
+            break
+        frames.append((frame, frame.f_lineno))
+        coroutine = getattr(coroutine, "cr_await", None) or getattr(
+            coroutine, "gi_yieldfrom", None
+        )
+    return traceback.StackSummary.extract(iter(frames))
+
 
 class BaseEvent:
     def set(self) -> None:
@@ -17,6 +39,40 @@ class BaseQueue:
         raise NotImplementedError  # pragma: no cover
 
 
+class BaseBackground:
+    async def __aenter__(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def extract_stack(self) -> traceback.StackSummary:
+        raise NotImplementedError  # pragma: no cover
+
+
+class BaseTaskGroup:
+    async def __aenter__(self) -> "BaseTaskGroup":
+        raise NotImplementedError  # pragma: no cover
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def start_soon(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+
 class ConcurrencyBackend:
     def create_event(self) -> BaseEvent:
         raise NotImplementedError  # pragma: no cover
@@ -24,6 +80,12 @@ class ConcurrencyBackend:
     def create_queue(self, capacity: int) -> BaseQueue:
         raise NotImplementedError  # pragma: no cover
 
+    def create_task_group(self) -> BaseTaskGroup:
+        raise NotImplementedError  # pragma: no cover
+
+    async def sleep(self, seconds: float) -> None:
+        raise NotImplementedError  # pragma: no cover
+
     async def run_and_fail_after(
         self,
         seconds: typing.Optional[float],
@@ -33,5 +95,10 @@ class ConcurrencyBackend:
 
     def run_in_background(
         self, coroutine: typing.Callable[[], typing.Awaitable[None]]
-    ) -> typing.AsyncContextManager:
+    ) -> BaseBackground:
+        raise NotImplementedError  # pragma: no cover
+
+    async def run_in_thread(
+        self, func: typing.Callable[..., T], *args: typing.Any
+    ) -> T:
         raise NotImplementedError  # pragma: no cover
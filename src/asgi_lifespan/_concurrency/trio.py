@@ -1,10 +1,19 @@
+import traceback
 import types
 import typing
 
 import trio
 
 from .._compat import AsyncExitStack
-from .base import BaseEvent, BaseQueue, ConcurrencyBackend
+from .base import (
+    BaseBackground,
+    BaseEvent,
+    BaseQueue,
+    BaseTaskGroup,
+    ConcurrencyBackend,
+    T,
+    extract_coroutine_stack,
+)
 
 
 class TrioEvent(BaseEvent):
@@ -31,6 +40,30 @@ class TrioQueue(BaseQueue):
         await self._send_channel.send(value)
 
 
+class TrioTaskGroup(BaseTaskGroup):
+    def __init__(self) -> None:
+        self._exit_stack = AsyncExitStack()
+        self._nursery: typing.Optional[trio.Nursery] = None
+
+    async def __aenter__(self) -> "TrioTaskGroup":
+        self._nursery = await self._exit_stack.enter_async_context(trio.open_nursery())
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[types.TracebackType] = None,
+    ) -> None:
+        await self._exit_stack.__aexit__(exc_type, exc_value, traceback)
+
+    def start_soon(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> None:
+        assert self._nursery is not None
+        self._nursery.start_soon(coroutine)
+
+
 class TrioBackend(ConcurrencyBackend):
     def create_event(self) -> BaseEvent:
         return TrioEvent()
@@ -38,6 +71,12 @@ class TrioBackend(ConcurrencyBackend):
     def create_queue(self, capacity: int) -> BaseQueue:
         return TrioQueue(capacity=capacity)
 
+    def create_task_group(self) -> BaseTaskGroup:
+        return TrioTaskGroup()
+
+    async def sleep(self, seconds: float) -> None:
+        await trio.sleep(seconds)
+
     async def run_and_fail_after(
         self,
         seconds: typing.Optional[float],
@@ -50,18 +89,27 @@ class TrioBackend(ConcurrencyBackend):
 
     def run_in_background(
         self, coroutine: typing.Callable[[], typing.Awaitable[None]]
-    ) -> typing.AsyncContextManager:
+    ) -> BaseBackground:
         return Background(coroutine)
 
+    async def run_in_thread(
+        self, func: typing.Callable[..., T], *args: typing.Any
+    ) -> T:
+        return await trio.to_thread.run_sync(func, *args)
 
-class Background:
+
+class Background(BaseBackground):
     def __init__(self, coroutine: typing.Callable[[], typing.Awaitable[None]]) -> None:
         self.coroutine = coroutine
+        self.task: typing.Optional[trio.lowlevel.Task] = None
+        self._nursery: typing.Optional[trio.Nursery] = None
         self._exit_stack = AsyncExitStack()
 
     async def __aenter__(self) -> None:
         nursery = await self._exit_stack.enter_async_context(trio.open_nursery())
         nursery.start_soon(self.coroutine)
+        (self.task,) = nursery.child_tasks
+        self._nursery = nursery
 
     async def __aexit__(
         self,
@@ -69,4 +117,13 @@ class Background:
         exc_value: typing.Optional[BaseException] = None,
         traceback: typing.Optional[types.TracebackType] = None,
     ) -> None:
+        # Don't wait on an app that is stuck, e.g. after a timeout.
+        # (Same as the asyncio backend.)
+        assert self._nursery is not None
+        self._nursery.cancel_scope.cancel()
         await self._exit_stack.__aexit__(exc_type, exc_value, traceback)
+
+    def extract_stack(self) -> traceback.StackSummary:
+        if self.task is None:
+            return traceback.StackSummary()  # pragma: no cover
+        return extract_coroutine_stack(self.task.coro)
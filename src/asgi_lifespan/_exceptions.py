@@ -1,2 +1,24 @@
+import traceback
+import typing
+
+
 class LifespanNotSupported(Exception):
     pass
+
+
+class LifespanTimeout(TimeoutError):
+    def __init__(
+        self,
+        phase: str,
+        timeout: typing.Optional[float],
+        elapsed: float,
+        stack: traceback.StackSummary,
+    ) -> None:
+        self.phase = phase
+        self.timeout = timeout
+        self.elapsed = elapsed
+        self.stack = stack
+        message = f"Application {phase} timed out after {elapsed:.3f}s."
+        if stack:
+            message += " The app was stuck at:\n" + "".join(stack.format()).rstrip()
+        super().__init__(message)
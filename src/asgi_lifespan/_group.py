@@ -0,0 +1,168 @@
+import functools
+import typing
+from types import TracebackType
+
+from ._concurrency import detect_concurrency_backend
+from ._concurrency.base import BaseTaskGroup
+from ._hosting import HostedLifespan
+from ._manager import LifespanManager
+from ._types import ASGIApp
+
+
+def _layers(
+    names: typing.Iterable[str], starts_after: typing.Mapping[str, typing.Iterable[str]]
+) -> typing.List[typing.List[str]]:
+    # Kahn's algorithm, grouping apps that can start at the same time.
+    pending = {name: set(starts_after.get(name, ())) for name in names}
+
+    for name, dependencies in pending.items():
+        unknown = dependencies - pending.keys()
+        if unknown:
+            raise ValueError(f"{name!r} starts after unknown apps: {sorted(unknown)}")
+
+    for name in starts_after:
+        if name not in pending:
+            raise ValueError(f"Unknown app: {name!r}")
+
+    layers = []
+    while pending:
+        layer = [name for name, dependencies in pending.items() if not dependencies]
+        if not layer:
+            raise ValueError(f"Dependency cycle between apps: {sorted(pending)}")
+        for name in layer:
+            del pending[name]
+        for dependencies in pending.values():
+            dependencies.difference_update(layer)
+        layers.append(layer)
+
+    return layers
+
+
+class LifespanGroup:
+    def __init__(
+        self,
+        apps: typing.Mapping[str, ASGIApp],
+        starts_after: typing.Optional[typing.Mapping[str, typing.Iterable[str]]] = None,
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+    ) -> None:
+        starts_after = starts_after or {}
+        # Validated, and in an order where dependencies come first.
+        self._order = [name for layer in _layers(apps, starts_after) for name in layer]
+        self._starts_after = {name: list(starts_after.get(name, ())) for name in apps}
+        self._dependents: typing.Dict[str, typing.List[str]] = {
+            name: [] for name in apps
+        }
+        for name, dependencies in self._starts_after.items():
+            for dependency in dependencies:
+                self._dependents[dependency].append(name)
+        self.startup_timeout = startup_timeout
+        self.shutdown_timeout = shutdown_timeout
+
+        self._concurrency_backend = detect_concurrency_backend()
+        self.managers: typing.Dict[str, LifespanManager] = {
+            name: LifespanManager(
+                app, startup_timeout=startup_timeout, shutdown_timeout=shutdown_timeout
+            )
+            for name, app in apps.items()
+        }
+        self._hosted = {
+            name: HostedLifespan(manager) for name, manager in self.managers.items()
+        }
+        self._spawned: typing.Set[str] = set()
+        self._closing = False
+        self._shutdown_errors: typing.List[BaseException] = []
+        self._task_group: typing.Optional[BaseTaskGroup] = None
+
+    async def _start(self) -> None:
+        assert self._task_group is not None
+
+        # Each app starts as soon as its own dependencies have started, so that
+        # startup takes as long as the longest chain of dependencies.
+        for name in self._order:
+            self._task_group.start_soon(functools.partial(self._run, name))
+        for name in self._order:
+            await self._hosted[name].wait_started()
+
+    async def _run(self, name: str) -> None:
+        for dependency in self._starts_after[name]:
+            try:
+                await self._hosted[dependency].wait_started()
+            except Exception:
+                return  # Raised by '_start()'.
+        if self._closing:
+            return
+        self._spawned.add(name)
+        await self._hosted[name].run()
+
+    async def _stop(self) -> None:
+        self._closing = True
+        async with self._concurrency_backend.create_task_group() as task_group:
+            for name in self._order:
+                if name in self._spawned:
+                    task_group.start_soon(functools.partial(self._stop_app, name))
+
+    async def _stop_app(self, name: str) -> None:
+        # Each app shuts down as soon as the apps that depend on it have.
+        for dependent in self._dependents[name]:
+            if dependent in self._spawned:
+                await self._hosted[dependent].wait_stopped()
+
+        hosted = self._hosted[name]
+        hosted.stop_soon()
+        await hosted.wait_stopped()
+        if hosted.started and hosted.exception is not None:
+            self._shutdown_errors.append(hosted.exception)
+
+    async def _close(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        assert self._task_group is not None
+
+        try:
+            await self._concurrency_backend.run_and_fail_after(
+                self.shutdown_timeout, self._stop
+            )
+        except BaseException as exc:
+            # Cancel whatever is still running.
+            await self._task_group.__aexit__(type(exc), exc, exc.__traceback__)
+            raise
+
+        await self._task_group.__aexit__(exc_type, exc_value, traceback)
+
+    async def __aenter__(self) -> "LifespanGroup":
+        self._task_group = self._concurrency_backend.create_task_group()
+        await self._task_group.__aenter__()
+
+        try:
+            await self._concurrency_backend.run_and_fail_after(
+                self.startup_timeout, self._start
+            )
+        except BaseException as exc:
+            # Shut down the apps that did start, then let the caller deal with
+            # the exception.
+            await self._close(type(exc), exc, exc.__traceback__)
+            raise
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[TracebackType] = None,
+    ) -> None:
+        assert self._task_group is not None
+
+        if exc_type is not None:
+            # Same as 'LifespanManager': no shutdown is performed.
+            await self._task_group.__aexit__(exc_type, exc_value, traceback)
+            return
+
+        await self._close(None, None, None)
+
+        if self._shutdown_errors:
+            raise self._shutdown_errors[0]
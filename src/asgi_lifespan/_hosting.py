@@ -0,0 +1,55 @@
+import time
+import typing
+
+from ._manager import LifespanManager
+
+
+class HostedLifespan:
+    """
+    Run a `LifespanManager` in a task of its own, so that the app can be started up
+    and shut down from any task (trio requires nurseries to be exited by the task
+    that opened them).
+    """
+
+    def __init__(self, manager: LifespanManager) -> None:
+        self.manager = manager
+        self.started = False
+        self.exception: typing.Optional[BaseException] = None
+        self.startup_duration: typing.Optional[float] = None
+
+        backend = manager._concurrency_backend
+        self._started = backend.create_event()
+        self._stop = backend.create_event()
+        self._stopped = backend.create_event()
+
+    async def run(self) -> None:
+        start = time.perf_counter()
+        try:
+            async with self.manager:
+                self.startup_duration = time.perf_counter() - start
+                self.started = True
+                self._started.set()
+                await self._stop.wait()
+        except Exception as exc:
+            self.exception = exc
+        finally:
+            self._started.set()
+            self._stopped.set()
+
+    async def wait_started(self) -> None:
+        await self._started.wait()
+        if not self.started:
+            assert self.exception is not None
+            raise self.exception
+
+    def stop_soon(self) -> None:
+        self._stop.set()
+
+    async def wait_stopped(self) -> None:
+        await self._stopped.wait()
+
+    async def stop(self) -> None:
+        self.stop_soon()
+        await self.wait_stopped()
+        if self.exception is not None:
+            raise self.exception
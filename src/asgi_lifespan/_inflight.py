@@ -0,0 +1,82 @@
+import typing
+
+from ._concurrency.base import BaseEvent, ConcurrencyBackend
+from ._types import Send
+
+
+class RequestTracker:
+    """
+    Count the requests running through the app, by scope type, so that shutdown
+    can wait for them to drain.
+    """
+
+    def __init__(
+        self,
+        backend: ConcurrencyBackend,
+        limits: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        self.limits = dict(limits or {})
+        self.in_flight: typing.Dict[str, int] = {}
+        self.total = 0
+        self.rejected = 0
+        self.admitting = True
+        self._backend = backend
+        self._idle: typing.Optional[BaseEvent] = None
+
+    def admit(self, scope_type: str) -> bool:
+        count = self.in_flight.get(scope_type, 0)
+        limit = self.limits.get(scope_type)
+        if not self.admitting or (limit is not None and count >= limit):
+            self.rejected += 1
+            return False
+        self.in_flight[scope_type] = count + 1
+        self.total += 1
+        return True
+
+    def release(self, scope_type: str) -> None:
+        self.in_flight[scope_type] -= 1
+        self.total -= 1
+        if self.total == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def drain(self, timeout: typing.Optional[float]) -> typing.Tuple[int, int]:
+        """
+        Stop admitting requests, and wait for running ones to complete.
+
+        Returns the number of requests that completed, and the number of requests
+        that were still running after `timeout`.
+        """
+        self.admitting = False
+        pending = self.total
+        if pending and timeout != 0:
+            self._idle = self._backend.create_event()
+            try:
+                await self._backend.run_and_fail_after(timeout, self._idle.wait)
+            except TimeoutError:
+                pass
+            finally:
+                self._idle = None
+        return pending - self.total, self.total
+
+
+async def reject(scope_type: str, send: Send) -> None:
+    if scope_type == "http":
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"Service Unavailable"})
+    elif scope_type == "websocket":
+        # 1013: Try Again Later.
+        await send({"type": "websocket.close", "code": 1013})
+    else:
+        raise RuntimeError(
+            f"Cannot admit {scope_type!r} request: "
+            "application is shutting down or at capacity."
+        )
@@ -0,0 +1,192 @@
+import functools
+import itertools
+import math
+import time
+import typing
+
+from ._concurrency import detect_concurrency_backend
+from ._concurrency.base import BaseEvent, ConcurrencyBackend
+from ._types import ASGIApp, Message, Scope
+from ._warmup import complete_scope
+
+DISCONNECT: Message = {"type": "http.disconnect"}
+
+
+def percentile(values: typing.Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted `values`, `q` being between 0 and 100.
+    """
+    if not values:
+        return math.nan
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+class Channel:
+    """
+    The `receive` and `send` of a single HTTP call.
+
+    The request body is passed as is, and response bodies are only counted, so
+    that no bytes are copied.
+    """
+
+    __slots__ = ("_backend", "_request", "_done", "complete", "status", "body_size")
+
+    def __init__(self, backend: ConcurrencyBackend, body: bytes) -> None:
+        self._backend = backend
+        self._request: typing.Optional[Message] = {
+            "type": "http.request",
+            "body": body,
+            "more_body": False,
+        }
+        self._done: typing.Optional[BaseEvent] = None
+        self.complete = False
+        self.status: typing.Optional[int] = None
+        self.body_size = 0
+
+    async def receive(self) -> Message:
+        request = self._request
+        if request is not None:
+            self._request = None
+            return request
+        # Apps may listen for a disconnect while responding, so only send one
+        # once the response is complete.
+        if not self.complete:
+            if self._done is None:
+                self._done = self._backend.create_event()
+            await self._done.wait()
+        return DISCONNECT
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.status = message["status"]
+        elif message_type == "http.response.body":
+            self.body_size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                self.complete = True
+                if self._done is not None:
+                    self._done.set()
+
+
+class LoadReport:
+    """
+    Results of `run_load()`.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.latencies: typing.List[float] = []
+        self.statuses: typing.Dict[int, int] = {}
+        self.body_size = 0
+
+    def record(self, latency: float, channel: Channel) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+        if channel.status is not None:
+            self.statuses[channel.status] = self.statuses.get(channel.status, 0) + 1
+        self.body_size += channel.body_size
+
+    @property
+    def throughput(self) -> float:
+        """
+        Completed requests per second.
+        """
+        return self.requests / self.duration if self.duration else math.nan
+
+    def percentiles(
+        self, qs: typing.Sequence[float] = (50, 90, 99, 99.9)
+    ) -> typing.Dict[str, float]:
+        """
+        Latency percentiles in seconds, e.g. `{"p50": ..., "p99": ...}`.
+        """
+        ordered = sorted(self.latencies)
+        return {f"p{q:g}": percentile(ordered, q) for q in qs}
+
+    def __repr__(self) -> str:
+        latencies = ", ".join(
+            f"{name}={value * 1e3:.3f}ms" for name, value in self.percentiles().items()
+        )
+        return (
+            f"<{self.__class__.__name__} requests={self.requests} "
+            f"errors={self.errors} throughput={self.throughput:.1f}/s {latencies}>"
+        )
+
+
+async def run_load(
+    app: ASGIApp,
+    scopes: typing.Optional[typing.Sequence[Scope]] = None,
+    requests: typing.Optional[int] = None,
+    duration: typing.Optional[float] = None,
+    concurrency: int = 10,
+    rate: typing.Optional[float] = None,
+    body: bytes = b"",
+) -> LoadReport:
+    """
+    Send HTTP requests to `app` in-process, and report throughput and latency.
+
+    Requests cycle through `scopes`, which are completed with defaults as for
+    warmup. Stop after `requests` requests or `duration` seconds, whichever
+    comes first (defaults to 1000 requests).
+
+    By default, `concurrency` workers send requests back to back (closed loop).
+    If `rate` is set, requests are sent at `rate` per second regardless of
+    completions (open loop), and latency is measured from the time each request
+    was due, so that a slow app can't hide its queueing delay.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if requests is None and duration is None:
+        requests = 1000
+
+    prepared = [complete_scope(scope) for scope in scopes or [{"type": "http"}]]
+    for scope in prepared:
+        if scope["type"] != "http":
+            raise ValueError(f"Only 'http' scopes are supported, got {scope['type']!r}")
+
+    backend = detect_concurrency_backend()
+    report = LoadReport()
+    indices: typing.Iterator[int] = itertools.count()
+    if requests is not None:
+        indices = iter(range(requests))
+
+    async def call(index: int, due: float) -> None:
+        # Copy the scope, as apps and middleware may modify it.
+        scope = dict(prepared[index % len(prepared)])
+        channel = Channel(backend, body)
+        try:
+            await app(scope, channel.receive, channel.send)
+        except Exception:
+            report.errors += 1
+        else:
+            report.record(time.perf_counter() - due, channel)
+
+    start = time.perf_counter()
+    deadline = math.inf if duration is None else start + duration
+
+    async with backend.create_task_group() as task_group:
+        if rate is None:
+
+            async def worker() -> None:
+                for index in indices:
+                    now = time.perf_counter()
+                    if now >= deadline:
+                        return
+                    await call(index, now)
+
+            for _ in range(concurrency):
+                task_group.start_soon(worker)
+        else:
+            for index in indices:
+                due = start + index / rate
+                if due >= deadline:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await backend.sleep(delay)
+                task_group.start_soon(functools.partial(call, index, due))
+
+    report.duration = time.perf_counter() - start
+    return report
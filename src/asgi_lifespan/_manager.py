@@ -1,16 +1,59 @@
+import logging
+import time
+import traceback
 import typing
 from contextlib import AsyncExitStack
 from types import TracebackType
 
-from ._concurrency import detect_concurrency_backend
-from ._exceptions import LifespanNotSupported
+from ._concurrency import get_concurrency_backend
+from ._concurrency.base import BaseBackground, BaseEvent, ConcurrencyBackend
+from ._exceptions import LifespanNotSupported, LifespanTimeout
+from ._inflight import RequestTracker, reject
+from ._metrics import MetricsCollector, get_outcome
+from ._modes import DeferredLifespan, LazyLifespan
+from ._state import REQUEST_STATE_MODES, StateView
+from ._tracing import EventHook
 from ._types import ASGIApp, Message, Receive, Scope, Send
+from ._warmup import Warmup, run_warmup
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    # Only imported when used, to keep importing the manager cheap.
+    from ._admission import AdmissionController
+    from ._cache import StateCache
+    from ._memory import MemoryDiagnostics
+    from ._teardown import TeardownSupervisor
+
+logger = logging.getLogger("asgi_lifespan")
+
+# Protocol extension: apps may send '{"type": PROGRESS, "stage": "..."}' during
+# startup to report that a stage of it is ready.
+PROGRESS = "lifespan.startup.progress"
+
+
+def state_middleware(
+    app: ASGIApp,
+    state: typing.Dict[str, typing.Any],
+    requests: RequestTracker,
+    request_state: str = "shared",
+) -> ASGIApp:
+    copy_on_write = request_state == "copy_on_write"
 
-def state_middleware(app: ASGIApp, state: typing.Dict[str, typing.Any]) -> ASGIApp:
     async def app_with_state(scope: Scope, receive: Receive, send: Send) -> None:
-        scope["state"] = state
-        await app(scope, receive, send)
+        scope_type = scope["type"]
+        if scope_type == "lifespan":
+            scope["state"] = state
+            await app(scope, receive, send)
+            return
+
+        scope["state"] = StateView(state) if copy_on_write else state
+
+        if not requests.admit(scope_type):
+            await reject(scope_type, send)
+            return
+        try:
+            await app(scope, receive, send)
+        finally:
+            requests.release(scope_type)
 
     return app_with_state
 
@@ -21,38 +64,342 @@ class LifespanManager:
         app: ASGIApp,
         startup_timeout: typing.Optional[float] = 5,
         shutdown_timeout: typing.Optional[float] = 5,
+        on_event: typing.Optional[EventHook] = None,
+        watchdog: typing.Optional[float] = None,
+        watchdog_interval: typing.Optional[float] = None,
+        lazy: bool = False,
+        idle_timeout: typing.Optional[float] = None,
+        drain_timeout: typing.Optional[float] = 0,
+        max_in_flight: typing.Optional[typing.Mapping[str, int]] = None,
+        warmup: typing.Optional[Warmup] = None,
+        warmup_concurrency: int = 10,
+        warmup_timeout: typing.Optional[float] = 5,
+        request_state: str = "shared",
+        teardown: typing.Optional["TeardownSupervisor"] = None,
+        state_cache: typing.Optional["StateCache"] = None,
+        metrics: typing.Optional[MetricsCollector] = None,
+        ready_stage: typing.Optional[str] = None,
+        diagnostics: typing.Optional["MemoryDiagnostics"] = None,
+        admission: typing.Optional["AdmissionController"] = None,
+        admission_priority: int = 0,
+        admission_group: typing.Optional[typing.Hashable] = None,
+        backend: typing.Union[str, ConcurrencyBackend, None] = None,
     ) -> None:
+        if lazy and teardown is not None:
+            raise ValueError("lazy and teardown cannot be used together")
+        if request_state not in REQUEST_STATE_MODES:
+            raise ValueError(
+                f"request_state must be one of {REQUEST_STATE_MODES}, "
+                f"got {request_state!r}"
+            )
+
+        self._concurrency_backend = get_concurrency_backend(backend)
+        self._requests = RequestTracker(self._concurrency_backend, max_in_flight)
         self._state: typing.Dict[str, typing.Any] = {}
-        self.app = state_middleware(app, self._state)
+        self._app_with_state = state_middleware(
+            app, self._state, self._requests, request_state
+        )
         self.startup_timeout = startup_timeout
         self.shutdown_timeout = shutdown_timeout
+        self._on_event = on_event
+        self.watchdog = watchdog
+        self.watchdog_interval = watchdog_interval
+        self.lazy = lazy
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+        self.warmup = warmup
+        self.warmup_concurrency = warmup_concurrency
+        self.warmup_timeout = warmup_timeout
+        self.request_state = request_state
+        self.teardown = teardown
+        self.state_cache = state_cache
+        self.metrics = metrics
+        self.ready_stage = ready_stage
+        self.diagnostics = diagnostics
+        self.admission = admission
+        self.admission_priority = admission_priority
+        self.admission_group = admission_group
 
-        self._concurrency_backend = detect_concurrency_backend()
+        self._mode: typing.Union[LazyLifespan, DeferredLifespan, None] = None
+        self.app = self._app_with_state
+        if lazy:
+            self._mode = LazyLifespan(self)
+            self.app = self._mode.app
+        elif teardown is not None:
+            self._mode = DeferredLifespan(self, teardown)
+
+        self.cycles = 0
+        self.startup_duration: typing.Optional[float] = None
+        self.startup_queue_time = 0.0
+        self.shutdown_queue_time = 0.0
+        self.shutdown_duration: typing.Optional[float] = None
+        self.total_startup_duration = 0.0
+        self.total_shutdown_duration = 0.0
+        self.warmup_latencies: typing.List[float] = []
+        self.drained = 0
+        self.abandoned = 0
+        self.cold_starts = 0
+        self.cold_start_latency: typing.Optional[float] = None
+        self.time_to_first_request: typing.Optional[float] = None
+        self._fresh = True
+        self._running = False
+        self._keep_state = False
+
+        self._reset()
+
+    def _reset(self) -> None:
+        # (Re-)arm everything that a lifespan cycle uses up.
         self._startup_complete = self._concurrency_backend.create_event()
         self._shutdown_complete = self._concurrency_backend.create_event()
         self._receive_queue = self._concurrency_backend.create_queue(capacity=2)
         self._receive_called = False
         self._app_exception: typing.Optional[BaseException] = None
+        # Startup is over, whether it completed or the app crashed.
+        self._startup_done = False
+        self._startup_started = 0.0
+        self._stage_events: typing.Dict[str, BaseEvent] = {}
+        self.stages: typing.Dict[str, float] = {}
+        self.time_to_complete: typing.Optional[float] = None
         self._exit_stack = AsyncExitStack()
+        self._background: typing.Optional[BaseBackground] = None
+        self._requests.admitting = True
 
-    async def startup(self) -> None:
-        await self._receive_queue.put({"type": "lifespan.startup"})
-        await self._concurrency_backend.run_and_fail_after(
-            self.startup_timeout, self._startup_complete.wait
+    @property
+    def in_flight(self) -> typing.Dict[str, int]:
+        """
+        Number of requests currently running through `app`, by scope type.
+        """
+        return {
+            scope_type: count
+            for scope_type, count in self._requests.in_flight.items()
+            if count
+        }
+
+    @property
+    def rejected(self) -> int:
+        """
+        Number of requests turned away because the app was shutting down, or
+        because of `max_in_flight`.
+        """
+        return self._requests.rejected
+
+    async def _wait(
+        self, phase: str, event: BaseEvent, timeout: typing.Optional[float]
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            if self.watchdog is None:
+                await self._concurrency_backend.run_and_fail_after(timeout, event.wait)
+            else:
+                await self._wait_with_watchdog(phase, event, timeout, start)
+        except TimeoutError:
+            raise LifespanTimeout(
+                phase,
+                timeout=timeout,
+                elapsed=time.perf_counter() - start,
+                stack=self._extract_app_stack(),
+            ) from None
+
+    async def _wait_with_watchdog(
+        self,
+        phase: str,
+        event: BaseEvent,
+        timeout: typing.Optional[float],
+        start: float,
+    ) -> None:
+        assert self.watchdog is not None
+        delay = self.watchdog
+
+        while True:
+            elapsed = time.perf_counter() - start
+            remaining = None if timeout is None else max(timeout - elapsed, 0)
+            if remaining is not None and remaining <= delay:
+                await self._concurrency_backend.run_and_fail_after(
+                    remaining, event.wait
+                )
+                return
+
+            try:
+                await self._concurrency_backend.run_and_fail_after(delay, event.wait)
+                return
+            except TimeoutError:
+                logger.warning(
+                    "Application %s still running after %.3fs. App task stack:\n%s",
+                    phase,
+                    time.perf_counter() - start,
+                    "".join(self._extract_app_stack().format()).rstrip(),
+                )
+                delay = self.watchdog_interval or self.watchdog
+
+    def _extract_app_stack(self) -> traceback.StackSummary:
+        if self._background is None:
+            return traceback.StackSummary()  # pragma: no cover
+        return self._background.extract_stack()
+
+    def _stage_event(self, stage: str) -> BaseEvent:
+        event = self._stage_events.get(stage)
+        if event is None:
+            event = self._stage_events[stage] = self._concurrency_backend.create_event()
+            if self._startup_done or stage in self.stages:
+                event.set()
+        return event
+
+    def _end_startup(self) -> None:
+        # Completing startup also readies stages that the app didn't report.
+        self._startup_done = True
+        self._startup_complete.set()
+        for event in self._stage_events.values():
+            event.set()
+
+    def _remaining_startup_timeout(self) -> typing.Optional[float]:
+        if self.startup_timeout is None:
+            return None
+        elapsed = time.perf_counter() - self._startup_started
+        return max(self.startup_timeout - elapsed, 0)
+
+    def is_ready(self, stage: typing.Optional[str] = None) -> bool:
+        """
+        Whether the app reported `stage`, or completed startup if `stage` is
+        `None`.
+        """
+        if stage is None:
+            return self.time_to_complete is not None
+        return stage in self.stages or self.time_to_complete is not None
+
+    async def wait_ready(self, stage: typing.Optional[str] = None) -> None:
+        """
+        Wait until the app reports `stage`, or completes startup if `stage` is
+        `None`, within what is left of the startup timeout.
+
+        Raise the exception of the app if startup failed.
+        """
+        if not self._startup_done and not self.is_ready(stage):
+            event = (
+                self._startup_complete if stage is None else self._stage_event(stage)
+            )
+            await self._wait("startup", event, self._remaining_startup_timeout())
+        if self._app_exception:
+            raise self._app_exception
+
+    async def _admit(self, phase: str) -> float:
+        assert self.admission is not None
+        wait = await self.admission.acquire(
+            self._concurrency_backend,
+            phase,
+            self.admission_priority,
+            self.admission_group,
         )
+        if self._on_event is not None:
+            self._on_event(f"{phase}.admitted", time.perf_counter())
+        return wait
+
+    async def startup(self) -> None:
+        on_event = self._on_event
+        if on_event is not None:
+            on_event("startup.start", time.perf_counter())
+        admission = self.admission
+        if admission is not None:
+            # Timeouts only start once admitted.
+            self.startup_queue_time = await self._admit("startup")
+        try:
+            self._startup_started = time.perf_counter()
+            await self._receive_queue.put({"type": "lifespan.startup"})
+            if on_event is not None:
+                on_event("startup.queued", time.perf_counter())
+            # Start the app once its first message is ready, so that an app that
+            # is started eagerly can complete startup without suspending.
+            assert self._background is not None
+            await self._exit_stack.enter_async_context(self._background)
+            ready = self._startup_complete
+            if self.ready_stage is not None:
+                # The rest of startup goes on in the background.
+                ready = self._stage_event(self.ready_stage)
+            try:
+                await self._wait("startup", ready, self.startup_timeout)
+            finally:
+                if on_event is not None:
+                    on_event("startup.end", time.perf_counter())
+        finally:
+            if admission is not None:
+                admission.release()
         if self._app_exception:
             # Let the caller deal with the exception.
             raise self._app_exception
 
     async def shutdown(self) -> None:
-        await self._receive_queue.put({"type": "lifespan.shutdown"})
-        await self._concurrency_backend.run_and_fail_after(
-            self.shutdown_timeout, self._shutdown_complete.wait
-        )
+        on_event = self._on_event
+        if on_event is not None:
+            on_event("shutdown.start", time.perf_counter())
+        if self.drain_timeout != 0 or self._requests.limits:
+            # Opted into draining: stop admitting requests, and report those that
+            # didn't complete in time.
+            self.drained, self.abandoned = await self._requests.drain(
+                self.drain_timeout
+            )
+            if self.abandoned:
+                logger.warning(
+                    "Shutting down with %d request(s) still in flight.",
+                    self.abandoned,
+                )
+        if not self._startup_done:
+            # Entered at 'ready_stage': let the app complete startup first.
+            await self._wait(
+                "startup", self._startup_complete, self._remaining_startup_timeout()
+            )
+        admission = self.admission
+        if admission is not None:
+            self.shutdown_queue_time = await self._admit("shutdown")
+        try:
+            await self._receive_queue.put({"type": "lifespan.shutdown"})
+            if on_event is not None:
+                on_event("shutdown.queued", time.perf_counter())
+            try:
+                await self._wait(
+                    "shutdown", self._shutdown_complete, self.shutdown_timeout
+                )
+            finally:
+                if on_event is not None:
+                    on_event("shutdown.end", time.perf_counter())
+        finally:
+            if admission is not None:
+                admission.release()
+
+    async def _warm_up(self, warmup: Warmup) -> None:
+        on_event = self._on_event
+        if on_event is not None:
+            on_event("warmup.start", time.perf_counter())
+        self.warmup_latencies = []
+        start = time.perf_counter()
+        try:
+            await self._concurrency_backend.run_and_fail_after(
+                self.warmup_timeout,
+                lambda: run_warmup(
+                    self._concurrency_backend,
+                    self._app_with_state,
+                    warmup,
+                    self.warmup_concurrency,
+                    self.warmup_latencies,
+                ),
+            )
+        except TimeoutError:
+            raise LifespanTimeout(
+                "warmup",
+                timeout=self.warmup_timeout,
+                elapsed=time.perf_counter() - start,
+                stack=traceback.StackSummary(),
+            ) from None
+        finally:
+            if on_event is not None:
+                on_event("warmup.end", time.perf_counter())
 
     async def receive(self) -> Message:
         self._receive_called = True
-        return await self._receive_queue.get()
+        if self._on_event is None:
+            return await self._receive_queue.get()
+        self._on_event("receive.start", time.perf_counter())
+        message = await self._receive_queue.get()
+        self._on_event(f"receive.{message['type']}", time.perf_counter())
+        return message
 
     async def send(self, message: Message) -> None:
         if not self._receive_called:
@@ -61,22 +408,37 @@ class LifespanManager:
                 "Is it missing `assert scope['type'] == 'http'` or similar?"
             )
 
-        if message["type"] == "lifespan.startup.complete":
-            self._startup_complete.set()
-        elif message["type"] == "lifespan.shutdown.complete":
+        if self._on_event is not None:
+            self._on_event(f"send.{message['type']}", time.perf_counter())
+
+        message_type = message["type"]
+        if message_type == PROGRESS:
+            stage = message["stage"]
+            if stage not in self.stages:
+                self.stages[stage] = time.perf_counter() - self._startup_started
+                event = self._stage_events.get(stage)
+                if event is not None:
+                    event.set()
+        elif message_type == "lifespan.startup.complete":
+            self.time_to_complete = time.perf_counter() - self._startup_started
+            self._end_startup()
+        elif message_type == "lifespan.shutdown.complete":
             self._shutdown_complete.set()
 
     async def run_app(self) -> None:
-        scope: Scope = {"type": "lifespan"}
+        scope: Scope = {"type": "lifespan", "extensions": {PROGRESS: {}}}
+
+        if self._on_event is not None:
+            self._on_event("run_app.start", time.perf_counter())
 
         try:
-            await self.app(scope, self.receive, self.send)
+            await self._app_with_state(scope, self.receive, self.send)
         except BaseException as exc:
             self._app_exception = exc
 
             # We crashed, so don't make '.startup()' and '.shutdown()'
             # wait unnecessarily (or they'll timeout).
-            self._startup_complete.set()
+            self._end_startup()
             self._shutdown_complete.set()
 
             if not self._receive_called:
@@ -89,18 +451,158 @@ class LifespanManager:
                 ) from exc
 
             raise
+        finally:
+            if self._on_event is not None:
+                self._on_event("run_app.end", time.perf_counter())
 
-    async def __aenter__(self) -> "LifespanManager":
+    async def _enter(self) -> None:
+        start = time.perf_counter()
+        if self._on_event is not None:
+            self._on_event("enter.start", start)
+        if self._fresh:
+            self._fresh = False
+        else:
+            self._reset()
+        if self.diagnostics is not None:
+            self.diagnostics.before_startup()
+        self.startup_queue_time = 0.0
         await self._exit_stack.__aenter__()
-        await self._exit_stack.enter_async_context(
-            self._concurrency_backend.run_in_background(self.run_app)
-        )
+        cached = False
+        if self.state_cache is not None:
+            # Before the app runs, so that it sees the preloaded state. File
+            # I/O and unpickling run in a worker thread, off the event loop.
+            cached = await self._concurrency_backend.run_in_thread(
+                self.state_cache.load, self._state
+            )
+        self._background = self._concurrency_backend.run_in_background(self.run_app)
         try:
-            await self.startup()
-            return self
-        except BaseException:
-            await self._exit_stack.aclose()
+            try:
+                await self.startup()
+                # Only cache the state of a complete startup.
+                if self.state_cache is not None and not cached and self.is_ready():
+                    await self._concurrency_backend.run_in_thread(
+                        self.state_cache.save, self._state
+                    )
+                if self.warmup is not None:
+                    await self._warm_up(self.warmup)
+            except BaseException:
+                await self._exit_stack.aclose()
+                raise
+        except Exception as exc:
+            # Closing the app may turn its exception into 'LifespanNotSupported'.
+            if self.metrics is not None:
+                duration = time.perf_counter() - start - self.startup_queue_time
+                self.metrics.on_startup(get_outcome(exc), duration)
+            raise
+        finally:
+            if self._on_event is not None:
+                self._on_event("enter.end", time.perf_counter())
+
+        self._running = True
+        self.cycles += 1
+        # Time spent waiting for admission is reported apart.
+        self.startup_duration = time.perf_counter() - start - self.startup_queue_time
+        self.total_startup_duration += self.startup_duration
+        if self.metrics is not None:
+            self.metrics.on_startup("completed", self.startup_duration)
+        if self.diagnostics is not None:
+            self.diagnostics.after_startup()
+
+    async def _exit(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> typing.Optional[bool]:
+        start = time.perf_counter()
+        if self._on_event is not None:
+            self._on_event("exit.start", start)
+        self._running = False
+        if self.diagnostics is not None:
+            self.diagnostics.before_shutdown(self._state)
+        self.shutdown_queue_time = 0.0
+        if exc_type is None:
+            self._exit_stack.push_async_callback(self.shutdown)
+        try:
+            result = await self._exit_stack.__aexit__(exc_type, exc_value, traceback)
+            if exc_type is None:
+                self.shutdown_duration = (
+                    time.perf_counter() - start - self.shutdown_queue_time
+                )
+                self.total_shutdown_duration += self.shutdown_duration
+                if self.metrics is not None:
+                    self.metrics.on_shutdown("completed", self.shutdown_duration)
+            return result
+        except Exception as exc:
+            if self.metrics is not None and exc_type is None:
+                duration = time.perf_counter() - start - self.shutdown_queue_time
+                self.metrics.on_shutdown(get_outcome(exc), duration)
             raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.on_stopped()
+            self._release()
+            if self._on_event is not None:
+                self._on_event("exit.end", time.perf_counter())
+
+    def _release(self) -> None:
+        # Drop what the stopped cycle holds on to, e.g. the app task and the
+        # traceback of its exception, as the manager may outlive it for long.
+        self._app_exception = None
+        self._background = None
+        self._exit_stack = AsyncExitStack()
+        if self.state_cache is not None:
+            if not self._keep_state:
+                # Let go of buffers mapped from the cache, so it can close them.
+                for key in self.state_cache.keys:
+                    self._state.pop(key, None)
+            self.state_cache.close()
+        if self.diagnostics is not None:
+            if not self._keep_state:
+                # Otherwise, the state would keep its values alive.
+                self._state.clear()
+            self.diagnostics.after_shutdown(self._state)
+
+    async def restart(self, clear_state: bool = True) -> None:
+        """
+        Shut the app down and start it up again, reusing this manager.
+
+        In lazy mode, the app is started up again by the next request instead.
+        """
+        # Set before shutting down, so that diagnostics keep the state too.
+        self._keep_state = not clear_state
+
+        if self._mode is not None:
+            await self._mode.restart()
+            return
+
+        if not self._running:
+            raise RuntimeError("App is not running")
+        try:
+            await self._exit(None, None, None)
+        finally:
+            self._keep_state = False
+        if clear_state:
+            self._state.clear()
+        await self._enter()
+
+    async def wait_closed(self) -> None:
+        """
+        Wait for a shutdown handed over to `teardown` to complete, and raise its
+        exception, if any.
+        """
+        if isinstance(self._mode, DeferredLifespan):
+            await self._mode.wait_closed()
+
+    async def __aenter__(self) -> "LifespanManager":
+        if self._mode is not None:
+            await self._mode.enter()
+            return self
+
+        if not self._fresh:
+            self._state.clear()
+        await self._enter()
+        return self
 
     async def __aexit__(
         self,
@@ -108,6 +610,11 @@ class LifespanManager:
         exc_value: typing.Optional[BaseException] = None,
         traceback: typing.Optional[TracebackType] = None,
     ) -> typing.Optional[bool]:
-        if exc_type is None:
-            self._exit_stack.push_async_callback(self.shutdown)
-        return await self._exit_stack.__aexit__(exc_type, exc_value, traceback)
+        if self._mode is not None:
+            await self._mode.exit(exc_type, exc_value, traceback)
+            return None
+
+        if not self._running:
+            # A restart() failed: the app was already cleaned up.
+            return None
+        return await self._exit(exc_type, exc_value, traceback)
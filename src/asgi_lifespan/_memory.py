@@ -0,0 +1,146 @@
+import gc
+import logging
+import tracemalloc
+import typing
+import weakref
+
+logger = logging.getLogger("asgi_lifespan")
+
+# Leave out allocations made by the measurements themselves.
+FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(FILTERS)
+
+
+def _total(snapshot: tracemalloc.Snapshot) -> int:
+    return sum(trace.size for trace in snapshot.traces)
+
+
+class CycleMemory:
+    """
+    Memory allocated during a lifespan cycle, in bytes, relative to the start of
+    its startup.
+    """
+
+    def __init__(self, cycle: int) -> None:
+        self.cycle = cycle
+        # Right after startup, i.e. mostly the lifespan state.
+        self.startup_bytes = 0
+        # Right before shutdown, including what was allocated while running.
+        self.shutdown_bytes = 0
+        # After shutdown and a garbage collection: should be close to zero.
+        self.retained_bytes = 0
+        # Keys of the lifespan state whose values are still alive.
+        self.leaked: typing.List[str] = []
+        # Source lines that retained the most memory.
+        self.top_retained: typing.List[tracemalloc.StatisticDiff] = []
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} cycle={self.cycle} "
+            f"startup_bytes={self.startup_bytes} "
+            f"retained_bytes={self.retained_bytes} leaked={self.leaked}>"
+        )
+
+
+class MemoryDiagnostics:
+    """
+    Measure memory allocated by the lifespan cycles of `LifespanManager(
+    diagnostics=...)` with tracemalloc, and check that values of the lifespan
+    state are garbage collected after shutdown.
+
+    This is slow: use it in tests or CI, not in production. Measurements are
+    process-wide, so use one instance per manager, with one cycle at a time.
+    """
+
+    def __init__(self, frames: int = 1, top: int = 10) -> None:
+        self.frames = frames
+        self.top = top
+        self.reports: typing.List[CycleMemory] = []
+        self._started_tracing = False
+        self._baseline: typing.Optional[tracemalloc.Snapshot] = None
+        self._current: typing.Optional[CycleMemory] = None
+        self._refs: typing.Dict[str, "weakref.ref[typing.Any]"] = {}
+
+    @property
+    def retained_bytes(self) -> int:
+        """
+        Bytes retained by all cycles so far.
+        """
+        return sum(report.retained_bytes for report in self.reports)
+
+    @property
+    def leaked(self) -> typing.List[str]:
+        """
+        Keys of the lifespan state whose values were still alive after any
+        shutdown so far.
+        """
+        return [key for report in self.reports for key in report.leaked]
+
+    def before_startup(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        gc.collect()
+        self._baseline = _take_snapshot()
+        self._current = None
+
+    def after_startup(self) -> None:
+        assert self._baseline is not None
+        self._current = CycleMemory(len(self.reports) + 1)
+        self._current.startup_bytes = _total(_take_snapshot()) - _total(self._baseline)
+
+    def before_shutdown(self, state: typing.Dict[str, typing.Any]) -> None:
+        report = self._current
+        if report is None:
+            return
+        assert self._baseline is not None
+        report.shutdown_bytes = _total(_take_snapshot()) - _total(self._baseline)
+        self._refs = {}
+        for key, value in state.items():
+            try:
+                self._refs[key] = weakref.ref(value)
+            except TypeError:
+                # e.g. ints, strings or dicts, which can't be tracked.
+                continue
+
+    def after_shutdown(self, state: typing.Dict[str, typing.Any]) -> None:
+        report, self._current = self._current, None
+        refs, self._refs = self._refs, {}
+        baseline, self._baseline = self._baseline, None
+        if report is None:
+            return
+        assert baseline is not None
+
+        gc.collect()
+        for key, ref in refs.items():
+            # Values still in the state were kept on purpose, e.g. on restart.
+            if ref() is not None and state.get(key) is not ref():
+                report.leaked.append(key)
+
+        diffs = _take_snapshot().compare_to(baseline, "lineno")
+        report.retained_bytes = sum(diff.size_diff for diff in diffs)
+        report.top_retained = [diff for diff in diffs if diff.size_diff > 0][: self.top]
+        self.reports.append(report)
+
+        if report.leaked:
+            logger.warning(
+                "Lifespan state values still alive after shutdown: %s. "
+                "Top allocations retained:\n%s",
+                ", ".join(report.leaked),
+                "\n".join(str(diff) for diff in report.top_retained),
+            )
+
+    def close(self) -> None:
+        """
+        Stop tracemalloc, if it was started by these diagnostics.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
@@ -0,0 +1,146 @@
+import bisect
+import math
+import os
+import tempfile
+import typing
+
+from ._exceptions import LifespanNotSupported, LifespanTimeout
+
+PHASES = ("startup", "shutdown")
+OUTCOMES = ("completed", "failed", "timeout", "not_supported")
+# Same as the default buckets of Prometheus client libraries.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def get_outcome(exception: BaseException) -> str:
+    if isinstance(exception, LifespanTimeout):
+        return "timeout"
+    if isinstance(exception, LifespanNotSupported):
+        return "not_supported"
+    return "failed"
+
+
+class MetricsCollector:
+    """
+    Receive metrics from `LifespanManager(metrics=...)`.
+
+    Methods do nothing by default: override them to forward metrics to another
+    system.
+    """
+
+    def on_startup(self, outcome: str, duration: float) -> None:
+        """
+        Called when startup completed, or failed with an exception.
+        `outcome` is one of `OUTCOMES`.
+        """
+
+    def on_shutdown(self, outcome: str, duration: float) -> None:
+        """
+        Called when shutdown completed, or failed with an exception.
+        """
+
+    def on_stopped(self) -> None:
+        """
+        Called when an app that was started up is no longer running, whether
+        it was shut down or not.
+        """
+
+
+class Histogram:
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf.
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> typing.List[typing.Tuple[float, int]]:
+        """
+        Pairs of upper bound and number of observations less than or equal to it.
+        """
+        result = []
+        total = 0
+        for bound, count in zip([*self.buckets, math.inf], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class InMemoryMetrics(MetricsCollector):
+    """
+    Keep lifespan metrics in memory, and export them in the Prometheus text
+    format.
+
+    Can be shared by many managers.
+    """
+
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.cycles: typing.Dict[typing.Tuple[str, str], int] = {
+            (phase, outcome): 0 for phase in PHASES for outcome in OUTCOMES
+        }
+        self.durations = {phase: Histogram(buckets) for phase in PHASES}
+        self.live = 0
+
+    def on_startup(self, outcome: str, duration: float) -> None:
+        self.cycles["startup", outcome] += 1
+        self.durations["startup"].observe(duration)
+        if outcome == "completed":
+            self.live += 1
+
+    def on_shutdown(self, outcome: str, duration: float) -> None:
+        self.cycles["shutdown", outcome] += 1
+        self.durations["shutdown"].observe(duration)
+
+    def on_stopped(self) -> None:
+        self.live -= 1
+
+    def to_prometheus(self, prefix: str = "asgi_lifespan") -> str:
+        """
+        Render metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# HELP {prefix}_cycles_total Lifespan phases by outcome.",
+            f"# TYPE {prefix}_cycles_total counter",
+        ]
+        for (phase, outcome), count in self.cycles.items():
+            lines.append(
+                f'{prefix}_cycles_total{{phase="{phase}",outcome="{outcome}"}} {count}'
+            )
+
+        name = f"{prefix}_duration_seconds"
+        lines.append(f"# HELP {name} Duration of lifespan phases.")
+        lines.append(f"# TYPE {name} histogram")
+        for phase, histogram in self.durations.items():
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.sum!r}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+
+        lines.append(f"# HELP {prefix}_live_apps Apps currently started up.")
+        lines.append(f"# TYPE {prefix}_live_apps gauge")
+        lines.append(f"{prefix}_live_apps {self.live}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(
+        self, path: typing.Union[str, "os.PathLike[str]"], prefix: str = "asgi_lifespan"
+    ) -> None:
+        """
+        Write metrics to a file in the Prometheus text format, e.g. for the
+        textfile collector of the node exporter.
+
+        The file is replaced atomically, so that scrapers never see a partial file.
+        """
+        directory = os.path.dirname(os.fspath(path)) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(self.to_prometheus(prefix))
+            os.replace(tmp_path, path)
+        except BaseException:  # pragma: no cover
+            os.unlink(tmp_path)
+            raise
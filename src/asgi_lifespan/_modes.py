@@ -0,0 +1,278 @@
+import time
+import typing
+from types import TracebackType
+
+from ._concurrency.base import BaseTaskGroup
+from ._inflight import reject
+from ._types import Receive, Scope, Send
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from ._manager import LifespanManager
+    from ._teardown import TeardownSupervisor
+
+
+class Cycle:
+    """
+    A lifespan cycle of a lazy or deferred manager, run in a task of its own.
+    """
+
+    def __init__(
+        self,
+        manager: "LifespanManager",
+        teardown: typing.Optional["TeardownSupervisor"] = None,
+    ) -> None:
+        backend = manager._concurrency_backend
+        self.started = backend.create_event()
+        self.stop = backend.create_event()
+        self.stopped = backend.create_event()
+        self.running = False
+        self.stopping = False
+        self.done = False
+        self.exception: typing.Optional[BaseException] = None
+        self.shutdown_exception: typing.Optional[BaseException] = None
+        # Exception of the 'async with' block, if any: skip shutdown.
+        self.stop_with: typing.Optional[BaseException] = None
+        # Handed over to the teardown supervisor, which waits for it to end.
+        self.submitted = False
+        self._manager = manager
+        self._teardown = teardown
+
+    def request_stop(self) -> None:
+        self.running = False
+        self.stopping = True
+        self.stop.set()
+
+    def hand_over(self, exc_value: typing.Optional[BaseException]) -> None:
+        assert self._teardown is not None
+        self.stop_with = exc_value
+        self.submitted = True
+        self._teardown.submit()
+        self.request_stop()
+
+    async def run(self) -> None:
+        manager = self._manager
+        if not manager._keep_state:
+            manager._state.clear()
+        manager._keep_state = False
+
+        teardown = self._teardown
+        try:
+            await manager._enter()
+        except Exception as exc:
+            self.exception = exc
+            self.done = True
+            if teardown is not None and self.submitted:
+                # Entering was cancelled: nobody else will see the exception.
+                teardown.release(exc, acquired=False)
+            self.started.set()
+            self.stopped.set()
+            return
+
+        self.running = True
+        self.started.set()
+
+        try:
+            await self.stop.wait()
+            if teardown is not None:
+                await teardown.acquire()
+        except BaseException as exc:
+            # Cancelled: same as an exception in the 'async with' block.
+            await manager._exit(type(exc), exc, exc.__traceback__)
+            raise
+
+        try:
+            exc_value = self.stop_with
+            if exc_value is None:
+                await manager._exit(None, None, None)
+            else:
+                await manager._exit(type(exc_value), exc_value, exc_value.__traceback__)
+        except Exception as exc:
+            self.shutdown_exception = exc
+        finally:
+            if teardown is not None and self.submitted:
+                teardown.release(self.shutdown_exception)
+            self.done = True
+            self.stopped.set()
+
+
+class LazyLifespan:
+    """
+    Start the app of a manager up on the first request, and shut it down when
+    idle, in a task group entered with the manager.
+    """
+
+    def __init__(self, manager: "LifespanManager") -> None:
+        self._manager = manager
+        self._cycle: typing.Optional[Cycle] = None
+        self._task_group: typing.Optional[BaseTaskGroup] = None
+        self._closing = False
+        self._entered_at = 0.0
+        self._last_activity = 0.0
+        self._in_flight = 0
+        self._shutdown_exception: typing.Optional[BaseException] = None
+
+    async def app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        manager = self._manager
+        if self._closing:
+            # Don't start the app up again while the manager is exiting.
+            manager._requests.rejected += 1
+            await reject(scope["type"], send)
+            return
+
+        self._in_flight += 1
+        try:
+            cycle = self._cycle
+            if cycle is None or not cycle.running:
+                await self._start()
+            if manager.time_to_first_request is None:
+                manager.time_to_first_request = time.perf_counter() - self._entered_at
+            await manager._app_with_state(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+            self._last_activity = time.perf_counter()
+
+    async def _start(self) -> None:
+        assert self._task_group is not None, "Manager must be entered first"
+        manager = self._manager
+
+        cycle = self._cycle
+        while cycle is not None and cycle.stopping and not cycle.done:
+            # Let an idle shutdown complete before starting up again.
+            await cycle.stopped.wait()
+            cycle = self._cycle
+
+        if cycle is not None and not cycle.done:
+            # Startup is in progress: share it.
+            await cycle.started.wait()
+            if cycle.exception is not None:
+                raise cycle.exception
+            return
+
+        start = time.perf_counter()
+        new_cycle = self._cycle = Cycle(manager)
+        self._task_group.start_soon(lambda: self._run(new_cycle))
+        await new_cycle.started.wait()
+        if new_cycle.exception is not None:
+            raise new_cycle.exception
+
+        manager.cold_starts += 1
+        manager.cold_start_latency = time.perf_counter() - start
+        self._last_activity = time.perf_counter()
+        if manager.idle_timeout is not None:
+            self._task_group.start_soon(lambda: self._watch_idle(new_cycle))
+
+    async def _run(self, cycle: Cycle) -> None:
+        await cycle.run()
+        if cycle.shutdown_exception is not None and self._shutdown_exception is None:
+            self._shutdown_exception = cycle.shutdown_exception
+
+    async def _watch_idle(self, cycle: Cycle) -> None:
+        idle_timeout = self._manager.idle_timeout
+        assert idle_timeout is not None
+        delay = idle_timeout
+
+        while True:
+            try:
+                await self._manager._concurrency_backend.run_and_fail_after(
+                    delay, cycle.stop.wait
+                )
+                return
+            except TimeoutError:
+                pass
+
+            if self._in_flight > 0:
+                delay = idle_timeout
+                continue
+
+            idle = time.perf_counter() - self._last_activity
+            if idle >= idle_timeout:
+                cycle.request_stop()
+                return
+            delay = idle_timeout - idle
+
+    async def enter(self) -> None:
+        self._entered_at = time.perf_counter()
+        self._closing = False
+        self._task_group = self._manager._concurrency_backend.create_task_group()
+        await self._task_group.__aenter__()
+
+    async def exit(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        assert self._task_group is not None
+        self._closing = True
+        cycle = self._cycle
+        if exc_type is None and cycle is not None and not cycle.done:
+            cycle.request_stop()
+            await cycle.stopped.wait()
+
+        await self._task_group.__aexit__(exc_type, exc_value, traceback)
+
+        if exc_type is None and self._shutdown_exception is not None:
+            raise self._shutdown_exception
+
+    async def restart(self) -> None:
+        # The next request starts the app up again.
+        cycle = self._cycle
+        if cycle is not None and not cycle.done:
+            cycle.request_stop()
+            await cycle.stopped.wait()
+        exc, self._shutdown_exception = self._shutdown_exception, None
+        if exc is not None:
+            raise exc
+
+
+class DeferredLifespan:
+    """
+    Run the lifespan of a manager in a task of `teardown`, so that exiting the
+    manager hands its shutdown over instead of waiting for it.
+    """
+
+    def __init__(
+        self, manager: "LifespanManager", teardown: "TeardownSupervisor"
+    ) -> None:
+        self._manager = manager
+        self._teardown = teardown
+        self._cycle: typing.Optional[Cycle] = None
+
+    async def enter(self) -> None:
+        previous = self._cycle
+        if previous is not None and not previous.done:
+            await previous.stopped.wait()
+
+        cycle = self._cycle = Cycle(self._manager, self._teardown)
+        self._teardown.start_soon(cycle.run)
+        try:
+            await cycle.started.wait()
+        except BaseException:
+            # Cancelled: shut the app down once started, in the background.
+            cycle.hand_over(None)
+            raise
+        if cycle.exception is not None:
+            raise cycle.exception
+
+    async def exit(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        # Hand the lifespan over to the teardown supervisor.
+        assert self._cycle is not None
+        self._cycle.hand_over(exc_value)
+
+    async def restart(self) -> None:
+        await self.exit(None, None, None)
+        await self.wait_closed()
+        await self.enter()
+
+    async def wait_closed(self) -> None:
+        cycle = self._cycle
+        if cycle is None:
+            return
+        await cycle.stopped.wait()
+        if cycle.shutdown_exception is not None:
+            raise cycle.shutdown_exception
@@ -0,0 +1,240 @@
+import abc
+import collections
+import contextlib
+import time
+import typing
+from types import TracebackType
+
+from ._concurrency import detect_concurrency_backend
+from ._concurrency.base import BaseTaskGroup, ConcurrencyBackend
+from ._hosting import HostedLifespan
+from ._manager import LifespanManager
+from ._types import ASGIApp
+
+K = typing.TypeVar("K", bound=typing.Hashable)
+
+
+class PoolEntry(typing.Generic[K]):
+    def __init__(self, key: K, hosted: HostedLifespan) -> None:
+        self.key = key
+        self.hosted = hosted
+        self.refcount = 0
+        # Bumped on every checkout, so that idle timers can tell whether
+        # the entry was used again since they were armed.
+        self.generation = 0
+        # Estimated memory cost, for eviction policies that need one.
+        self.cost = 0
+
+
+class BasePool(abc.ABC, typing.Generic[K]):
+    """
+    Host started apps by key, shared by refcount, and shut them down on eviction
+    or on exit.
+
+    Entries are kept in least-recently-used order. Subclasses choose which idle
+    entries to evict by overriding `_select_evictions()`.
+    """
+
+    def __init__(
+        self,
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+    ) -> None:
+        self.startup_timeout = startup_timeout
+        self.shutdown_timeout = shutdown_timeout
+
+        self.hits = 0
+        self.failed_starts = 0
+        self.evictions = 0
+
+        self._entries: "collections.OrderedDict[K, PoolEntry[K]]" = (
+            collections.OrderedDict()
+        )
+        self._shutdown_errors: typing.List[BaseException] = []
+        self._concurrency_backend: typing.Optional[ConcurrencyBackend] = None
+        self._task_group: typing.Optional[BaseTaskGroup] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _checkout(
+        self, key: K, create_manager: typing.Callable[[], LifespanManager]
+    ) -> PoolEntry[K]:
+        assert (
+            self._task_group is not None
+        ), f"{type(self).__name__} must be entered first"
+
+        entry = self._entries.get(key)
+        if entry is None:
+            # Registered before starting up, so that concurrent users of the
+            # same key share this startup.
+            entry = PoolEntry(key, HostedLifespan(create_manager()))
+            self._entries[key] = entry
+            self._task_group.start_soon(entry.hosted.run)
+            cold = True
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            cold = False
+
+        entry.refcount += 1
+        entry.generation += 1
+        start = time.perf_counter()
+        try:
+            await entry.hosted.wait_started()
+        except BaseException:
+            entry.refcount -= 1
+            if self._entries.get(key) is entry and not entry.hosted.started:
+                del self._entries[key]
+                if cold:
+                    self.failed_starts += 1
+            raise
+
+        self._on_started(entry, cold, time.perf_counter() - start)
+        self._evict_idle()
+        return entry
+
+    def _on_started(self, entry: PoolEntry[K], cold: bool, duration: float) -> None:
+        """
+        Called on each successful checkout, `duration` being the time spent
+        waiting for the startup.
+        """
+
+    def _release(self, entry: PoolEntry[K]) -> None:
+        entry.refcount -= 1
+        if entry.refcount > 0:
+            return
+        self._on_idle(entry)
+        # Entries in use may have kept the pool over its limits.
+        self._evict_idle()
+
+    def _on_idle(self, entry: PoolEntry[K]) -> None:
+        """
+        Called when the last user of `entry` releases it.
+        """
+
+    @abc.abstractmethod
+    def _select_evictions(self) -> typing.List[PoolEntry[K]]:
+        """
+        Return the idle entries to evict, if any.
+        """
+
+    def _evict_idle(self) -> None:
+        for entry in self._select_evictions():
+            self._evict(entry)
+
+    def _evict(self, entry: PoolEntry[K]) -> None:
+        if self._entries.get(entry.key) is not entry:
+            return  # pragma: no cover
+        del self._entries[entry.key]
+        self.evictions += 1
+        self._stop(entry.hosted)
+
+    def _stop(self, hosted: HostedLifespan) -> None:
+        assert self._task_group is not None
+
+        async def stop() -> None:
+            try:
+                await hosted.stop()
+            except Exception as exc:
+                if hosted.started:
+                    self._shutdown_errors.append(exc)
+
+        self._task_group.start_soon(stop)
+
+    async def _open(self) -> None:
+        self._concurrency_backend = detect_concurrency_backend()
+        self._task_group = self._concurrency_backend.create_task_group()
+        await self._task_group.__aenter__()
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[TracebackType] = None,
+    ) -> None:
+        assert self._task_group is not None
+
+        for entry in self._entries.values():
+            self._stop(entry.hosted)
+        self._entries.clear()
+
+        await self._task_group.__aexit__(exc_type, exc_value, traceback)
+
+        if exc_type is None and self._shutdown_errors:
+            raise self._shutdown_errors[0]
+
+
+class LifespanPool(BasePool[int]):
+    def __init__(
+        self,
+        max_size: typing.Optional[int] = None,
+        idle_ttl: typing.Optional[float] = None,
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+    ) -> None:
+        super().__init__(
+            startup_timeout=startup_timeout, shutdown_timeout=shutdown_timeout
+        )
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+
+        self.misses = 0
+        self.startup_time_saved = 0.0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, app: ASGIApp) -> typing.AsyncIterator[LifespanManager]:
+        def create_manager() -> LifespanManager:
+            # Only called on a miss.
+            self.misses += 1
+            return LifespanManager(
+                app,
+                startup_timeout=self.startup_timeout,
+                shutdown_timeout=self.shutdown_timeout,
+            )
+
+        entry = await self._checkout(id(app), create_manager)
+        try:
+            yield entry.hosted.manager
+        finally:
+            self._release(entry)
+
+    def _on_started(self, entry: PoolEntry[int], cold: bool, duration: float) -> None:
+        if not cold:
+            assert entry.hosted.startup_duration is not None
+            self.startup_time_saved += entry.hosted.startup_duration
+
+    def _on_idle(self, entry: PoolEntry[int]) -> None:
+        if self.idle_ttl is not None and self._task_group is not None:
+            generation = entry.generation
+
+            async def expire() -> None:
+                await self._expire(entry, generation)
+
+            self._task_group.start_soon(expire)
+
+    async def _expire(self, entry: PoolEntry[int], generation: int) -> None:
+        assert self._concurrency_backend is not None
+        try:
+            await self._concurrency_backend.run_and_fail_after(
+                self.idle_ttl, entry.hosted.wait_stopped
+            )
+        except TimeoutError:
+            if entry.refcount == 0 and entry.generation == generation:
+                self._evict(entry)
+
+    def _select_evictions(self) -> typing.List[PoolEntry[int]]:
+        if self.max_size is None:
+            return []
+
+        overflow = len(self._entries) - self.max_size
+        if overflow <= 0:
+            return []
+
+        idle = [entry for entry in self._entries.values() if entry.refcount == 0]
+        # Entries are kept in least-recently-used order.
+        return idle[:overflow]
+
+    async def __aenter__(self) -> "LifespanPool":
+        await self._open()
+        return self
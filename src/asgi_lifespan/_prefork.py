@@ -0,0 +1,133 @@
+import asyncio
+import gc
+import os
+import signal
+import sys
+import traceback
+import typing
+
+from ._manager import LifespanManager
+from ._types import ASGIApp
+
+Worker = typing.Callable[[ASGIApp], typing.Awaitable[None]]
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _run_worker(
+    worker: Worker, app: ASGIApp, sigmask: typing.Iterable[int]
+) -> int:  # pragma: no cover
+    # Runs in the child process, which coverage does not track.
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(worker(app))
+        # Cancel the worker on SIGTERM, so that it can drain what it is doing
+        # before exiting. SIGTERM was blocked until now, so none got lost.
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+        signal.pthread_sigmask(signal.SIG_SETMASK, sigmask)
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass  # Stopped by SIGTERM.
+
+    try:
+        asyncio.run(main())
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        return 1
+    return 0
+
+
+def _terminate(pids: typing.Iterable[int]) -> None:
+    # Ask workers to stop, and wait for them to drain.
+    pids = list(pids)
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+
+def _wait(pids: typing.List[int]) -> typing.List[int]:
+    exit_codes = {}
+    try:
+        for pid in pids:
+            _, status = os.waitpid(pid, 0)
+            exit_codes[pid] = _exit_code(status)
+    except BaseException:
+        # E.g. KeyboardInterrupt.
+        _terminate(pid for pid in pids if pid not in exit_codes)
+        raise
+    return [exit_codes[pid] for pid in pids]
+
+
+def run_prefork(
+    app: ASGIApp,
+    worker: Worker,
+    workers: int = 2,
+    startup_timeout: typing.Optional[float] = 5,
+    shutdown_timeout: typing.Optional[float] = 5,
+) -> typing.List[int]:
+    """
+    Start up `app` once, then fork `workers` processes which each run
+    `worker(app)` in a fresh asyncio event loop. The app is shut down in this
+    process once all workers have exited.
+
+    Workers inherit the lifespan state copy-on-write, so whatever startup
+    loaded into it is shared instead of being loaded again by each worker.
+
+    On SIGTERM, a worker's `worker(app)` task is cancelled, so that it can
+    drain before exiting.
+
+    Returns the exit code of each worker: 0 if `worker()` returned, 1 if it
+    raised, and the negated signal number if it was killed by a signal.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("run_prefork() requires os.fork()")  # pragma: no cover
+
+    async def create_manager() -> LifespanManager:
+        return LifespanManager(
+            app, startup_timeout=startup_timeout, shutdown_timeout=shutdown_timeout
+        )
+
+    # Drive the loop by hand, so that it is not running while we fork.
+    loop = asyncio.new_event_loop()
+    try:
+        manager = loop.run_until_complete(create_manager())
+        loop.run_until_complete(manager.__aenter__())
+
+        pids: typing.List[int] = []
+        try:
+            # Move startup objects out of reach of the GC, so that collections
+            # in workers don't write to (and thus copy) the pages they live on.
+            gc.freeze()
+            # Workers unblock SIGTERM once they can handle it.
+            sigmask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+            try:
+                for _ in range(workers):
+                    pid = os.fork()
+                    if pid == 0:  # pragma: no cover
+                        os._exit(_run_worker(worker, manager.app, sigmask))
+                    pids.append(pid)
+            except BaseException:  # pragma: no cover
+                _terminate(pids)
+                raise
+            finally:
+                signal.pthread_sigmask(signal.SIG_SETMASK, sigmask)
+                gc.unfreeze()
+
+            exit_codes = _wait(pids)
+        except BaseException as exc:
+            loop.run_until_complete(
+                manager.__aexit__(type(exc), exc, exc.__traceback__)
+            )
+            raise
+
+        loop.run_until_complete(manager.__aexit__(None, None, None))
+        return exit_codes
+    finally:
+        loop.close()
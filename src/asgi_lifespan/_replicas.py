@@ -0,0 +1,216 @@
+import concurrent.futures
+import itertools
+import os
+import threading
+import typing
+from types import TracebackType
+
+from ._manager import LifespanManager
+from ._sync import LoopThread, call_in_loop_thread
+from ._types import ASGIApp, Receive, Scope, Send
+
+STRATEGIES = ("round_robin", "least_loaded")
+
+T = typing.TypeVar("T")
+
+
+class Replica:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.loop_thread = LoopThread(name=f"asgi-lifespan-replica-{index}")
+        self.manager: typing.Optional[LifespanManager] = None
+        self.in_flight = 0
+
+    @property
+    def app(self) -> ASGIApp:
+        assert self.manager is not None, "Replica not started"
+        return self.manager.app
+
+
+class LifespanReplicas:
+    """
+    Start one replica of an ASGI app per event loop thread, and spread calls
+    across them, so that in-process ASGI throughput can scale past one core on
+    free-threaded builds of Python.
+
+    Each replica is created by `app_factory` and has its own `LifespanManager`,
+    running on its own asyncio event loop thread.
+    """
+
+    def __init__(
+        self,
+        app_factory: typing.Callable[[], ASGIApp],
+        replicas: typing.Optional[int] = None,
+        strategy: str = "round_robin",
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+    ) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+        if replicas is None:
+            replicas = os.cpu_count() or 1
+        if replicas < 1:
+            raise ValueError(f"replicas must be at least 1, got {replicas}")
+
+        self.app_factory = app_factory
+        self.strategy = strategy
+        self.startup_timeout = startup_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.replicas = [Replica(index) for index in range(replicas)]
+        self.calls = [0] * replicas
+        self._lock = threading.Lock()
+        self._next = itertools.cycle(self.replicas)
+        self._started = False
+
+    @property
+    def in_flight(self) -> typing.List[int]:
+        """
+        Number of calls currently running on each replica.
+        """
+        return [replica.in_flight for replica in self.replicas]
+
+    async def _enter(self) -> LifespanManager:
+        manager = LifespanManager(
+            self.app_factory(),
+            startup_timeout=self.startup_timeout,
+            shutdown_timeout=self.shutdown_timeout,
+        )
+        await manager.__aenter__()
+        return manager
+
+    def start(self) -> None:
+        assert not self._started, "Replicas already started"
+        for replica in self.replicas:
+            replica.loop_thread.start()
+
+        # Start up all replicas in parallel, each on its own loop.
+        futures = [replica.loop_thread.submit(self._enter) for replica in self.replicas]
+        concurrent.futures.wait(futures)
+
+        exception: typing.Optional[BaseException] = None
+        for replica, future in zip(self.replicas, futures):
+            if future.exception() is None:
+                replica.manager = future.result()
+            elif exception is None:
+                exception = future.exception()
+
+        if exception is not None:
+            self._shutdown(None, None, None)
+            raise exception
+        self._started = True
+
+    def stop(self) -> None:
+        self._stop(None, None, None)
+
+    def _stop(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        assert self._started, "Replicas not started"
+        self._started = False
+        self._shutdown(exc_type, exc_value, traceback)
+
+    def _shutdown(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        # Shut down all started replicas in parallel, then stop all loops.
+        futures = []
+        for replica in self.replicas:
+            manager, replica.manager = replica.manager, None
+            if manager is not None:
+                futures.append(
+                    replica.loop_thread.submit(
+                        manager.__aexit__, exc_type, exc_value, traceback
+                    )
+                )
+        concurrent.futures.wait(futures)
+
+        for replica in self.replicas:
+            replica.loop_thread.stop()
+
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
+
+    def _acquire(self) -> Replica:
+        with self._lock:
+            if self.strategy == "least_loaded":
+                replica = min(self.replicas, key=lambda replica: replica.in_flight)
+            else:
+                replica = next(self._next)
+            replica.in_flight += 1
+            self.calls[replica.index] += 1
+            return replica
+
+    def _release(self, replica: Replica) -> None:
+        with self._lock:
+            replica.in_flight -= 1
+
+    async def app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        An ASGI app that dispatches each call to a replica, for use on an
+        asyncio or trio event loop. `receive` and `send` are called on the
+        loop of the caller.
+        """
+        replica = self._acquire()
+        try:
+            await call_in_loop_thread(
+                replica.loop_thread, replica.app, scope, receive, send
+            )
+        finally:
+            self._release(replica)
+
+    def call(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Call a replica from synchronous code, and block until it returns.
+        `receive` and `send` are called on the loop of that replica.
+        """
+        replica = self._acquire()
+        try:
+            replica.loop_thread.run(replica.app, scope, receive, send)
+        finally:
+            self._release(replica)
+
+    def run_on_each(
+        self,
+        func: typing.Callable[..., typing.Awaitable[T]],
+        *args: typing.Any,
+    ) -> typing.List[T]:
+        """
+        Run `func(app, *args)` on the loop of each replica in parallel, `app`
+        being the app of that replica, and block until all of them return.
+
+        Unlike `app` and `call()`, requests sent by `func` never leave the loop
+        of the replica, so that e.g. a server or load generator per loop scales
+        with the number of replicas.
+        """
+        assert self._started, "Replicas not started"
+        futures = [
+            replica.loop_thread.submit(func, replica.app, *args)
+            for replica in self.replicas
+        ]
+        concurrent.futures.wait(futures)
+
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
+        return [future.result() for future in futures]
+
+    def __enter__(self) -> "LifespanReplicas":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[TracebackType] = None,
+    ) -> None:
+        self._stop(exc_type, exc_value, traceback)
@@ -0,0 +1,72 @@
+import typing
+
+REQUEST_STATE_MODES = ("shared", "copy_on_write")
+
+
+class StateView(typing.MutableMapping[str, typing.Any]):
+    """
+    A copy-on-write view over the lifespan state, for use as the state of a
+    single request.
+
+    Reads go straight to the lifespan state. Writes and deletions go to a layer
+    that is private to the view, and only allocated on the first write.
+    """
+
+    __slots__ = ("_base", "_local", "_deleted")
+
+    def __init__(self, base: typing.Dict[str, typing.Any]) -> None:
+        self._base = base
+        self._local: typing.Optional[typing.Dict[str, typing.Any]] = None
+        self._deleted: typing.Optional[typing.Set[str]] = None
+
+    def __getitem__(self, key: str) -> typing.Any:
+        local = self._local
+        if local is not None:
+            if key in local:
+                return local[key]
+            if self._deleted is not None and key in self._deleted:
+                raise KeyError(key)
+        return self._base[key]
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        if self._local is None:
+            self._local = {}
+        self._local[key] = value
+        if self._deleted is not None:
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        if self._local is None:
+            self._local = {}
+        self._local.pop(key, None)
+        if key in self._base:
+            if self._deleted is None:
+                self._deleted = set()
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        local = self._local
+        if local is not None:
+            if key in local:
+                return True
+            if self._deleted is not None and key in self._deleted:
+                return False
+        return key in self._base
+
+    def __iter__(self) -> typing.Iterator[str]:
+        local = self._local
+        if local is None:
+            return iter(self._base)
+        deleted = self._deleted or set()
+        keys = [key for key in self._base if key not in local and key not in deleted]
+        return iter(keys + list(local))
+
+    def __len__(self) -> int:
+        if self._local is None:
+            return len(self._base)
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)!r})"
@@ -0,0 +1,289 @@
+import asyncio
+import concurrent.futures
+import functools
+import math
+import threading
+import typing
+from types import TracebackType
+
+import sniffio
+
+from ._manager import LifespanManager
+from ._types import ASGIApp, Message, Receive, Scope, Send
+
+T = typing.TypeVar("T")
+
+
+class LoopThread:
+    """
+    An asyncio event loop running forever in a daemon thread.
+    """
+
+    def __init__(self, name: typing.Optional[str] = None) -> None:
+        self.name = name
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        assert self._thread is None, "Loop thread already started"
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self.loop = loop
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self) -> None:
+        assert self.loop is not None and self._thread is not None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop = None
+        self._thread = None
+
+    def submit(
+        self, func: typing.Callable[..., typing.Awaitable[T]], *args: typing.Any
+    ) -> "concurrent.futures.Future[T]":
+        assert self.loop is not None, "Loop thread not started"
+
+        async def main() -> T:
+            # The context of the caller is copied to the task, which would make
+            # this loop look like trio when called from trio.
+            sniffio.current_async_library_cvar.set(None)
+            return await func(*args)
+
+        return asyncio.run_coroutine_threadsafe(main(), self.loop)
+
+    def run(
+        self, func: typing.Callable[..., typing.Awaitable[T]], *args: typing.Any
+    ) -> T:
+        return self.submit(func, *args).result()
+
+
+async def call_in_loop_thread(
+    loop_thread: LoopThread, app: ASGIApp, scope: Scope, receive: Receive, send: Send
+) -> None:
+    """
+    Call `app` on the loop of `loop_thread` from another event loop, asyncio or
+    trio. `receive` and `send` are called back on the loop of the caller.
+    """
+    if sniffio.current_async_library() == "trio":
+        await _call_in_loop_thread_from_trio(loop_thread, app, scope, receive, send)
+        return
+
+    caller_loop = asyncio.get_running_loop()
+
+    async def on_caller_loop(awaitable: typing.Awaitable[T]) -> T:
+        return await awaitable
+
+    async def receive_from_caller() -> Message:
+        future = asyncio.run_coroutine_threadsafe(
+            on_caller_loop(receive()), caller_loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def send_to_caller(message: Message) -> None:
+        future = asyncio.run_coroutine_threadsafe(
+            on_caller_loop(send(message)), caller_loop
+        )
+        await asyncio.wrap_future(future)
+
+    future = loop_thread.submit(app, scope, receive_from_caller, send_to_caller)
+    await asyncio.wrap_future(future)
+
+
+async def _call_in_loop_thread_from_trio(
+    loop_thread: LoopThread, app: ASGIApp, scope: Scope, receive: Receive, send: Send
+) -> None:
+    import trio
+
+    token = trio.lowlevel.current_trio_token()
+    assert loop_thread.loop is not None, "Loop thread not started"
+    loop = loop_thread.loop
+    # Calls to 'receive' and 'send', to be run by tasks of the caller.
+    calls_sender, calls_receiver = trio.open_memory_channel[
+        typing.Tuple[typing.Callable[[], typing.Awaitable[typing.Any]], asyncio.Future]
+    ](math.inf)
+
+    async def run_on_caller(
+        func: typing.Callable[[], typing.Awaitable[typing.Any]], future: asyncio.Future
+    ) -> None:
+        try:
+            result = await func()
+        except Exception as exc:
+            loop.call_soon_threadsafe(_set_exception, future, exc)
+        else:
+            loop.call_soon_threadsafe(_set_result, future, result)
+
+    async def dispatch(nursery: trio.Nursery) -> None:
+        async for func, future in calls_receiver:
+            nursery.start_soon(run_on_caller, func, future)
+
+    # Hand calls over with the trio token rather than 'trio.from_thread.run()',
+    # which would block the loop thread or need a worker thread per call.
+    async def call_on_caller(func: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        future = loop.create_future()
+        token.run_sync_soon(calls_sender.send_nowait, (func, future))
+        return await future
+
+    async def receive_from_caller() -> Message:
+        return await call_on_caller(receive)
+
+    async def send_to_caller(message: Message) -> None:
+        await call_on_caller(functools.partial(send, message))
+
+    done = trio.Event()
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(dispatch, nursery)
+        future = loop_thread.submit(app, scope, receive_from_caller, send_to_caller)
+        future.add_done_callback(lambda _: token.run_sync_soon(done.set))
+        try:
+            await done.wait()
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            nursery.cancel_scope.cancel()
+    future.result()
+
+
+def _set_result(future: asyncio.Future, result: typing.Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exception: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exception)
+
+
+class SyncLifespanManager:
+    """
+    Start up an ASGI app from synchronous code, running its lifespan on an asyncio
+    event loop in a background thread.
+
+    The app is started on the first `start()` and shut down when the matching
+    last `stop()` is called, so that it can be shared by many sync callers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+    ) -> None:
+        self._app = app
+        self.startup_timeout = startup_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.users = 0
+        self._lock = threading.Lock()
+        self._loop_thread = LoopThread(name="asgi-lifespan")
+        self._manager: typing.Optional[LifespanManager] = None
+
+    @property
+    def manager(self) -> LifespanManager:
+        assert self._manager is not None, "App not started"
+        return self._manager
+
+    @property
+    def app(self) -> ASGIApp:
+        """
+        The state-aware app. It must be called on the loop of this manager,
+        e.g. using `call()`.
+        """
+        return self.manager.app
+
+    async def _enter(self) -> LifespanManager:
+        manager = LifespanManager(
+            self._app,
+            startup_timeout=self.startup_timeout,
+            shutdown_timeout=self.shutdown_timeout,
+        )
+        await manager.__aenter__()
+        return manager
+
+    def start(self) -> None:
+        # Other callers wait for an ongoing startup while holding the lock.
+        with self._lock:
+            if self.users == 0:
+                self._loop_thread.start()
+                try:
+                    self._manager = self._loop_thread.run(self._enter)
+                except BaseException:
+                    self._loop_thread.stop()
+                    raise
+            self.users += 1
+
+    def stop(self) -> None:
+        self._stop(None, None, None)
+
+    def _stop(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        with self._lock:
+            assert self.users > 0, "stop() called more times than start()"
+            self.users -= 1
+            if self.users > 0:
+                return
+            manager, self._manager = self._manager, None
+            assert manager is not None
+            try:
+                # The manager skips shutdown if the last user failed.
+                self._loop_thread.run(manager.__aexit__, exc_type, exc_value, traceback)
+            finally:
+                self._loop_thread.stop()
+
+    def run(
+        self, func: typing.Callable[..., typing.Awaitable[T]], *args: typing.Any
+    ) -> T:
+        """
+        Run `await func(*args)` on the loop of this manager, and return its result.
+        """
+        return self._loop_thread.run(func, *args)
+
+    def submit(
+        self, func: typing.Callable[..., typing.Awaitable[T]], *args: typing.Any
+    ) -> "concurrent.futures.Future[T]":
+        """
+        Same as `run()`, but return a `concurrent.futures.Future` instead of
+        blocking.
+        """
+        return self._loop_thread.submit(func, *args)
+
+    def call(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Call the state-aware app on the loop of this manager, and block until
+        it returns. `receive` and `send` are called on that loop too.
+        """
+        self._loop_thread.run(self.app, scope, receive, send)
+
+    async def acall(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Call the state-aware app on the loop of this manager from another event
+        loop, asyncio or trio. `receive` and `send` are called on the loop of
+        the caller.
+
+        This is an ASGI app, e.g. for use with an HTTPX `ASGITransport`.
+        """
+        await call_in_loop_thread(self._loop_thread, self.app, scope, receive, send)
+
+    def __enter__(self) -> "SyncLifespanManager":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[TracebackType] = None,
+    ) -> None:
+        self._stop(exc_type, exc_value, traceback)
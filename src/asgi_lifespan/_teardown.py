@@ -0,0 +1,110 @@
+import collections
+import typing
+from types import TracebackType
+
+from ._concurrency import detect_concurrency_backend
+from ._concurrency.base import BaseEvent, BaseTaskGroup, ConcurrencyBackend
+
+
+class TeardownSupervisor:
+    """
+    Run `LifespanManager(teardown=...)` lifespans in the background, so that
+    exiting a manager does not wait for the app to shut down.
+
+    At most `max_concurrency` shutdowns run at a time.
+    """
+
+    def __init__(self, max_concurrency: typing.Optional[int] = 4) -> None:
+        self.max_concurrency = max_concurrency
+        self.pending = 0
+        self.completed = 0
+        self.errors: typing.List[BaseException] = []
+        self._active = 0
+        self._waiters: typing.Deque[BaseEvent] = collections.deque()
+        self._idle: typing.Optional[BaseEvent] = None
+        self._backend: typing.Optional[ConcurrencyBackend] = None
+        self._task_group: typing.Optional[BaseTaskGroup] = None
+
+    def start_soon(
+        self, coroutine: typing.Callable[[], typing.Awaitable[None]]
+    ) -> None:
+        assert self._task_group is not None, "TeardownSupervisor must be entered first"
+        self._task_group.start_soon(coroutine)
+
+    def submit(self) -> None:
+        # A manager handed its lifespan over for shutdown.
+        self.pending += 1
+
+    async def acquire(self) -> None:
+        assert self._backend is not None
+        if self.max_concurrency is None or self._active < self.max_concurrency:
+            self._active += 1
+            return
+
+        event = self._backend.create_event()
+        self._waiters.append(event)
+        try:
+            await event.wait()
+        except BaseException:
+            if event in self._waiters:
+                self._waiters.remove(event)
+            else:
+                # We were handed a slot already: pass it on.
+                self._release_slot()
+            raise
+
+    def release(
+        self, exception: typing.Optional[BaseException], acquired: bool = True
+    ) -> None:
+        # A handed over lifespan ended, after acquiring a slot or not.
+        if acquired:
+            self._release_slot()
+        self.pending -= 1
+        self.completed += 1
+        if exception is not None:
+            self.errors.append(exception)
+        if self.pending == 0 and self._idle is not None:
+            self._idle.set()
+
+    def _release_slot(self) -> None:
+        if self._waiters:
+            self._waiters.popleft().set()
+        else:
+            self._active -= 1
+
+    async def flush(self) -> None:
+        """
+        Wait for pending shutdowns to complete, then raise the first exception
+        raised by shutdowns since the last flush, if any.
+        """
+        assert self._backend is not None, "TeardownSupervisor must be entered first"
+        if self.pending:
+            self._idle = self._backend.create_event()
+            try:
+                await self._idle.wait()
+            finally:
+                self._idle = None
+
+        if self.errors:
+            exception = self.errors[0]
+            self.errors.clear()
+            raise exception
+
+    async def __aenter__(self) -> "TeardownSupervisor":
+        self._backend = detect_concurrency_backend()
+        self._task_group = self._backend.create_task_group()
+        await self._task_group.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]] = None,
+        exc_value: typing.Optional[BaseException] = None,
+        traceback: typing.Optional[TracebackType] = None,
+    ) -> None:
+        assert self._task_group is not None
+        try:
+            if exc_type is None:
+                await self.flush()
+        finally:
+            await self._task_group.__aexit__(exc_type, exc_value, traceback)
@@ -0,0 +1,157 @@
+import contextlib
+import sys
+import types
+import typing
+
+from ._admission import AdmissionController
+from ._manager import LifespanManager
+from ._pool import BasePool, PoolEntry
+from ._types import ASGIApp
+
+# Shared by all tenants, so not part of the cost of any of them.
+_SHARED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+
+def estimate_size(value: typing.Any) -> int:
+    """
+    Estimate the memory used by `value` and the objects it references, in bytes,
+    counting shared objects once.
+    """
+    seen: typing.Set[int] = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if isinstance(attributes, dict):
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total
+
+
+def state_size(manager: LifespanManager) -> int:
+    return estimate_size(manager._state)
+
+
+class TenantRegistry(BasePool[str]):
+    """
+    Start per-tenant apps on demand, and shut down the least recently used ones
+    to keep their estimated memory cost within a budget.
+    """
+
+    def __init__(
+        self,
+        app_factory: typing.Callable[[str], ASGIApp],
+        memory_budget: typing.Optional[int] = None,
+        cost: typing.Callable[[LifespanManager], int] = state_size,
+        startup_timeout: typing.Optional[float] = 5,
+        shutdown_timeout: typing.Optional[float] = 5,
+        admission: typing.Optional[AdmissionController] = None,
+    ) -> None:
+        if memory_budget is not None and memory_budget < 0:
+            raise ValueError(f"memory_budget must be positive, got {memory_budget}")
+
+        super().__init__(
+            startup_timeout=startup_timeout, shutdown_timeout=shutdown_timeout
+        )
+        self.app_factory = app_factory
+        self.memory_budget = memory_budget
+        self.cost = cost
+        self.admission = admission
+
+        self.cold_starts = 0
+        self.cold_start_duration = 0.0
+        self.evicted_bytes = 0
+
+    def __contains__(self, tenant: str) -> bool:
+        return tenant in self._entries
+
+    @property
+    def tenants(self) -> typing.List[str]:
+        """
+        Started or starting tenants, least recently used first.
+        """
+        return list(self._entries)
+
+    @property
+    def costs(self) -> typing.Dict[str, int]:
+        """
+        Estimated memory cost of each started tenant, in bytes.
+        """
+        return {tenant: entry.cost for tenant, entry in self._entries.items()}
+
+    @property
+    def total_cost(self) -> int:
+        return sum(entry.cost for entry in self._entries.values())
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of `acquire()` calls that found the tenant started or starting.
+        """
+        total = self.hits + self.cold_starts
+        return self.hits / total if total else 0.0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, tenant: str) -> typing.AsyncIterator[LifespanManager]:
+        """
+        Yield the started `LifespanManager` of `tenant`, starting it up if needed.
+        """
+
+        def create_manager() -> LifespanManager:
+            return LifespanManager(
+                self.app_factory(tenant),
+                startup_timeout=self.startup_timeout,
+                shutdown_timeout=self.shutdown_timeout,
+                admission=self.admission,
+                admission_group=tenant,
+            )
+
+        entry = await self._checkout(tenant, create_manager)
+        try:
+            yield entry.hosted.manager
+        finally:
+            self._release(entry)
+
+    def _on_started(self, entry: PoolEntry[str], cold: bool, duration: float) -> None:
+        if cold:
+            self.cold_starts += 1
+            self.cold_start_duration += duration
+            entry.cost = self.cost(entry.hosted.manager)
+
+    def _select_evictions(self) -> typing.List[PoolEntry[str]]:
+        if self.memory_budget is None:
+            return []
+
+        evictions = []
+        total = self.total_cost
+        # Tenants are kept in least-recently-used order.
+        for entry in self._entries.values():
+            if total <= self.memory_budget:
+                break
+            if entry.refcount == 0:
+                total -= entry.cost
+                evictions.append(entry)
+        return evictions
+
+    def _evict(self, entry: PoolEntry[str]) -> None:
+        self.evicted_bytes += entry.cost
+        super()._evict(entry)
+
+    async def __aenter__(self) -> "TenantRegistry":
+        await self._open()
+        return self
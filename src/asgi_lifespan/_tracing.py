@@ -0,0 +1,54 @@
+import typing
+
+# Called with the name of a lifespan event and a `time.perf_counter()` timestamp.
+EventHook = typing.Callable[[str, float], None]
+
+# Phase name -> (start event, end event).
+PHASES = {
+    "enter": ("enter.start", "enter.end"),
+    "app_first_receive": ("enter.start", "receive.start"),
+    "startup": ("startup.start", "startup.end"),
+    "startup_queue": ("startup.start", "startup.admitted"),
+    "startup_app": ("receive.lifespan.startup", "send.lifespan.startup.complete"),
+    "warmup": ("warmup.start", "warmup.end"),
+    "exit": ("exit.start", "exit.end"),
+    "shutdown": ("shutdown.start", "shutdown.end"),
+    "shutdown_queue": ("shutdown.start", "shutdown.admitted"),
+    "shutdown_app": ("receive.lifespan.shutdown", "send.lifespan.shutdown.complete"),
+    "teardown": ("shutdown.end", "exit.end"),
+    "run_app": ("run_app.start", "run_app.end"),
+}
+
+
+class PhaseTimer:
+    """
+    Collect events from `LifespanManager(on_event=...)` and break them down into
+    the duration of each lifespan phase.
+    """
+
+    def __init__(self) -> None:
+        self.events: typing.List[typing.Tuple[str, float]] = []
+
+    def __call__(self, event: str, timestamp: float) -> None:
+        self.events.append((event, timestamp))
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    @property
+    def phases(self) -> typing.Dict[str, float]:
+        """
+        Duration of each phase that was traced, in seconds.
+
+        Uses the first occurrence of each event, so clear the timer between cycles
+        when reusing it.
+        """
+        first: typing.Dict[str, float] = {}
+        for event, timestamp in self.events:
+            first.setdefault(event, timestamp)
+
+        return {
+            name: first[end] - first[start]
+            for name, (start, end) in PHASES.items()
+            if start in first and end in first
+        }
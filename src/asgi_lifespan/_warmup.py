@@ -0,0 +1,84 @@
+import time
+import typing
+
+from ._concurrency.base import ConcurrencyBackend
+from ._types import ASGIApp, Message, Scope
+
+# Either scopes of requests to send to the app, or a coroutine function that
+# is given the state-aware app.
+Warmup = typing.Union[
+    typing.Sequence[Scope], typing.Callable[[ASGIApp], typing.Awaitable[None]]
+]
+
+
+def complete_scope(scope: Scope) -> Scope:
+    """
+    Fill in the keys of a partial warmup scope, e.g. `{"type": "http", "path": "/"}`.
+    """
+    path = scope.get("path", "/")
+    defaults: Scope = {
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "ws" if scope["type"] == "websocket" else "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": None,
+        "server": None,
+    }
+    if scope["type"] == "http":
+        defaults["method"] = "GET"
+    return {**defaults, **scope}
+
+
+def create_receive(scope_type: str) -> typing.Callable[[], typing.Awaitable[Message]]:
+    if scope_type == "websocket":
+        messages: typing.List[Message] = [{"type": "websocket.connect"}]
+        disconnect: Message = {"type": "websocket.disconnect", "code": 1000}
+    else:
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        disconnect = {"type": "http.disconnect"}
+
+    async def receive() -> Message:
+        return messages.pop(0) if messages else disconnect
+
+    return receive
+
+
+async def discard(message: Message) -> None:
+    pass
+
+
+async def run_warmup(
+    backend: ConcurrencyBackend,
+    app: ASGIApp,
+    warmup: Warmup,
+    concurrency: int,
+    latencies: typing.List[float],
+) -> None:
+    """
+    Run `warmup` against `app`, at most `concurrency` requests at a time, and
+    record the duration of each request into the (empty) `latencies` list.
+    """
+    if callable(warmup):
+        start = time.perf_counter()
+        await warmup(app)
+        latencies.append(time.perf_counter() - start)
+        return
+
+    scopes = [complete_scope(scope) for scope in warmup]
+    latencies.extend(float("nan") for _ in scopes)
+    indices = iter(range(len(scopes)))
+
+    async def worker() -> None:
+        for index in indices:
+            scope = scopes[index]
+            start = time.perf_counter()
+            await app(scope, create_receive(scope["type"]), discard)
+            latencies[index] = time.perf_counter() - start
+
+    async with backend.create_task_group() as task_group:
+        for _ in range(min(concurrency, len(scopes))):
+            task_group.start_soon(worker)
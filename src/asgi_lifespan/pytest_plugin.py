@@ -0,0 +1,240 @@
+"""
+A pytest plugin that starts up an ASGI app once per configurable scope, instead
+of once per test.
+
+Enable it in the top-level `conftest.py`:
+
+    pytest_plugins = ["asgi_lifespan.pytest_plugin"]
+
+Then configure it in the pytest configuration file:
+
+    [pytest]
+    asgi_lifespan_app = myproject.main:app
+    asgi_lifespan_scope = session
+
+Then use the `lifespan` fixture. See the README for details.
+"""
+import importlib
+import os
+import time
+import typing
+
+import pytest
+
+from ._manager import LifespanManager
+from ._sync import SyncLifespanManager
+from ._types import ASGIApp, Receive, Scope, Send
+
+SCOPES = ("function", "class", "module", "package", "session")
+
+
+class Lifespan:
+    """
+    An app started up by the `lifespan` fixture.
+
+    The lifespan runs on an asyncio event loop in a background thread, so that
+    it can outlive the event loop of a test, whether asyncio or trio. Objects
+    bound to an event loop that the app puts in the state (e.g. clients, pools
+    or locks) belong to that loop, so tests must only use them through `app`.
+    """
+
+    def __init__(self, manager: SyncLifespanManager, worker_id: str) -> None:
+        self._manager = manager
+        # e.g. "gw0" under xdist, to name per-worker resources.
+        self.worker_id = worker_id
+        self.startup_duration = 0.0
+        self.shutdown_duration = 0.0
+
+    @property
+    def manager(self) -> LifespanManager:
+        return self._manager.manager
+
+    @property
+    def state(self) -> typing.Dict[str, typing.Any]:
+        """
+        The lifespan state. Objects bound to an event loop must not be used from
+        the loop of a test.
+        """
+        return self.manager._state
+
+    async def app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        The state-aware app, to be called from the event loop of a test.
+        """
+        await self._manager.acall(scope, receive, send)
+
+
+def import_from_string(path: str) -> typing.Any:
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise pytest.UsageError(
+            f"asgi_lifespan_app must be of the form 'module:attribute', got {path!r}"
+        )
+    value: typing.Any = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        value = getattr(value, name)
+    return value
+
+
+def get_scope(fixture_name: str, config: pytest.Config) -> str:
+    scope = config.getoption("lifespan_scope") or config.getini("asgi_lifespan_scope")
+    if scope not in SCOPES:
+        raise pytest.UsageError(
+            f"asgi_lifespan_scope must be one of {SCOPES}, got {scope!r}"
+        )
+    return scope
+
+
+def get_worker_id(config: pytest.Config) -> str:
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:  # pragma: no cover
+        return workerinput["workerid"]
+    return os.environ.get("PYTEST_XDIST_WORKER", "master")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("asgi-lifespan")
+    group.addoption(
+        "--lifespan-scope",
+        dest="lifespan_scope",
+        choices=SCOPES,
+        help="Scope of the 'lifespan' fixture. Overrides 'asgi_lifespan_scope'.",
+    )
+    group.addoption(
+        "--lifespan-report",
+        dest="lifespan_report",
+        action="store_true",
+        help="Show time spent in startup and shutdown for each test.",
+    )
+    parser.addini(
+        "asgi_lifespan_app",
+        "ASGI app for the 'lifespan' fixture, as 'module:attribute'.",
+    )
+    parser.addini(
+        "asgi_lifespan_scope",
+        "Scope of the 'lifespan' fixture (default: session).",
+        default="session",
+    )
+    parser.addini(
+        "asgi_lifespan_startup_timeout",
+        "Startup timeout of the 'lifespan' fixture, in seconds (default: 5).",
+        default="5",
+    )
+    parser.addini(
+        "asgi_lifespan_shutdown_timeout",
+        "Shutdown timeout of the 'lifespan' fixture, in seconds (default: 5).",
+        default="5",
+    )
+
+
+@pytest.fixture(scope="session")
+def lifespan_app(pytestconfig: pytest.Config) -> ASGIApp:
+    """
+    The ASGI app to start up. Override this fixture, at session scope, to
+    provide the app without setting 'asgi_lifespan_app'.
+    """
+    path = pytestconfig.getini("asgi_lifespan_app")
+    if not path:
+        raise pytest.UsageError(
+            "Set 'asgi_lifespan_app' in the pytest configuration, "
+            "or override the 'lifespan_app' fixture."
+        )
+    return import_from_string(path)
+
+
+@pytest.fixture(scope=get_scope)  # type: ignore
+def lifespan(
+    request: pytest.FixtureRequest, lifespan_app: ASGIApp
+) -> typing.Iterator[Lifespan]:
+    """
+    Start up `lifespan_app` once per scope, then shut it down. Under xdist,
+    each worker starts up its own app.
+    """
+    config = request.config
+    manager = SyncLifespanManager(
+        lifespan_app,
+        startup_timeout=float(config.getini("asgi_lifespan_startup_timeout")),
+        shutdown_timeout=float(config.getini("asgi_lifespan_shutdown_timeout")),
+    )
+    lifespan = Lifespan(manager, get_worker_id(config))
+    # Timings are attributed to the test that is running when they happen:
+    # e.g. the first and last test using a session-scoped app.
+    start = time.perf_counter()
+    manager.start()
+    lifespan.startup_duration = time.perf_counter() - start
+    reporter = config.stash[reporter_key]
+    reporter.record("startup", lifespan.startup_duration)
+    try:
+        yield lifespan
+    finally:
+        start = time.perf_counter()
+        try:
+            manager.stop()
+        finally:
+            lifespan.shutdown_duration = time.perf_counter() - start
+            reporter.record("shutdown", lifespan.shutdown_duration)
+
+
+class Reporter:
+    """
+    Collect the time spent in startup and shutdown by each test, and show it
+    with `--lifespan-report`.
+    """
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.item: typing.Optional[pytest.Item] = None
+        # Node ID -> [startup, shutdown] durations.
+        self.durations: typing.Dict[str, typing.List[float]] = {}
+
+    def record(self, phase: str, duration: float) -> None:
+        if self.item is not None:
+            # Also sent to the controller when running under xdist.
+            self.item.user_properties.append((f"lifespan_{phase}", duration))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item) -> typing.Iterator[None]:
+        self.item = item
+        try:
+            yield
+        finally:
+            self.item = None
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        # User properties accumulate over phases: only count them once.
+        if report.when != "teardown":
+            return
+        durations = [0.0, 0.0]
+        for name, value in report.user_properties:
+            if name == "lifespan_startup":
+                durations[0] += typing.cast(float, value)
+            elif name == "lifespan_shutdown":
+                durations[1] += typing.cast(float, value)
+        if any(durations):
+            self.durations[report.nodeid] = durations
+
+    def pytest_terminal_summary(self, terminalreporter: typing.Any) -> None:
+        if not self.config.getoption("lifespan_report") or not self.durations:
+            return
+        terminalreporter.section("asgi-lifespan startup and shutdown")
+        total_startup = total_shutdown = 0.0
+        ordered = sorted(self.durations.items(), key=lambda entry: -sum(entry[1]))
+        for nodeid, (startup, shutdown) in ordered:
+            total_startup += startup
+            total_shutdown += shutdown
+            terminalreporter.write_line(
+                f"{startup:8.3f}s startup {shutdown:8.3f}s shutdown  {nodeid}"
+            )
+        terminalreporter.write_line(
+            f"{total_startup:8.3f}s startup {total_shutdown:8.3f}s shutdown  "
+            f"total for {len(self.durations)} test(s)"
+        )
+
+
+reporter_key = pytest.StashKey[Reporter]()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    reporter = Reporter(config)
+    config.stash[reporter_key] = reporter
+    config.pluginmanager.register(reporter, "asgi-lifespan-reporter")
@@ -7,8 +7,11 @@ import asyncio
 import functools
 import typing
 
+import anyio
+import pytest
 import trio
 
+from asgi_lifespan._concurrency.anyio import AnyioBackend
 from asgi_lifespan._concurrency.asyncio import AsyncioBackend
 from asgi_lifespan._concurrency.base import ConcurrencyBackend
 from asgi_lifespan._concurrency.trio import TrioBackend
@@ -31,6 +34,11 @@ async def _sleep_trio(concurrency_backend: ConcurrencyBackend, seconds: float) -
     await trio.sleep(seconds)
 
 
+@sleep.register(AnyioBackend)
+async def _sleep_anyio(concurrency_backend: ConcurrencyBackend, seconds: float) -> None:
+    await anyio.sleep(seconds)
+
+
 @functools.singledispatch
 async def run_and_move_on_after(
     concurrency_backend: ConcurrencyBackend,
@@ -64,3 +72,25 @@ async def _run_and_move_on_after_trio(
         await coroutine()
         raise NotImplementedError  # pragma: no cover
     return True
+
+
+@run_and_move_on_after.register(AnyioBackend)
+async def _run_and_move_on_after_anyio(
+    concurrency_backend: ConcurrencyBackend,
+    seconds: typing.Optional[float],
+    coroutine: typing.Callable[[], typing.Awaitable[None]],
+) -> bool:
+    with anyio.move_on_after(seconds):
+        await coroutine()
+        raise NotImplementedError  # pragma: no cover
+    return True
+
+
+trio_version = tuple(int(part) for part in trio.__version__.split(".")[:2])
+
+
+def skip_if_unsupported(library: str, backend: typing.Optional[str]) -> None:
+    if backend == "anyio" and library == "trio" and trio_version < (0, 32):
+        pytest.skip("anyio requires trio>=0.32")
+    if backend == "asyncio-eager" and library != "asyncio":
+        pytest.skip("asyncio only")
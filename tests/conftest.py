@@ -2,6 +2,8 @@ import typing
 
 import pytest
 
+pytest_plugins = ["pytester"]
+
 
 @pytest.fixture(
     params=[
@@ -0,0 +1,188 @@
+import functools
+import typing
+
+import pytest
+
+from asgi_lifespan import (
+    AdmissionController,
+    LifespanManager,
+    PhaseTimer,
+    TenantRegistry,
+)
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Receive, Scope, Send
+
+
+class Database:
+    """
+    A resource that records how many lifespans use it at once.
+    """
+
+    def __init__(self, duration: float = 0.05) -> None:
+        self.duration = duration
+        self.active = 0
+        self.max_active = 0
+
+    async def use(self) -> None:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await detect_concurrency_backend().sleep(self.duration)
+        self.active -= 1
+
+    def create_app(self, *args: typing.Any) -> typing.Any:
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await receive()
+            await self.use()
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+            await self.use()
+            await send({"type": "lifespan.shutdown.complete"})
+
+        return app
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_limits_concurrency() -> None:
+    database = Database()
+    admission = AdmissionController(max_concurrency=2)
+    backend = detect_concurrency_backend()
+    managers = [
+        LifespanManager(database.create_app(), admission=admission) for _ in range(5)
+    ]
+
+    async def cycle(manager: LifespanManager) -> None:
+        async with manager:
+            pass
+
+    async with backend.create_task_group() as task_group:
+        for manager in managers:
+            task_group.start_soon(functools.partial(cycle, manager))
+
+    assert database.max_active == 2
+    assert admission.admitted == {"startup": 5, "shutdown": 5}
+    assert admission.active == 0
+    assert admission.waiting == 0
+    assert admission.max_wait["startup"] > 0
+    assert admission.total_wait["startup"] >= admission.max_wait["startup"]
+
+    # Time spent in the queue is not counted as startup time.
+    last = max(managers, key=lambda manager: manager.startup_queue_time)
+    assert last.startup_queue_time >= 0.08
+    assert last.startup_duration is not None
+    assert last.startup_duration < last.startup_queue_time
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_timeouts_start_once_admitted() -> None:
+    database = Database(duration=0.02)
+    admission = AdmissionController(max_concurrency=1)
+    backend = detect_concurrency_backend()
+
+    async def cycle() -> None:
+        app = database.create_app()
+        timeout = 0.03  # Less than the time spent in the queue.
+        async with LifespanManager(
+            app,
+            startup_timeout=timeout,
+            shutdown_timeout=timeout,
+            admission=admission,
+        ):
+            pass
+
+    async with backend.create_task_group() as task_group:
+        for _ in range(3):
+            task_group.start_soon(cycle)
+
+    assert admission.max_wait["startup"] > 0.03
+    assert database.max_active == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_order() -> None:
+    admission = AdmissionController(max_concurrency=1)
+    backend = detect_concurrency_backend()
+    admitted: typing.List[str] = []
+
+    async def admit(name: str, priority: int, group: str) -> None:
+        await admission.acquire(backend, "startup", priority, group)
+        admitted.append(name)
+        admission.release()
+
+    await admission.acquire(backend, "startup")
+    waiters = [
+        ("a1", 0, "a"),
+        ("a2", 0, "a"),
+        ("a3", 0, "a"),
+        ("b1", 0, "b"),
+        ("c1", 1, "c"),
+    ]
+    async with backend.create_task_group() as task_group:
+        for count, (name, priority, group) in enumerate(waiters, 1):
+            task_group.start_soon(functools.partial(admit, name, priority, group))
+            # Queue waiters in a known order.
+            while admission.waiting < count:
+                await backend.sleep(0)
+        admission.release()
+
+    # By priority, then groups take turns.
+    assert admitted == ["c1", "a1", "b1", "a2", "a3"]
+    assert admission.active == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_cancelled() -> None:
+    admission = AdmissionController(max_concurrency=1)
+    backend = detect_concurrency_backend()
+
+    async def acquire() -> None:
+        await admission.acquire(backend, "startup")
+
+    await acquire()
+    with pytest.raises(TimeoutError):
+        await backend.run_and_fail_after(0.01, acquire)
+    assert admission.waiting == 0
+    assert admission.admitted["startup"] == 1
+
+    admission.release()
+    assert admission.active == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_tracing() -> None:
+    timer = PhaseTimer()
+    admission = AdmissionController(max_concurrency=None)
+    app = Database(duration=0).create_app()
+
+    async with LifespanManager(app, on_event=timer, admission=admission) as manager:
+        pass
+
+    assert "startup_queue" in timer.phases
+    assert "shutdown_queue" in timer.phases
+    assert manager.startup_queue_time >= 0
+    assert manager.shutdown_queue_time >= 0
+    assert admission.admitted == {"startup": 1, "shutdown": 1}
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_admission_tenants() -> None:
+    database = Database(duration=0.01)
+    admission = AdmissionController(max_concurrency=1)
+    backend = detect_concurrency_backend()
+
+    async with TenantRegistry(database.create_app, admission=admission) as registry:
+
+        async def use(tenant: str) -> None:
+            async with registry.acquire(tenant):
+                pass
+
+        async with backend.create_task_group() as task_group:
+            for tenant in ["a", "b", "c"]:
+                task_group.start_soon(functools.partial(use, tenant))
+
+    assert database.max_active == 1
+    assert admission.admitted == {"startup": 3, "shutdown": 3}
+
+
+def test_admission_invalid() -> None:
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrency=0)
@@ -0,0 +1,206 @@
+import logging
+import os
+import pathlib
+import pickle
+import threading
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager, StateCache
+from asgi_lifespan._cache import OUT_OF_BAND
+from asgi_lifespan._types import Receive, Scope, Send
+
+
+class IndexApp:
+    def __init__(self) -> None:
+        self.builds = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "lifespan"
+        state = scope["state"]
+        await receive()
+        if "index" not in state:
+            self.builds += 1
+            state["index"] = {"a": 1, "b": 2}
+            blob = bytearray(b"x" * 100_000)
+            state["blob"] = pickle.PickleBuffer(blob) if OUT_OF_BAND else blob
+        state["connection"] = object()
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_state_cache(tmp_path: pathlib.Path) -> None:
+    app = IndexApp()
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["index", "blob"])
+
+    async with LifespanManager(app, state_cache=cache):
+        pass
+    assert app.builds == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.saved_bytes > 100_000
+    assert cache.size == cache.saved_bytes
+
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["index", "blob"])
+    async with LifespanManager(app, state_cache=cache) as manager:
+        state = manager._state
+        assert state["index"] == {"a": 1, "b": 2}
+        assert bytes(state["blob"]) == b"x" * 100_000
+        if OUT_OF_BAND:
+            # Large buffers are mapped from the cache file, not copied.
+            assert isinstance(state["blob"], memoryview)
+            assert state["blob"].readonly
+            assert len(cache._maps) == 1
+        assert "connection" in state
+    assert app.builds == 1
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.loaded_bytes == cache.size
+    # Cached keys are dropped from the state on exit, and the map is closed.
+    assert "index" not in state
+    assert "blob" not in state
+    assert cache._maps == []
+
+    # A new fingerprint is a miss.
+    cache = StateCache(tmp_path, fingerprint="v2", keys=["index"])
+    async with LifespanManager(app, state_cache=cache):
+        pass
+    assert app.builds == 2
+    assert cache.misses == 1
+    assert len(os.listdir(tmp_path)) == 2
+
+
+class ThreadRecordingCache(StateCache):
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.threads: typing.Set[int] = set()
+
+    def load(self, state: typing.Dict[str, typing.Any]) -> bool:
+        self.threads.add(threading.get_ident())
+        return super().load(state)
+
+    def save(self, state: typing.Dict[str, typing.Any]) -> bool:
+        self.threads.add(threading.get_ident())
+        return super().save(state)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_state_cache_off_event_loop(tmp_path: pathlib.Path) -> None:
+    seen: typing.List[typing.Any] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        # Preloaded before the app runs.
+        seen.append(scope["state"].get("a"))
+        await receive()
+        scope["state"]["a"] = 1
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        await send({"type": "lifespan.shutdown.complete"})
+
+    for _ in range(2):
+        cache = ThreadRecordingCache(tmp_path, fingerprint="v1", keys=["a"])
+        async with LifespanManager(app, state_cache=cache):
+            pass
+        assert cache.threads
+        assert threading.get_ident() not in cache.threads
+
+    assert seen == [None, 1]
+
+
+def test_state_cache_close(tmp_path: pathlib.Path) -> None:
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["blob"], mmap_threshold=0)
+    blob = bytearray(b"x" * 100)
+    cache.save({"blob": pickle.PickleBuffer(blob) if OUT_OF_BAND else blob})
+
+    state: typing.Dict[str, typing.Any] = {}
+    assert cache.load(state)
+    if OUT_OF_BAND:
+        # Still used by the state.
+        cache.close()
+        assert len(cache._maps) == 1
+        state.clear()
+    cache.close()
+    assert cache._maps == []
+
+
+def test_state_cache_keeps_existing_keys(tmp_path: pathlib.Path) -> None:
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["a", "b"])
+    assert cache.save({"a": 1})
+    state = {"a": 2}
+    assert cache.load(state)
+    assert state == {"a": 2}
+
+    assert cache.save({"a": 1, "b": 2})
+    assert cache.load(state)
+    assert state == {"a": 2, "b": 2}
+
+
+def test_state_cache_eviction(tmp_path: pathlib.Path) -> None:
+    for version in range(3):
+        cache = StateCache(tmp_path, fingerprint=f"v{version}", keys=["a"])
+        cache.save({"a": version})
+        os.utime(cache.path, (version, version))
+
+    # Loading an entry marks it as recently used.
+    assert StateCache(tmp_path, fingerprint="v0", keys=["a"]).load({})
+
+    cache = StateCache(tmp_path, fingerprint="v3", keys=["a"], max_entries=2)
+    cache.save({"a": 3})
+    assert cache.evictions == 2
+    assert StateCache(tmp_path, fingerprint="v0", keys=["a"]).load({})
+    assert not StateCache(tmp_path, fingerprint="v1", keys=["a"]).load({})
+    assert not StateCache(tmp_path, fingerprint="v2", keys=["a"]).load({})
+
+    cache = StateCache(tmp_path, fingerprint="v4", keys=["a"], max_entries=None)
+    cache.save({"a": 4})
+    assert cache.evictions == 0
+
+
+def test_state_cache_errors(
+    tmp_path: pathlib.Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    caplog.set_level(logging.WARNING, logger="asgi_lifespan")
+    cache = StateCache(tmp_path / "missing", fingerprint="v1", keys=["a", "lock"])
+    assert cache.size == 0
+    assert not cache.load({})
+
+    assert not cache.save({"a": 1, "lock": threading.Lock()})
+    assert "Could not pickle" in caplog.text
+    assert not os.path.exists(cache.path)
+
+    cache.save({"a": 1})
+    with open(cache.path, "r+b") as file:
+        file.write(b"garbage!")
+    state: typing.Dict[str, typing.Any] = {}
+    assert not cache.load(state)
+    assert state == {}
+    assert "unreadable state cache" in caplog.text
+
+    # Empty or truncated files are unreadable too.
+    open(cache.path, "wb").close()
+    assert not cache.load(state)
+    assert cache.misses == 3
+
+
+def test_state_cache_fingerprint_mismatch(tmp_path: pathlib.Path) -> None:
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["small"])
+    # Pickled in-band, being small.
+    small = pickle.PickleBuffer(bytearray(b"x")) if OUT_OF_BAND else b"x"
+    cache.save({"small": small})
+    other = StateCache(tmp_path, fingerprint="v2", keys=["small"])
+    os.replace(cache.path, other.path)
+    assert not other.load({})
+
+
+def test_state_cache_in_band(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # As on Python 3.7, which lacks pickle protocol 5.
+    monkeypatch.setattr("asgi_lifespan._cache.OUT_OF_BAND", False)
+    cache = StateCache(tmp_path, fingerprint="v1", keys=["blob"], mmap_threshold=0)
+    assert cache.save({"blob": b"x" * 100_000})
+
+    state: typing.Dict[str, typing.Any] = {}
+    assert cache.load(state)
+    assert state == {"blob": b"x" * 100_000}
@@ -0,0 +1,191 @@
+import asyncio
+import typing
+
+import pytest
+
+from asgi_lifespan._concurrency import get_concurrency_backend
+from asgi_lifespan._concurrency.asyncio import FutureEvent, FutureQueue
+
+from . import concurrency
+from .concurrency import skip_if_unsupported
+
+
+@pytest.fixture(params=[None, "asyncio-eager", "anyio"])
+def backend_name(request: typing.Any, concurrency: str) -> typing.Optional[str]:
+    skip_if_unsupported(concurrency, request.param)
+    return request.param
+
+
+class ChildFailed(Exception):
+    pass
+
+
+class BodyFailed(Exception):
+    pass
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_task_group_waits_for_children(
+    backend_name: typing.Optional[str],
+) -> None:
+    backend = get_concurrency_backend(backend_name)
+    done: list = []
+
+    async def child() -> None:
+        await concurrency.sleep(backend, 0.01)
+        done.append(True)
+
+    async with backend.create_task_group() as task_group:
+        task_group.start_soon(child)
+        task_group.start_soon(child)
+
+    assert done == [True, True]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_task_group_child_failure_cancels_siblings(
+    backend_name: typing.Optional[str],
+) -> None:
+    backend = get_concurrency_backend(backend_name)
+    never_set = backend.create_event()
+
+    async def fail() -> None:
+        raise ChildFailed()
+
+    with pytest.raises(ChildFailed):
+        async with backend.create_task_group() as task_group:
+            task_group.start_soon(never_set.wait)
+            task_group.start_soon(fail)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_task_group_body_failure_cancels_children(
+    backend_name: typing.Optional[str],
+) -> None:
+    backend = get_concurrency_backend(backend_name)
+    never_set = backend.create_event()
+
+    with pytest.raises(BodyFailed):
+        async with backend.create_task_group() as task_group:
+            task_group.start_soon(never_set.wait)
+            raise BodyFailed()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_task_group_cancelled_while_waiting(
+    backend_name: typing.Optional[str],
+) -> None:
+    backend = get_concurrency_backend(backend_name)
+    never_set = backend.create_event()
+
+    async def main() -> None:
+        async with backend.create_task_group() as task_group:
+            task_group.start_soon(never_set.wait)
+
+    timed_out = await concurrency.run_and_move_on_after(backend, 0.01, main)
+    assert timed_out
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_background_stack_and_timeout(backend_name: typing.Optional[str]) -> None:
+    backend = get_concurrency_backend(backend_name)
+    never_set = backend.create_event()
+
+    async def stuck_app() -> None:
+        await never_set.wait()
+
+    background = backend.run_in_background(stuck_app)
+    async with background:
+        with pytest.raises(TimeoutError):
+            await backend.run_and_fail_after(0.01, never_set.wait)
+        assert "stuck_app" in [frame.name for frame in background.extract_stack()]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_background_app_exception(backend_name: typing.Optional[str]) -> None:
+    backend = get_concurrency_backend(backend_name)
+
+    async def fail() -> None:
+        raise ChildFailed()
+
+    with pytest.raises(ChildFailed):
+        async with backend.run_in_background(fail):
+            await concurrency.sleep(backend, 0.01)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_queue(backend_name: typing.Optional[str]) -> None:
+    backend = get_concurrency_backend(backend_name)
+    queue = backend.create_queue(capacity=2)
+    await queue.put(1)
+    await queue.put(2)
+    assert [await queue.get(), await queue.get()] == [1, 2]
+
+
+def test_get_concurrency_backend() -> None:
+    backend = get_concurrency_backend("anyio")
+    assert get_concurrency_backend(backend) is backend
+
+    with pytest.raises(ValueError):
+        get_concurrency_backend("curio")
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_backends_are_shared() -> None:
+    # Stateless, so created once for all managers.
+    assert get_concurrency_backend() is get_concurrency_backend()
+    assert get_concurrency_backend("anyio") is get_concurrency_backend("anyio")
+    assert get_concurrency_backend("asyncio") is not get_concurrency_backend(
+        "asyncio-eager"
+    )
+
+
+@pytest.mark.asyncio
+async def test_future_queue_keeps_value_handed_to_cancelled_getter() -> None:
+    queue = FutureQueue(capacity=2)
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+
+    await queue.put(1)  # Handed over to the getter directly...
+    getter.cancel()  # ...which is cancelled before it gets to return it.
+    with pytest.raises(asyncio.CancelledError):
+        await getter
+
+    assert await queue.get() == 1
+
+
+@pytest.mark.asyncio
+async def test_future_queue_put_waits_for_room() -> None:
+    queue = FutureQueue(capacity=1)
+    await queue.put(1)
+    putter = asyncio.ensure_future(queue.put(2))
+    cancelled = asyncio.ensure_future(queue.put(3))
+    await asyncio.sleep(0)
+    assert not putter.done()
+
+    cancelled.cancel()
+    assert await queue.get() == 1
+    await putter
+    assert await queue.get() == 2
+
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+    getter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await getter
+    await queue.put(4)
+    assert await queue.get() == 4
+
+
+@pytest.mark.asyncio
+async def test_future_event_wait_cancelled() -> None:
+    event = FutureEvent()
+    waiter = asyncio.ensure_future(event.wait())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    event.set()
+    event.set()
+    await event.wait()
@@ -0,0 +1,157 @@
+import logging
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Message, Receive, Scope, Send
+
+from . import concurrency
+
+
+class SlowApp:
+    def __init__(self, request_duration: float = 0.05) -> None:
+        self.request_duration = request_duration
+        self.log: typing.List[str] = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "lifespan":
+            await concurrency.sleep(detect_concurrency_backend(), self.request_duration)
+            self.log.append("request done")
+            return
+
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        await send({"type": "lifespan.startup.complete"})
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.log.append("shutdown")
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+async def call(manager: LifespanManager, scope_type: str = "http") -> typing.Any:
+    sent: typing.List[Message] = []
+
+    async def receive() -> Message:
+        raise NotImplementedError  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    await manager.app({"type": scope_type}, receive, send)
+    return sent
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_drain_waits_for_requests() -> None:
+    app = SlowApp()
+    backend = detect_concurrency_backend()
+
+    async with backend.create_task_group() as task_group:
+        async with LifespanManager(app, drain_timeout=1) as manager:
+            task_group.start_soon(lambda: call(manager))
+            task_group.start_soon(lambda: call(manager, "websocket"))
+            await concurrency.sleep(backend, 0.01)
+            assert manager.in_flight == {"http": 1, "websocket": 1}
+
+    assert app.log == ["request done", "request done", "shutdown"]
+    assert manager.in_flight == {}
+    assert manager.drained == 2
+    assert manager.abandoned == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_drain_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    app = SlowApp(request_duration=0.2)
+    backend = detect_concurrency_backend()
+
+    async with backend.create_task_group() as task_group:
+        async with LifespanManager(app, drain_timeout=0.01) as manager:
+            task_group.start_soon(lambda: call(manager))
+            await concurrency.sleep(backend, 0.01)
+
+        assert app.log == ["shutdown"]
+        assert manager.drained == 0
+        assert manager.abandoned == 1
+
+    assert app.log == ["shutdown", "request done"]
+    assert "Shutting down with 1 request(s) still in flight." in caplog.text
+    assert caplog.records[0].levelno == logging.WARNING
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_drain_rejects_new_requests() -> None:
+    app = SlowApp()
+
+    async with LifespanManager(app, drain_timeout=1) as manager:
+        pass
+
+    sent = await call(manager)
+    assert sent[0]["type"] == "http.response.start"
+    assert sent[0]["status"] == 503
+    assert sent[1] == {"type": "http.response.body", "body": b"Service Unavailable"}
+
+    sent = await call(manager, "websocket")
+    assert sent == [{"type": "websocket.close", "code": 1013}]
+
+    with pytest.raises(RuntimeError):
+        await call(manager, "custom")
+
+    assert manager.rejected == 3
+    assert app.log == ["shutdown"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_no_drain_by_default(caplog: pytest.LogCaptureFixture) -> None:
+    app = SlowApp()
+    backend = detect_concurrency_backend()
+
+    async with backend.create_task_group() as task_group:
+        async with LifespanManager(app) as manager:
+            task_group.start_soon(lambda: call(manager))
+            await concurrency.sleep(backend, 0.01)
+
+    # Neither waited for nor reported, and requests are still let through.
+    assert app.log == ["shutdown", "request done"]
+    assert manager.abandoned == 0
+    assert caplog.records == []
+
+    assert await call(manager) == []
+    assert manager.rejected == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_max_in_flight() -> None:
+    app = SlowApp()
+    backend = detect_concurrency_backend()
+    responses: typing.List[typing.List[Message]] = []
+
+    async def request(manager: LifespanManager) -> None:
+        responses.append(await call(manager))
+
+    async with LifespanManager(app, max_in_flight={"http": 1}) as manager:
+        async with backend.create_task_group() as task_group:
+            task_group.start_soon(lambda: request(manager))
+            task_group.start_soon(lambda: request(manager))
+
+        assert manager.rejected == 1
+        assert sorted(len(sent) for sent in responses) == [0, 2]
+        assert app.log == ["request done"]
+
+        # Capacity is available again.
+        await call(manager)
+        assert manager.rejected == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_rejects_requests_while_exiting() -> None:
+    app = SlowApp()
+    manager = LifespanManager(app, lazy=True)
+
+    async with manager:
+        await call(manager)
+
+    sent = await call(manager)
+    assert sent[0]["status"] == 503
+    assert manager.cold_starts == 1
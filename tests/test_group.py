@@ -0,0 +1,224 @@
+import time
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanGroup
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import ASGIApp, Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+def make_app(
+    name: str,
+    log: typing.List[str],
+    startup_delay: float = 0.01,
+    shutdown_delay: float = 0.01,
+    startup_exception: typing.Optional[typing.Type[BaseException]] = None,
+    shutdown_exception: typing.Optional[typing.Type[BaseException]] = None,
+) -> ASGIApp:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "lifespan"
+        backend = detect_concurrency_backend()
+
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        log.append(f"{name}.startup")
+        await concurrency.sleep(backend, startup_delay)
+        if startup_exception is not None:
+            raise startup_exception()
+        log.append(f"{name}.startup.complete")
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        log.append(f"{name}.shutdown")
+        await concurrency.sleep(backend, shutdown_delay)
+        if shutdown_exception is not None:
+            raise shutdown_exception()
+        log.append(f"{name}.shutdown.complete")
+        await send({"type": "lifespan.shutdown.complete"})
+
+    return app
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_starts_layers_concurrently() -> None:
+    log: typing.List[str] = []
+    apps = {name: make_app(name, log) for name in ("db", "cache", "api")}
+
+    async with LifespanGroup(apps, starts_after={"api": ["db", "cache"]}) as group:
+        assert set(group.managers) == {"db", "cache", "api"}
+        # 'db' and 'cache' start together, 'api' only once both are up.
+        assert sorted(log[:2]) == ["cache.startup", "db.startup"]
+        assert sorted(log[2:4]) == ["cache.startup.complete", "db.startup.complete"]
+        assert log[4:] == ["api.startup", "api.startup.complete"]
+        log.clear()
+
+    # Reverse order on shutdown, dependencies last.
+    assert log[:2] == ["api.shutdown", "api.shutdown.complete"]
+    assert sorted(log[2:4]) == ["cache.shutdown", "db.shutdown"]
+    assert len(log) == 6
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_follows_critical_path() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "a": make_app("a", log, startup_delay=0.2, shutdown_delay=0.2),
+        "b": make_app("b", log, startup_delay=0.1, shutdown_delay=0.1),
+        "c": make_app("c", log, startup_delay=0.1, shutdown_delay=0.1),
+    }
+    group = LifespanGroup(apps, starts_after={"c": ["b"]})
+
+    # Waiting for 'a' and 'b' before starting 'c' would take 0.3s.
+    start = time.perf_counter()
+    await group.__aenter__()
+    assert time.perf_counter() - start < 0.28
+    assert log.index("c.startup") < log.index("a.startup.complete")
+    log.clear()
+
+    # Same on shutdown: 'b' doesn't wait for 'a' once 'c' is down.
+    start = time.perf_counter()
+    await group.__aexit__()
+    assert time.perf_counter() - start < 0.28
+    assert log.index("b.shutdown") < log.index("a.shutdown.complete")
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_startup_failure_shuts_down_started_apps() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "db": make_app("db", log),
+        "api": make_app("api", log, startup_exception=StartupFailed),
+    }
+
+    with pytest.raises(StartupFailed):
+        async with LifespanGroup(apps, starts_after={"api": ["db"]}):
+            pass  # pragma: no cover
+
+    assert log == [
+        "db.startup",
+        "db.startup.complete",
+        "api.startup",
+        "db.shutdown",
+        "db.shutdown.complete",
+    ]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_dependents_of_failed_app_do_not_start() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "slow": make_app("slow", log, startup_delay=0.05),
+        "db": make_app("db", log, startup_exception=StartupFailed),
+        "api": make_app("api", log),
+    }
+
+    with pytest.raises(StartupFailed):
+        async with LifespanGroup(apps, starts_after={"api": ["db"]}):
+            pass  # pragma: no cover
+
+    assert "api.startup" not in log
+    assert log[-2:] == ["slow.shutdown", "slow.shutdown.complete"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_closing_does_not_start_dependents() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "x": make_app("x", log, startup_exception=StartupFailed),
+        "a": make_app("a", log, startup_delay=0.05),
+        "b": make_app("b", log),
+    }
+
+    with pytest.raises(StartupFailed):
+        async with LifespanGroup(apps, starts_after={"b": ["a"]}):
+            pass  # pragma: no cover
+
+    # 'a' completed startup while the group was closing.
+    assert "b.startup" not in log
+    assert log[-2:] == ["a.shutdown", "a.shutdown.complete"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_startup_timeout() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "a": make_app("a", log, startup_delay=0.03),
+        "b": make_app("b", log, startup_delay=0.03),
+    }
+
+    # Each app starts within the timeout, but not both in a row.
+    with pytest.raises(TimeoutError):
+        async with LifespanGroup(apps, starts_after={"b": ["a"]}, startup_timeout=0.04):
+            pass  # pragma: no cover
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_shutdown_timeout() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "a": make_app("a", log, shutdown_delay=0.03),
+        "b": make_app("b", log, shutdown_delay=0.03),
+    }
+
+    with pytest.raises(TimeoutError):
+        async with LifespanGroup(
+            apps, starts_after={"b": ["a"]}, shutdown_timeout=0.04
+        ):
+            pass
+
+    assert "a.shutdown.complete" not in log
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_shutdown_failure() -> None:
+    log: typing.List[str] = []
+    apps = {
+        "a": make_app("a", log, shutdown_exception=ShutdownFailed),
+        "b": make_app("b", log),
+    }
+
+    with pytest.raises(ShutdownFailed):
+        async with LifespanGroup(apps, starts_after={"b": ["a"]}):
+            pass
+
+    assert log[-2:] == ["b.shutdown.complete", "a.shutdown"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_group_body_exception() -> None:
+    log: typing.List[str] = []
+    apps = {"a": make_app("a", log)}
+
+    with pytest.raises(RuntimeError):
+        async with LifespanGroup(apps):
+            raise RuntimeError()
+
+    assert log == ["a.startup", "a.startup.complete"]
+
+
+@pytest.mark.parametrize(
+    "starts_after, match",
+    [
+        ({"a": ["b"], "b": ["a"]}, "cycle"),
+        ({"a": ["unknown"]}, "unknown apps"),
+        ({"unknown": ["a"]}, "Unknown app"),
+    ],
+)
+def test_group_invalid_dependencies(
+    starts_after: typing.Dict[str, typing.List[str]], match: str
+) -> None:
+    apps = {"a": make_app("a", []), "b": make_app("b", [])}
+    with pytest.raises(ValueError, match=match):
+        LifespanGroup(apps, starts_after=starts_after)
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import typing
+
+import pytest
+
+import asgi_lifespan
+
+# Only imported once used.
+LAZY_MODULES = [
+    "anyio",
+    "asgi_lifespan._concurrency.asyncio",
+    "asgi_lifespan._prefork",
+    "asgi_lifespan._sync",
+    "asyncio",
+    "pickle",
+    "sniffio",
+    "tracemalloc",
+    "trio",
+]
+
+IMPORT = """
+import sys
+
+from asgi_lifespan import LifespanManager
+print(*sys.modules)
+"""
+
+
+def imported_modules() -> typing.List[str]:
+    return subprocess.run(
+        [sys.executable, "-c", IMPORT], check=True, capture_output=True, text=True
+    ).stdout.split()
+
+
+def test_lazy_imports() -> None:
+    modules = imported_modules()
+
+    for module in LAZY_MODULES:
+        assert module not in modules
+
+
+def test_lazy_exports() -> None:
+    assert asgi_lifespan.run_prefork.__name__ == "run_prefork"
+    assert set(asgi_lifespan.__all__) <= set(dir(asgi_lifespan))
+
+    with pytest.raises(AttributeError):
+        asgi_lifespan.unknown
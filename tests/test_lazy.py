@@ -0,0 +1,194 @@
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Message, Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class BodyFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class LazyApp:
+    def __init__(self, fail_startup: bool = False, fail_shutdown: bool = False) -> None:
+        self.startups = 0
+        self.shutdowns = 0
+        self.requests = 0
+        self.fail_startup = fail_startup
+        self.fail_shutdown = fail_shutdown
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            assert scope["state"]["startups"] == self.startups
+            self.requests += 1
+            return
+
+        assert scope["type"] == "lifespan"
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        self.startups += 1
+        await concurrency.sleep(detect_concurrency_backend(), 0.01)
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"]["startups"] = self.startups
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.shutdowns += 1
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+async def request(manager: LifespanManager) -> None:
+    async def receive() -> Message:
+        raise NotImplementedError  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        pass  # pragma: no cover
+
+    await manager.app({"type": "http"}, receive, send)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_without_requests() -> None:
+    app = LazyApp()
+
+    async with LifespanManager(app, lazy=True) as manager:
+        pass
+
+    assert app.startups == 0
+    assert app.shutdowns == 0
+    assert manager.cold_starts == 0
+    assert manager.cold_start_latency is None
+    assert manager.time_to_first_request is None
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_concurrent_first_requests_share_startup() -> None:
+    app = LazyApp()
+    backend = detect_concurrency_backend()
+
+    async with LifespanManager(app, lazy=True) as manager:
+        assert app.startups == 0
+        async with backend.create_task_group() as task_group:
+            for _ in range(3):
+                task_group.start_soon(lambda: request(manager))
+        await request(manager)
+
+        assert app.startups == 1
+        assert app.requests == 4
+        assert manager.cold_starts == 1
+        assert manager.cold_start_latency is not None
+        assert manager.cold_start_latency >= 0.01
+        assert manager.time_to_first_request is not None
+        assert manager.time_to_first_request >= manager.cold_start_latency
+        assert app.shutdowns == 0
+
+    assert app.shutdowns == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_idle_timeout() -> None:
+    app = LazyApp()
+    backend = detect_concurrency_backend()
+
+    async with LifespanManager(app, lazy=True, idle_timeout=0.05) as manager:
+        await request(manager)
+        await concurrency.sleep(backend, 0.02)
+        await request(manager)
+        assert app.shutdowns == 0
+
+        await concurrency.sleep(backend, 0.15)
+        assert app.shutdowns == 1
+
+        await request(manager)
+        assert app.startups == 2
+        assert manager.cold_starts == 2
+
+    assert app.shutdowns == 2
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_startup_failed() -> None:
+    app = LazyApp(fail_startup=True)
+
+    async def failing_request(manager: LifespanManager) -> None:
+        with pytest.raises(StartupFailed):
+            await request(manager)
+
+    async with LifespanManager(app, lazy=True) as manager:
+        async with detect_concurrency_backend().create_task_group() as task_group:
+            task_group.start_soon(lambda: failing_request(manager))
+            task_group.start_soon(lambda: failing_request(manager))
+        assert app.startups == 1
+        assert manager.cold_starts == 0
+
+        # Startup is attempted again by the next request.
+        await failing_request(manager)
+        assert app.startups == 2
+
+    assert app.requests == 0
+    assert app.shutdowns == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_shutdown_failed() -> None:
+    app = LazyApp(fail_shutdown=True)
+
+    with pytest.raises(ShutdownFailed):
+        async with LifespanManager(app, lazy=True) as manager:
+            await request(manager)
+
+    assert app.shutdowns == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_body_failed() -> None:
+    app = LazyApp()
+
+    with pytest.raises(BodyFailed):
+        async with LifespanManager(app, lazy=True) as manager:
+            await request(manager)
+            raise BodyFailed()
+
+    assert app.startups == 1
+    assert app.shutdowns == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lazy_lifespan_scope_passes_through() -> None:
+    app = LazyApp()
+    manager = LifespanManager(app, lazy=True)
+    messages: typing.List[Message] = [
+        {"type": "lifespan.startup"},
+        {"type": "lifespan.shutdown"},
+    ]
+    sent: typing.List[Message] = []
+
+    async def receive() -> Message:
+        return messages.pop(0)
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    async with manager:
+        await manager.app({"type": "lifespan"}, receive, send)
+
+    assert [message["type"] for message in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
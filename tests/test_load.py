@@ -0,0 +1,155 @@
+import contextlib
+import math
+import typing
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+from asgi_lifespan import LifespanManager, run_load
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Receive, Scope, Send
+
+from . import concurrency
+
+
+def create_app() -> Starlette:
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> typing.AsyncIterator[dict]:
+        yield {"greeting": "Hello"}
+
+    async def home(request: Request) -> Response:
+        return PlainTextResponse(f"{request.state.greeting}, world!")
+
+    async def echo(request: Request) -> Response:
+        return PlainTextResponse(await request.body())
+
+    async def fail(request: Request) -> Response:
+        raise RuntimeError("Oops")
+
+    return Starlette(
+        routes=[
+            Route("/", home),
+            Route("/echo", echo, methods=["POST"]),
+            Route("/fail", fail),
+        ],
+        lifespan=lifespan,
+    )
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load() -> None:
+    async with LifespanManager(create_app()) as manager:
+        report = await run_load(manager.app, requests=50, concurrency=5)
+
+    assert report.requests == 50
+    assert report.errors == 0
+    assert report.statuses == {200: 50}
+    assert report.body_size == 50 * len(b"Hello, world!")
+    assert len(report.latencies) == 50
+    assert report.throughput > 0
+    percentiles = report.percentiles()
+    assert list(percentiles) == ["p50", "p90", "p99", "p99.9"]
+    assert 0 < percentiles["p50"] <= percentiles["p99.9"] == max(report.latencies)
+    assert "requests=50" in repr(report)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_scopes() -> None:
+    body = b"x" * 1000
+    async with LifespanManager(create_app()) as manager:
+        report = await run_load(
+            manager.app,
+            scopes=[
+                {"type": "http", "path": "/echo", "method": "POST"},
+                {"type": "http", "path": "/fail"},
+            ],
+            requests=6,
+            body=body,
+        )
+
+    # Starlette turns the exception into a 500 response, then re-raises it.
+    assert report.requests == 3
+    assert report.errors == 3
+    assert report.statuses == {200: 3}
+    assert report.body_size == 3 * len(body)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_disconnect_after_response() -> None:
+    backend = detect_concurrency_backend()
+    events: typing.List[str] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await receive()
+
+        async def listen_for_disconnect() -> None:
+            message = await receive()
+            events.append(message["type"])
+
+        async with backend.create_task_group() as task_group:
+            task_group.start_soon(listen_for_disconnect)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for _ in range(3):
+                await send(
+                    {"type": "http.response.body", "body": b"chunk", "more_body": True}
+                )
+                await concurrency.sleep(backend, 0.001)
+                events.append("chunk")
+            await send({"type": "http.response.body", "body": b""})
+
+        # Receiving after the response is complete doesn't wait.
+        events.append((await receive())["type"])
+
+    report = await run_load(app, requests=1)
+    assert report.body_size == 3 * len(b"chunk")
+    assert events == ["chunk"] * 3 + ["http.disconnect"] * 2
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_open_loop() -> None:
+    backend = detect_concurrency_backend()
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await concurrency.sleep(backend, 0.02)
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    report = await run_load(app, requests=10, rate=1000, concurrency=1)
+
+    assert report.requests == 10
+    assert report.statuses == {204: 10}
+    # Requests overlap, even though concurrency is 1.
+    assert report.duration < 10 * 0.02
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_duration() -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": True})
+        await send({"type": "http.response.body", "body": b"OK"})
+
+    report = await run_load(app, duration=0.05)
+    assert report.requests > 0
+    assert 0.05 <= report.duration < 1
+
+    report = await run_load(app, duration=0.05, rate=100)
+    assert 0 < report.requests <= 5
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_no_requests() -> None:
+    report = await run_load(create_app(), requests=0)
+    assert report.requests == 0
+    assert math.isnan(report.percentiles()["p50"])
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_run_load_invalid() -> None:
+    with pytest.raises(ValueError):
+        await run_load(create_app(), concurrency=0)
+    with pytest.raises(ValueError):
+        await run_load(create_app(), scopes=[{"type": "websocket"}])
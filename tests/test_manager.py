@@ -1,4 +1,8 @@
+import asyncio
 import contextlib
+import logging
+import sys
+import time
 import typing
 
 import httpx as httpx
@@ -8,12 +12,13 @@ from starlette.requests import Request
 from starlette.responses import PlainTextResponse, Response
 from starlette.routing import Route, Router
 
-from asgi_lifespan import LifespanManager, LifespanNotSupported
+from asgi_lifespan import LifespanManager, LifespanNotSupported, LifespanTimeout
 from asgi_lifespan._concurrency import detect_concurrency_backend
 from asgi_lifespan._types import ASGIApp, Message, Receive, Scope, Send
 
 from . import concurrency
 from .compat import ExceptionGroup
+from .concurrency import skip_if_unsupported
 
 
 class StartupFailed(Exception):
@@ -32,12 +37,16 @@ class ShutdownFailed(Exception):
 @pytest.mark.parametrize("startup_exception", (None, StartupFailed))
 @pytest.mark.parametrize("body_exception", (None, BodyFailed))
 @pytest.mark.parametrize("shutdown_exception", (None, ShutdownFailed))
+@pytest.mark.parametrize("backend", (None, "asyncio-eager", "anyio"))
 async def test_lifespan_manager(
     concurrency: str,
+    backend: typing.Optional[str],
     startup_exception: typing.Optional[typing.Type[BaseException]],
     body_exception: typing.Optional[typing.Type[BaseException]],
     shutdown_exception: typing.Optional[typing.Type[BaseException]],
 ) -> None:
+    skip_if_unsupported(concurrency, backend)
+
     # Setup failing event handlers.
 
     on_startup: list = []
@@ -98,7 +107,7 @@ async def test_lifespan_manager(
         elif shutdown_exception is not None:
             stack.enter_context(pytest.raises(shutdown_exception))
 
-        async with LifespanManager(app):
+        async with LifespanManager(app, backend=backend):
             # NOTE: this block should not execute in case of startup exception.
             assert not startup_exception
             assert received_lifespan_events == ["lifespan.startup"]
@@ -165,6 +174,113 @@ async def test_lifespan_timeout(app: typing.Callable) -> None:
             pass
 
 
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize(
+    "app, phase", [(slow_startup, "startup"), (slow_shutdown, "shutdown")]
+)
+async def test_lifespan_timeout_captures_app_stack(
+    app: typing.Callable, phase: str
+) -> None:
+    with pytest.raises(LifespanTimeout) as ctx:
+        async with LifespanManager(app, startup_timeout=0.01, shutdown_timeout=0.01):
+            pass
+
+    exc = ctx.value
+    assert exc.phase == phase
+    assert exc.timeout == 0.01
+    assert exc.elapsed >= 0.01
+    assert app.__name__ in [frame.name for frame in exc.stack]
+    assert f"Application {phase} timed out" in str(exc)
+    assert app.__name__ in str(exc)
+
+
+async def startup_without_complete(scope: Scope, receive: Receive, send: Send) -> None:
+    await receive()
+    # Return without sending 'lifespan.startup.complete'...
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lifespan_timeout_app_returned() -> None:
+    with pytest.raises(LifespanTimeout) as ctx:
+        async with LifespanManager(startup_without_complete, startup_timeout=0.2):
+            pass  # pragma: no cover
+
+    assert not ctx.value.stack
+    assert str(ctx.value) == "Application startup timed out after {:.3f}s.".format(
+        ctx.value.elapsed
+    )
+
+
+async def delayed_startup(scope: Scope, receive: Receive, send: Send) -> None:
+    concurrency_backend = detect_concurrency_backend()
+    message = await receive()
+    assert message["type"] == "lifespan.startup"
+    await concurrency.sleep(concurrency_backend, 0.05)
+    await send({"type": "lifespan.startup.complete"})
+
+    message = await receive()
+    assert message["type"] == "lifespan.shutdown"
+    await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lifespan_watchdog(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.WARNING, logger="asgi_lifespan")
+
+    async with LifespanManager(
+        delayed_startup, startup_timeout=None, watchdog=0.01, watchdog_interval=0.01
+    ):
+        pass
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) >= 2
+    assert all("Application startup still running" in m for m in messages)
+    assert all("delayed_startup" in m for m in messages)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lifespan_watchdog_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.WARNING, logger="asgi_lifespan")
+
+    with pytest.raises(LifespanTimeout) as ctx:
+        async with LifespanManager(
+            delayed_startup, startup_timeout=0.025, watchdog=0.01
+        ):
+            pass  # pragma: no cover
+
+    assert ctx.value.elapsed < 0.05
+    assert 1 <= len(caplog.records) <= 2
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_lifespan_watchdog_fires_just_before_timeout() -> None:
+    events: typing.List[str] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await receive()
+        await concurrency.sleep(detect_concurrency_backend(), 1)
+        events.append("startup.complete")  # pragma: no cover
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            events.append("watchdog")
+            # Logging the first warning takes the wait past the timeout.
+            time.sleep(0.1)
+
+    handler = SlowHandler()
+    logger = logging.getLogger("asgi_lifespan")
+    logger.addHandler(handler)
+    try:
+        with pytest.raises(LifespanTimeout):
+            async with LifespanManager(app, startup_timeout=0.1, watchdog=0.05):
+                pass  # pragma: no cover
+        events.append("timeout")
+    finally:
+        logger.removeHandler(handler)
+
+    assert events == ["watchdog", "timeout"]
+
+
 @pytest.mark.usefixtures("concurrency")
 @pytest.mark.parametrize("app", [slow_startup, slow_shutdown])
 async def test_lifespan_no_timeout(app: typing.Callable) -> None:
@@ -246,3 +362,39 @@ async def test_lifespan_state_async_cm() -> None:
             response = await client.get("/get")
             assert response.status_code == 200
             assert response.text == "Hello 2"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "backend, expected",
+    [
+        (None, 3 if sys.version_info < (3, 12) else 2),
+        ("asyncio-eager", 2 if sys.version_info < (3, 12) else 0),
+    ],
+)
+async def test_startup_loop_iterations(
+    backend: typing.Optional[str], expected: int
+) -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await receive()
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        await send({"type": "lifespan.shutdown.complete"})
+
+    loop = asyncio.get_running_loop()
+    iterations = 0
+    run_once = loop._run_once  # type: ignore
+
+    def counting_run_once() -> None:
+        nonlocal iterations
+        iterations += 1
+        run_once()
+
+    manager = LifespanManager(app, backend=backend)
+    loop._run_once = counting_run_once  # type: ignore
+    try:
+        await manager.__aenter__()
+        assert iterations == expected
+    finally:
+        del loop._run_once  # type: ignore
+    await manager.__aexit__(None, None, None)
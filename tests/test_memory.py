@@ -0,0 +1,136 @@
+import logging
+import tracemalloc
+import typing
+import weakref
+
+import pytest
+
+from asgi_lifespan import LifespanManager, MemoryDiagnostics
+from asgi_lifespan._types import Receive, Scope, Send
+
+MODEL_SIZE = 1 << 20
+
+# Where leaking apps put their state.
+leaks: typing.List[typing.Any] = []
+
+
+class Model:
+    def __init__(self) -> None:
+        self.weights = bytearray(MODEL_SIZE)
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class App:
+    def __init__(self, leak: bool = False, fail_shutdown: bool = False) -> None:
+        self.leak = leak
+        self.fail_shutdown = fail_shutdown
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await receive()
+        # Kept across restarts if the state is.
+        model = scope["state"].setdefault("model", Model())
+        scope["state"]["name"] = "model"  # Can't be tracked.
+        if self.leak:
+            leaks.append(model)
+        del model
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.fixture
+def diagnostics() -> typing.Iterator[MemoryDiagnostics]:
+    diagnostics = MemoryDiagnostics()
+    yield diagnostics
+    diagnostics.close()
+    leaks.clear()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_diagnostics(diagnostics: MemoryDiagnostics) -> None:
+    manager = LifespanManager(App(), diagnostics=diagnostics)
+
+    for _ in range(2):
+        async with manager:
+            assert tracemalloc.is_tracing()
+        # The state was released.
+        assert manager._state == {}
+
+    assert [report.cycle for report in diagnostics.reports] == [1, 2]
+    for report in diagnostics.reports:
+        assert report.startup_bytes >= MODEL_SIZE
+        assert report.shutdown_bytes >= MODEL_SIZE
+        assert report.retained_bytes < MODEL_SIZE / 2
+        assert report.leaked == []
+    assert diagnostics.leaked == []
+    assert diagnostics.retained_bytes < MODEL_SIZE
+
+    diagnostics.close()
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_diagnostics_leak(
+    diagnostics: MemoryDiagnostics, caplog: pytest.LogCaptureFixture
+) -> None:
+    async with LifespanManager(App(leak=True), diagnostics=diagnostics):
+        pass
+
+    (report,) = diagnostics.reports
+    assert report.leaked == ["model"]
+    assert diagnostics.leaked == ["model"]
+    assert report.retained_bytes >= MODEL_SIZE
+    # Attributed to the line that allocated the model.
+    top = report.top_retained[0]
+    assert top.size_diff >= MODEL_SIZE
+    assert top.traceback[0].filename == __file__
+    assert "cycle=1" in repr(report)
+
+    assert "Lifespan state values still alive after shutdown: model." in caplog.text
+    assert caplog.records[0].levelno == logging.WARNING
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("clear_state", [True, False])
+async def test_diagnostics_restart(
+    diagnostics: MemoryDiagnostics, clear_state: bool
+) -> None:
+    async with LifespanManager(App(), diagnostics=diagnostics) as manager:
+        model = weakref.ref(manager._state["model"])
+        await manager.restart(clear_state=clear_state)
+        # Values kept in the state on purpose are not leaks.
+        assert (manager._state["model"] is model()) is not clear_state
+
+    assert len(diagnostics.reports) == 2
+    assert diagnostics.leaked == []
+
+
+def test_diagnostics_already_tracing() -> None:
+    tracemalloc.start()
+    try:
+        diagnostics = MemoryDiagnostics()
+        diagnostics.before_startup()
+        diagnostics.close()
+        # Someone else started tracing.
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_exit_releases_references() -> None:
+    manager = LifespanManager(App(fail_shutdown=True))
+
+    with pytest.raises(ShutdownFailed):
+        async with manager:
+            pass
+
+    assert manager._app_exception is None
+    assert manager._background is None
+    # Without diagnostics, the state is kept until the next startup.
+    assert "model" in manager._state
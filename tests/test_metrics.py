@@ -0,0 +1,137 @@
+import pathlib
+import typing
+
+import pytest
+
+from asgi_lifespan import (
+    InMemoryMetrics,
+    LifespanManager,
+    LifespanNotSupported,
+    MetricsCollector,
+)
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+def make_app(
+    startup: typing.Optional[str] = None, shutdown: typing.Optional[str] = None
+) -> typing.Callable:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        backend = detect_concurrency_backend()
+        await receive()
+        if startup == "fail":
+            raise StartupFailed()
+        if startup == "hang":
+            await concurrency.sleep(backend, 1)
+        await send({"type": "lifespan.startup.complete"})
+        await receive()
+        if shutdown == "fail":
+            raise ShutdownFailed()
+        if shutdown == "hang":
+            await concurrency.sleep(backend, 1)
+        await send({"type": "lifespan.shutdown.complete"})
+
+    return app
+
+
+async def not_supported(scope: Scope, receive: Receive, send: Send) -> None:
+    assert scope["type"] == "http"
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_metrics() -> None:
+    metrics = InMemoryMetrics()
+
+    async with LifespanManager(make_app(), metrics=metrics):
+        assert metrics.live == 1
+        async with LifespanManager(make_app(), metrics=metrics) as manager:
+            assert metrics.live == 2
+            await manager.restart()
+            assert metrics.live == 2
+    assert metrics.live == 0
+
+    with pytest.raises(StartupFailed):
+        async with LifespanManager(make_app(startup="fail"), metrics=metrics):
+            pass  # pragma: no cover
+    with pytest.raises(TimeoutError):
+        async with LifespanManager(
+            make_app(startup="hang"), startup_timeout=0.01, metrics=metrics
+        ):
+            pass  # pragma: no cover
+    with pytest.raises(ShutdownFailed):
+        async with LifespanManager(make_app(shutdown="fail"), metrics=metrics):
+            pass
+    with pytest.raises(TimeoutError):
+        async with LifespanManager(
+            make_app(shutdown="hang"), shutdown_timeout=0.01, metrics=metrics
+        ):
+            pass
+    with pytest.raises(LifespanNotSupported):
+        async with LifespanManager(not_supported, metrics=metrics):
+            pass  # pragma: no cover
+    with pytest.raises(StartupFailed):
+        # Shutdown is skipped, but the app is not live anymore.
+        async with LifespanManager(make_app(), metrics=metrics):
+            raise StartupFailed()
+
+    assert metrics.live == 0
+    assert {key: count for key, count in metrics.cycles.items() if count} == {
+        ("startup", "completed"): 6,
+        ("startup", "failed"): 1,
+        ("startup", "timeout"): 1,
+        ("startup", "not_supported"): 1,
+        ("shutdown", "completed"): 3,
+        ("shutdown", "failed"): 1,
+        ("shutdown", "timeout"): 1,
+    }
+    assert metrics.durations["startup"].count == 9
+    assert metrics.durations["shutdown"].count == 5
+    assert metrics.durations["startup"].sum >= 0.01
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_metrics_collector_is_a_no_op() -> None:
+    async with LifespanManager(make_app(), metrics=MetricsCollector()):
+        pass
+
+
+def test_metrics_prometheus(tmp_path: pathlib.Path) -> None:
+    metrics = InMemoryMetrics(buckets=[0.1, 1])
+    metrics.on_startup("completed", 0.05)
+    metrics.on_startup("completed", 0.5)
+    metrics.on_startup("timeout", 5)
+    metrics.on_shutdown("completed", 0.1)
+    metrics.on_stopped()
+
+    text = metrics.to_prometheus(prefix="app")
+    lines = text.splitlines()
+    assert "# TYPE app_cycles_total counter" in lines
+    assert 'app_cycles_total{phase="startup",outcome="completed"} 2' in lines
+    assert 'app_cycles_total{phase="startup",outcome="timeout"} 1' in lines
+    assert 'app_cycles_total{phase="shutdown",outcome="failed"} 0' in lines
+    assert "# TYPE app_duration_seconds histogram" in lines
+    assert 'app_duration_seconds_bucket{phase="startup",le="0.1"} 1' in lines
+    assert 'app_duration_seconds_bucket{phase="startup",le="1.0"} 2' in lines
+    assert 'app_duration_seconds_bucket{phase="startup",le="+Inf"} 3' in lines
+    assert 'app_duration_seconds_sum{phase="startup"} 5.55' in lines
+    assert 'app_duration_seconds_count{phase="startup"} 3' in lines
+    # Bounds are inclusive.
+    assert 'app_duration_seconds_bucket{phase="shutdown",le="0.1"} 1' in lines
+    assert "# TYPE app_live_apps gauge" in lines
+    assert "app_live_apps 1" in lines
+    assert text.endswith("\n")
+
+    path = tmp_path / "lifespan.prom"
+    metrics.write_prometheus(path, prefix="app")
+    assert path.read_text() == text
+    assert [p.name for p in tmp_path.iterdir()] == ["lifespan.prom"]
@@ -0,0 +1,185 @@
+import pytest
+
+from asgi_lifespan import LifespanPool
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._pool import BasePool
+from asgi_lifespan._types import Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class CountingApp:
+    def __init__(self, fail_startup: bool = False, fail_shutdown: bool = False) -> None:
+        self.startups = 0
+        self.shutdowns = 0
+        self.fail_startup = fail_startup
+        self.fail_shutdown = fail_shutdown
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "lifespan"
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        self.startups += 1
+        await concurrency.sleep(detect_concurrency_backend(), 0.01)
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"]["startups"] = self.startups
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.shutdowns += 1
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_reuses_started_app() -> None:
+    app = CountingApp()
+
+    async with LifespanPool() as pool:
+        async with pool.acquire(app) as first:
+            assert app.startups == 1
+            async with pool.acquire(app) as second:
+                assert second is first
+
+        async with pool.acquire(app) as third:
+            assert third is first
+            assert third._state == {"startups": 1}
+
+        assert app.startups == 1
+        assert app.shutdowns == 0
+        assert len(pool) == 1
+        assert pool.misses == 1
+        assert pool.hits == 2
+        assert pool.startup_time_saved > 0
+
+    assert app.shutdowns == 1
+    assert len(pool) == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_concurrent_acquire_shares_startup() -> None:
+    app = CountingApp()
+    managers: list = []
+
+    async with LifespanPool() as pool:
+
+        async def use() -> None:
+            async with pool.acquire(app) as manager:
+                managers.append(manager)
+
+        backend = detect_concurrency_backend()
+        async with backend.create_task_group() as task_group:
+            for _ in range(5):
+                task_group.start_soon(use)
+
+    assert app.startups == 1
+    assert app.shutdowns == 1
+    assert len(managers) == 5
+    assert all(manager is managers[0] for manager in managers)
+    assert pool.misses == 1
+    assert pool.hits == 4
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_lru_eviction() -> None:
+    apps = [CountingApp() for _ in range(3)]
+
+    async with LifespanPool(max_size=2) as pool:
+        for app in apps:
+            async with pool.acquire(app):
+                pass
+
+        assert len(pool) == 2
+        assert pool.evictions == 1
+
+        await concurrency.sleep(detect_concurrency_backend(), 0.01)
+        assert [app.shutdowns for app in apps] == [1, 0, 0]
+
+        # Busy entries are never evicted.
+        async with pool.acquire(apps[1]), pool.acquire(apps[2]):
+            async with pool.acquire(apps[0]):
+                assert len(pool) == 3
+        assert len(pool) == 2
+
+    assert [app.startups for app in apps] == [2, 1, 1]
+    assert [app.shutdowns for app in apps] == [2, 1, 1]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_keeps_idle_entries_within_max_size() -> None:
+    apps = [CountingApp() for _ in range(2)]
+
+    async with LifespanPool(max_size=3) as pool:
+        for app in apps:
+            async with pool.acquire(app):
+                pass
+
+        assert len(pool) == 2
+        assert pool.evictions == 0
+        assert [app.shutdowns for app in apps] == [0, 0]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_idle_ttl() -> None:
+    app = CountingApp()
+    backend = detect_concurrency_backend()
+
+    async with LifespanPool(idle_ttl=0.2) as pool:
+        async with pool.acquire(app):
+            pass
+        await concurrency.sleep(backend, 0.1)
+
+        # Reusing the app re-arms the idle timer.
+        async with pool.acquire(app):
+            pass
+        await concurrency.sleep(backend, 0.1)
+        assert app.shutdowns == 0
+        assert len(pool) == 1
+
+        # Expires some time after 0.2s since the last use.
+        for _ in range(100):
+            if app.shutdowns:
+                break
+            await concurrency.sleep(backend, 0.01)
+        assert app.shutdowns == 1
+        assert len(pool) == 0
+        assert pool.evictions == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_startup_failure() -> None:
+    app = CountingApp(fail_startup=True)
+
+    async with LifespanPool() as pool:
+        with pytest.raises(StartupFailed):
+            async with pool.acquire(app):
+                pass  # pragma: no cover
+        assert len(pool) == 0
+        assert pool.misses == 1
+        assert pool.failed_starts == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_pool_shutdown_failure() -> None:
+    app = CountingApp(fail_shutdown=True)
+
+    with pytest.raises(ShutdownFailed):
+        async with LifespanPool() as pool:
+            async with pool.acquire(app):
+                pass
+
+
+def test_base_pool_needs_eviction_policy() -> None:
+    with pytest.raises(TypeError):
+        BasePool()  # type: ignore
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import pathlib
+import signal
+import time
+import typing
+
+import pytest
+
+from asgi_lifespan import run_prefork
+from asgi_lifespan._types import ASGIApp, Receive, Scope, Send
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork()")
+
+
+def make_app(log: pathlib.Path) -> ASGIApp:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "lifespan"
+
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        with log.open("a") as f:
+            f.write(f"startup {os.getpid()}\n")
+        scope["state"]["data"] = list(range(1000))
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        with log.open("a") as f:
+            f.write(f"shutdown {os.getpid()}\n")
+        await send({"type": "lifespan.shutdown.complete"})
+
+    return app
+
+
+def test_prefork(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "log.txt"
+
+    async def worker(app: ASGIApp) -> None:  # pragma: no cover
+        # Runs in workers, which coverage does not track.
+        # The lifespan-only app rejects the request, but not before the
+        # lifespan state was injected into the scope.
+        scope: Scope = {"type": "http"}
+
+        async def receive() -> dict:
+            raise NotImplementedError
+
+        async def send(message: typing.MutableMapping[str, typing.Any]) -> None:
+            raise NotImplementedError
+
+        try:
+            await app(scope, receive, send)
+        except AssertionError:
+            pass
+
+        with log.open("a") as f:
+            f.write(f"worker {os.getpid()} {len(scope['state']['data'])}\n")
+
+    exit_codes = run_prefork(make_app(log), worker, workers=3)
+
+    assert exit_codes == [0, 0, 0]
+
+    lines = log.read_text().splitlines()
+    assert lines[0] == f"startup {os.getpid()}"
+    assert len(lines) == 5
+    assert all(
+        line.startswith("worker ") and line.endswith(" 1000") for line in lines[1:4]
+    )
+    assert len({line.split()[1] for line in lines[1:4]}) == 3
+    # Shut down in the parent, once workers are done.
+    assert lines[4] == f"shutdown {os.getpid()}"
+
+
+def test_prefork_worker_failures(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "log.txt"
+    counter = {"workers": 0}
+
+    async def worker(app: ASGIApp) -> None:  # pragma: no cover
+        # Each worker inherits the counter as it was at fork time.
+        if counter["workers"] == 1:
+            raise RuntimeError("Worker failed")
+        os.kill(os.getpid(), signal.SIGKILL)
+
+    def fork() -> int:
+        counter["workers"] += 1
+        return real_fork()
+
+    real_fork = os.fork
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(os, "fork", fork)
+        exit_codes = run_prefork(make_app(log), worker, workers=2)
+
+    assert exit_codes == [1, -signal.SIGKILL]
+    assert log.read_text().splitlines()[-1] == f"shutdown {os.getpid()}"
+
+
+def test_prefork_interrupted(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "log.txt"
+
+    async def worker(app: ASGIApp) -> None:  # pragma: no cover
+        with log.open("a") as f:
+            f.write("worker\n")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            with log.open("a") as f:
+                f.write("drained\n")
+            raise
+
+    real_waitpid = os.waitpid
+    interrupted: typing.List[int] = []
+
+    def waitpid(pid: int, options: int) -> typing.Tuple[int, int]:
+        if not interrupted:
+            interrupted.append(pid)
+            while log.read_text().count("worker") < 2:
+                time.sleep(0.01)
+            raise KeyboardInterrupt
+        return real_waitpid(pid, options)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(os, "waitpid", waitpid)
+        with pytest.raises(KeyboardInterrupt):
+            run_prefork(make_app(log), worker, workers=2)
+
+    # Workers were asked to stop, and drained before exiting.
+    lines = log.read_text().splitlines()
+    assert lines.count("drained") == 2
+    # As with 'LifespanManager', no shutdown is performed on error.
+    assert not any(line.startswith("shutdown") for line in lines)
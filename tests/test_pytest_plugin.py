@@ -0,0 +1,166 @@
+import textwrap
+import typing
+
+import pytest
+
+APP = """
+events = []
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http":
+        await receive()
+        body = scope["state"]["greeting"].encode()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    await receive()
+    events.append("startup")
+    scope["state"]["greeting"] = "Hello, world!"
+    await send({"type": "lifespan.startup.complete"})
+    await receive()
+    events.append("shutdown")
+    await send({"type": "lifespan.shutdown.complete"})
+"""
+
+TESTS = """
+import pytest
+
+from myapp import events
+
+
+async def get(app):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({"type": "http"}, receive, send)
+    return messages[-1]["body"]
+
+
+@pytest.mark.asyncio
+async def test_asyncio(lifespan):
+    assert await get(lifespan.app) == b"Hello, world!"
+    assert lifespan.state["greeting"] == "Hello, world!"
+
+
+@pytest.mark.trio
+async def test_trio(lifespan):
+    assert await get(lifespan.app) == b"Hello, world!"
+
+
+def test_sync(lifespan):
+    assert lifespan.worker_id == "master"
+    print("startups:", events.count("startup"))
+"""
+
+
+def run(
+    pytester: pytest.Pytester,
+    *args: str,
+    app: str = "myapp:app",
+    ini: str = "",
+    conftest: str = "",
+) -> pytest.RunResult:
+    pytester.makepyfile(myapp=APP, test_app=TESTS)
+    pytester.makeini(
+        "[pytest]\n" "asyncio_mode = strict\n" f"asgi_lifespan_app = {app}\n" f"{ini}"
+    )
+    # The plugin is opt-in.
+    pytester.makeconftest(
+        'pytest_plugins = ["asgi_lifespan.pytest_plugin"]\n' + textwrap.dedent(conftest)
+    )
+    pytester.syspathinsert()
+    return pytester.runpytest("-s", *args)
+
+
+def test_session_scope(pytester: pytest.Pytester) -> None:
+    result = run(pytester)
+    result.assert_outcomes(passed=3)
+    # Started up once for all tests.
+    result.stdout.fnmatch_lines(["*startups: 1*"])
+
+
+@pytest.mark.parametrize(
+    "args, ini",
+    [
+        (["--lifespan-scope", "function"], ""),
+        ([], "asgi_lifespan_scope = function\n"),
+    ],
+)
+def test_function_scope(
+    pytester: pytest.Pytester, args: typing.List[str], ini: str
+) -> None:
+    result = run(pytester, *args, ini=ini)
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(["*startups: 3*"])
+
+
+def test_report(pytester: pytest.Pytester) -> None:
+    result = run(pytester, "--lifespan-scope", "module", "--lifespan-report")
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(["*asgi-lifespan startup and shutdown*"])
+    # Rows are sorted by duration, so their order varies.
+    result.stdout.fnmatch_lines(["*s startup *s shutdown  test_app.py::test_asyncio"])
+    result.stdout.fnmatch_lines(["*s startup *s shutdown  test_app.py::test_sync"])
+    result.stdout.fnmatch_lines(["*s startup *s shutdown  total for 2 test(s)"])
+
+
+def test_report_properties(pytester: pytest.Pytester) -> None:
+    result = run(pytester, "--junitxml=report.xml")
+    result.assert_outcomes(passed=3)
+    report = (pytester.path / "report.xml").read_text()
+    assert report.count('name="lifespan_startup"') == 1
+    assert report.count('name="lifespan_shutdown"') == 1
+    # No report unless asked for.
+    assert "asgi-lifespan startup and shutdown" not in result.stdout.str()
+
+
+def test_worker_id(pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+    result = run(pytester)
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(["*assert 'gw1' == 'master'*"])
+
+
+def test_override_app(pytester: pytest.Pytester) -> None:
+    conftest = """
+        import pytest
+
+        from myapp import app
+
+
+        @pytest.fixture(scope="session")
+        def lifespan_app():
+            return app
+        """
+    result = run(pytester, app="", conftest=conftest)
+    result.assert_outcomes(passed=3)
+
+
+def test_not_registered_by_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_app="def test_app(lifespan): pass")
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(["*fixture 'lifespan' not found*"])
+
+
+@pytest.mark.parametrize(
+    "app, ini, error",
+    [
+        ("", "", "*Set 'asgi_lifespan_app'*"),
+        ("myapp", "", "*must be of the form 'module:attribute'*"),
+        ("myapp:app", "asgi_lifespan_scope = forever\n", "*got 'forever'*"),
+    ],
+)
+def test_invalid_config(
+    pytester: pytest.Pytester, app: str, ini: str, error: str
+) -> None:
+    result = run(pytester, app=app, ini=ini)
+    assert result.ret != 0
+    result.stdout.fnmatch_lines([error])
@@ -0,0 +1,181 @@
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager, LifespanTimeout
+from asgi_lifespan._concurrency import (
+    detect_concurrency_backend,
+    get_concurrency_backend,
+)
+from asgi_lifespan._concurrency.base import BaseEvent
+from asgi_lifespan._types import Message, Receive, Scope, Send
+
+
+class StagedApp:
+    """
+    An app that reports the "db" stage, then waits for `gate` before loading
+    the "model" and completing startup.
+    """
+
+    def __init__(self, gate: BaseEvent, fail: bool = False) -> None:
+        self.gate = gate
+        self.fail = fail
+        self.log: typing.List[str] = []
+        self.extensions: typing.Dict[str, typing.Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.log.append(f"request {sorted(scope['state'])}")
+            return
+
+        self.extensions = scope["extensions"]
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        scope["state"]["db"] = "db"
+        await send({"type": "lifespan.startup.progress", "stage": "db"})
+        # Reporting a stage twice is harmless.
+        await send({"type": "lifespan.startup.progress", "stage": "db"})
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("Model failed to load")
+        scope["state"]["model"] = "model"
+        await send({"type": "lifespan.startup.progress", "stage": "model"})
+        self.log.append("startup complete")
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.log.append("shutdown")
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+async def call(manager: LifespanManager) -> None:
+    async def receive() -> Message:
+        raise NotImplementedError  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    await manager.app({"type": "http"}, receive, send)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage() -> None:
+    gate = detect_concurrency_backend().create_event()
+    app = StagedApp(gate)
+
+    async with LifespanManager(app, ready_stage="db") as manager:
+        assert app.extensions == {"lifespan.startup.progress": {}}
+        assert list(manager.stages) == ["db"]
+        assert manager.is_ready("db")
+        assert not manager.is_ready("model")
+        assert not manager.is_ready()
+        assert manager.time_to_complete is None
+
+        # Serve requests that only need the critical resources.
+        await call(manager)
+        assert app.log == ["request ['db']"]
+
+        gate.set()
+        await manager.wait_ready("model")
+        assert manager.is_ready("model")
+        await manager.wait_ready()
+        assert manager.is_ready()
+        assert list(manager.stages) == ["db", "model"]
+        assert manager.time_to_complete is not None
+        assert manager.stages["model"] <= manager.time_to_complete
+
+        # Already ready: returns at once.
+        await manager.wait_ready("db")
+        await manager.wait_ready()
+
+    assert app.log == ["request ['db']", "startup complete", "shutdown"]
+
+
+@pytest.mark.asyncio
+async def test_ready_stage_eager() -> None:
+    # On Python 3.12+, the app reports "db" before startup() gets to wait for it.
+    backend = get_concurrency_backend("asyncio-eager")
+    gate = backend.create_event()
+    app = StagedApp(gate)
+
+    async with LifespanManager(app, ready_stage="db", backend=backend) as manager:
+        assert list(manager.stages) == ["db"]
+        gate.set()
+
+    assert app.log == ["startup complete", "shutdown"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage_unreported() -> None:
+    gate = detect_concurrency_backend().create_event()
+    gate.set()
+
+    # A stage that the app doesn't report is ready once startup completes.
+    async with LifespanManager(StagedApp(gate), ready_stage="cache") as manager:
+        assert manager.is_ready()
+        assert manager.is_ready("cache")
+        assert "cache" not in manager.stages
+        await manager.wait_ready("other")
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage_shutdown_waits_for_startup() -> None:
+    backend = detect_concurrency_backend()
+    gate = backend.create_event()
+    app = StagedApp(gate)
+
+    async with backend.create_task_group() as task_group:
+        async with LifespanManager(app, ready_stage="db"):
+
+            async def release() -> None:
+                await backend.sleep(0.01)
+                gate.set()
+
+            task_group.start_soon(release)
+
+    assert app.log == ["startup complete", "shutdown"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage_startup_failure() -> None:
+    gate = detect_concurrency_backend().create_event()
+    app = StagedApp(gate, fail=True)
+
+    with pytest.raises(RuntimeError, match="Model failed to load"):
+        async with LifespanManager(app, ready_stage="db") as manager:
+            gate.set()
+            with pytest.raises(RuntimeError, match="Model failed to load"):
+                await manager.wait_ready("model")
+            assert not manager.is_ready()
+
+    assert app.log == []
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage_timeout() -> None:
+    gate = detect_concurrency_backend().create_event()
+    app = StagedApp(gate)
+
+    manager = LifespanManager(app, ready_stage="db", startup_timeout=0.05)
+    await manager.__aenter__()
+    # The startup timeout applies to the whole startup.
+    with pytest.raises(LifespanTimeout) as ctx:
+        await manager.wait_ready()
+    assert ctx.value.phase == "startup"
+
+    # Shutdown also waits for startup to complete first.
+    with pytest.raises(LifespanTimeout):
+        await manager.__aexit__(None, None, None)
+    assert app.log == []
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_ready_stage_not_reached() -> None:
+    gate = detect_concurrency_backend().create_event()
+
+    with pytest.raises(LifespanTimeout):
+        async with LifespanManager(
+            StagedApp(gate), ready_stage="model", startup_timeout=0.05
+        ):
+            pass  # pragma: no cover
@@ -0,0 +1,269 @@
+import asyncio
+import threading
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanReplicas, run_load
+from asgi_lifespan._types import ASGIApp, Message, Receive, Scope, Send
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class App:
+    def __init__(self, fail_startup: bool = False, fail_shutdown: bool = False) -> None:
+        self.startups = 0
+        self.shutdowns = 0
+        self.threads: typing.Set[int] = set()
+        self.fail_startup = fail_startup
+        self.fail_shutdown = fail_shutdown
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.threads.add(threading.get_ident())
+
+        if scope["type"] == "http":
+            await receive()
+            body = f"Hello from {scope['state']['thread']}".encode()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        assert scope["type"] == "lifespan"
+        await receive()
+        self.startups += 1
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"]["thread"] = threading.get_ident()
+        await send({"type": "lifespan.startup.complete"})
+
+        await receive()
+        self.shutdowns += 1
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+def make_factory(**kwargs: typing.Any) -> typing.Callable[[], App]:
+    apps: typing.List[App] = []
+
+    def factory() -> App:
+        app = App(**kwargs)
+        apps.append(app)
+        return app
+
+    factory.apps = apps  # type: ignore
+    return factory
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+def test_replicas() -> None:
+    factory = make_factory()
+    apps: typing.List[App] = factory.apps  # type: ignore
+
+    with LifespanReplicas(factory, replicas=3) as replicas:
+        assert len(apps) == 3
+        assert all(app.startups == 1 for app in apps)
+
+        bodies = []
+        for _ in range(6):
+            messages: typing.List[Message] = []
+
+            async def send(message: Message) -> None:
+                messages.append(message)
+
+            replicas.call({"type": "http"}, receive, send)
+            bodies.append(messages[-1]["body"])
+
+        assert replicas.calls == [2, 2, 2]
+        assert replicas.in_flight == [0, 0, 0]
+        # Each replica ran on its own thread, with its own lifespan state.
+        assert len(set(bodies)) == 3
+
+    assert all(app.shutdowns == 1 for app in apps)
+    threads = set.union(*(app.threads for app in apps))
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+def test_replicas_async_dispatch() -> None:
+    factory = make_factory()
+
+    async def main(replicas: LifespanReplicas) -> typing.List[Message]:
+        messages: typing.List[Message] = []
+        caller = threading.get_ident()
+
+        async def send(message: Message) -> None:
+            assert threading.get_ident() == caller
+            messages.append(message)
+
+        await asyncio.gather(
+            *(replicas.app({"type": "http"}, receive, send) for _ in range(4))
+        )
+        return messages
+
+    with LifespanReplicas(factory, replicas=2) as replicas:
+        messages = asyncio.run(main(replicas))
+
+    assert len(messages) == 8
+    assert replicas.calls == [2, 2]
+
+
+def test_replicas_trio_dispatch() -> None:
+    trio = pytest.importorskip("trio")
+    factory = make_factory()
+
+    async def main(replicas: LifespanReplicas) -> typing.List[Message]:
+        messages: typing.List[Message] = []
+        caller = threading.get_ident()
+
+        async def send(message: Message) -> None:
+            assert threading.get_ident() == caller
+            messages.append(message)
+
+        async with trio.open_nursery() as nursery:
+            for _ in range(4):
+                nursery.start_soon(replicas.app, {"type": "http"}, receive, send)
+        return messages
+
+    with LifespanReplicas(factory, replicas=2) as replicas:
+        messages = trio.run(main, replicas)
+
+    assert len(messages) == 8
+    assert replicas.calls == [2, 2]
+
+
+def test_replicas_least_loaded() -> None:
+    factory = make_factory()
+    started = threading.Event()
+    release = threading.Event()
+
+    async def slow_receive() -> Message:
+        started.set()
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        pass
+
+    with LifespanReplicas(factory, replicas=2, strategy="least_loaded") as replicas:
+        thread = threading.Thread(
+            target=replicas.call, args=({"type": "http"}, slow_receive, send)
+        )
+        thread.start()
+        started.wait()
+        assert replicas.in_flight == [1, 0]
+
+        # The busy replica is skipped.
+        replicas.call({"type": "http"}, receive, send)
+        replicas.call({"type": "http"}, receive, send)
+        assert replicas.calls == [1, 2]
+
+        release.set()
+        thread.join()
+        assert replicas.in_flight == [0, 0]
+
+
+def test_replicas_run_on_each() -> None:
+    factory = make_factory()
+    apps: typing.List[App] = factory.apps  # type: ignore
+
+    async def serve(app: ASGIApp, requests: int) -> typing.Set[bytes]:
+        bodies = set()
+        thread = threading.get_ident()
+
+        for _ in range(requests):
+
+            async def send(message: Message) -> None:
+                # Requests stay on the loop of the replica.
+                assert threading.get_ident() == thread
+                if message["type"] == "http.response.body":
+                    bodies.add(message["body"])
+
+            await app({"type": "http"}, receive, send)
+        return bodies
+
+    with LifespanReplicas(factory, replicas=3) as replicas:
+        results = replicas.run_on_each(serve, 2)
+        report = replicas.run_on_each(run_load, None, 10)
+
+    # Each replica served its own requests, with its own lifespan state.
+    assert [len(bodies) for bodies in results] == [1, 1, 1]
+    assert len(set.union(*results)) == 3
+    assert len(set.union(*(app.threads for app in apps))) == 3
+    assert [result.requests for result in report] == [10, 10, 10]
+    # Only calls dispatched one by one are counted.
+    assert replicas.calls == [0, 0, 0]
+
+
+def test_replicas_run_on_each_failure() -> None:
+    factory = make_factory()
+    done: typing.List[int] = []
+
+    async def serve(app: ASGIApp, failing: ASGIApp) -> None:
+        if app is failing:
+            raise RuntimeError()
+        await asyncio.sleep(0.01)
+        done.append(threading.get_ident())
+
+    replicas = LifespanReplicas(factory, replicas=2)
+    replicas.start()
+    with pytest.raises(RuntimeError):
+        replicas.run_on_each(serve, replicas.replicas[0].app)
+    replicas.stop()
+
+    # The other replica ran to completion.
+    assert len(done) == 1
+
+
+def test_replicas_startup_failure() -> None:
+    factory = make_factory(fail_startup=True)
+    apps: typing.List[App] = factory.apps  # type: ignore
+    replicas = LifespanReplicas(factory, replicas=2)
+
+    with pytest.raises(StartupFailed):
+        replicas.start()
+
+    assert len(apps) == 2
+    assert all(replica.loop_thread.loop is None for replica in replicas.replicas)
+
+
+def test_replicas_shutdown_failure() -> None:
+    factory = make_factory(fail_shutdown=True)
+    apps: typing.List[App] = factory.apps  # type: ignore
+
+    with pytest.raises(ShutdownFailed):
+        with LifespanReplicas(factory, replicas=2):
+            pass
+
+    # Both replicas were shut down anyway.
+    assert [app.shutdowns for app in apps] == [1, 1]
+
+
+def test_replicas_body_failure() -> None:
+    factory = make_factory()
+    apps: typing.List[App] = factory.apps  # type: ignore
+
+    with pytest.raises(StartupFailed):
+        with LifespanReplicas(factory, replicas=2) as replicas:
+            raise StartupFailed()
+
+    # Same as 'LifespanManager': the apps aren't shut down.
+    assert [app.shutdowns for app in apps] == [0, 0]
+    assert all(replica.loop_thread.loop is None for replica in replicas.replicas)
+
+
+def test_replicas_invalid() -> None:
+    with pytest.raises(ValueError):
+        LifespanReplicas(App, strategy="random")
+    with pytest.raises(ValueError):
+        LifespanReplicas(App, replicas=0)
+    assert len(LifespanReplicas(App).replicas) >= 1
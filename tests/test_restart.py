@@ -0,0 +1,149 @@
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._types import Message, Receive, Scope, Send
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class CyclingApp:
+    def __init__(self) -> None:
+        self.log: typing.List[str] = []
+        self.fail_startup = False
+        self.fail_shutdown = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.log.append(f"request {sorted(scope['state'])}")
+            return
+
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        self.log.append(f"startup {sorted(scope['state'])}")
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"][f"cycle{len(self.log)}"] = True
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.log.append("shutdown")
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+async def request(manager: LifespanManager) -> None:
+    async def receive() -> Message:
+        raise NotImplementedError  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        pass  # pragma: no cover
+
+    await manager.app({"type": "http"}, receive, send)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_reenter() -> None:
+    app = CyclingApp()
+    manager = LifespanManager(app)
+
+    for _ in range(3):
+        async with manager:
+            pass
+
+    assert app.log == ["startup []", "shutdown"] * 3
+    assert manager.cycles == 3
+    assert manager.startup_duration is not None
+    assert manager.shutdown_duration is not None
+    assert manager.total_startup_duration >= manager.startup_duration
+    assert manager.total_shutdown_duration >= manager.shutdown_duration
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("clear_state", [True, False])
+async def test_restart(clear_state: bool) -> None:
+    app = CyclingApp()
+
+    async with LifespanManager(app) as manager:
+        await manager.restart(clear_state=clear_state)
+        await request(manager)
+
+    assert app.log == [
+        "startup []",
+        "shutdown",
+        "startup []" if clear_state else "startup ['cycle1']",
+        "request ['cycle3']" if clear_state else "request ['cycle1', 'cycle3']",
+        "shutdown",
+    ]
+    assert manager.cycles == 2
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_restart_startup_failed() -> None:
+    app = CyclingApp()
+
+    with pytest.raises(StartupFailed):
+        async with LifespanManager(app) as manager:
+            app.fail_startup = True
+            await manager.restart()
+
+    assert app.log == ["startup []", "shutdown", "startup []"]
+    assert manager.cycles == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_restart_not_running() -> None:
+    manager = LifespanManager(CyclingApp())
+
+    with pytest.raises(RuntimeError, match="App is not running"):
+        await manager.restart()
+
+    async with manager:
+        pass
+    with pytest.raises(RuntimeError, match="App is not running"):
+        await manager.restart()
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("clear_state", [True, False])
+async def test_restart_lazy(clear_state: bool) -> None:
+    app = CyclingApp()
+
+    async with LifespanManager(app, lazy=True) as manager:
+        await request(manager)
+        await manager.restart(clear_state=clear_state)
+        assert app.log[-1] == "shutdown"
+        await request(manager)
+
+    assert app.log == [
+        "startup []",
+        "request ['cycle1']",
+        "shutdown",
+        "startup []" if clear_state else "startup ['cycle1']",
+        "request ['cycle4']" if clear_state else "request ['cycle1', 'cycle4']",
+        "shutdown",
+    ]
+    assert manager.cold_starts == 2
+    assert manager.cycles == 2
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_restart_lazy_shutdown_failed() -> None:
+    app = CyclingApp()
+    app.fail_shutdown = True
+
+    async with LifespanManager(app, lazy=True) as manager:
+        await request(manager)
+        with pytest.raises(ShutdownFailed):
+            await manager.restart()
+        app.fail_shutdown = False
+        await request(manager)
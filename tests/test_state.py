@@ -0,0 +1,98 @@
+import contextlib
+import typing
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from asgi_lifespan import LifespanManager
+from asgi_lifespan._state import StateView
+
+
+def test_state_view_reads() -> None:
+    base = {"a": 1, "b": 2}
+    view = StateView(base)
+
+    assert view["a"] == 1
+    assert "b" in view
+    assert "c" not in view
+    assert len(view) == 2
+    assert list(view) == ["a", "b"]
+    assert view.get("c") is None
+    with pytest.raises(KeyError):
+        view["c"]
+
+
+def test_state_view_writes() -> None:
+    base = {"a": 1, "b": 2}
+    view = StateView(base)
+
+    view["a"] = 10
+    view["c"] = 3
+    del view["b"]
+
+    assert dict(view) == {"a": 10, "c": 3}
+    assert len(view) == 2
+    assert "b" not in view
+    with pytest.raises(KeyError):
+        view["b"]
+    with pytest.raises(KeyError):
+        del view["b"]
+    assert repr(view) == "StateView({'a': 10, 'c': 3})"
+
+    # The lifespan state is untouched.
+    assert base == {"a": 1, "b": 2}
+
+    other = StateView(base)
+    del other["a"]
+    assert dict(other) == {"b": 2}
+
+    view["b"] = 20
+    assert view["b"] == 20
+    del view["c"]
+    assert dict(view) == {"a": 10, "b": 20}
+
+
+def test_state_view_sees_lifespan_state_updates() -> None:
+    base = {"a": 1}
+    view = StateView(base)
+    view["b"] = 2
+
+    base["a"] = 10
+    base["c"] = 3
+
+    assert dict(view) == {"a": 10, "b": 2, "c": 3}
+
+
+def create_app() -> Starlette:
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> typing.AsyncIterator[dict]:
+        yield {"count": 0}
+
+    async def increment(request: Request) -> Response:
+        request.state.count += 1
+        return JSONResponse(request.state.count)
+
+    return Starlette(routes=[Route("/", increment)], lifespan=lifespan)
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize(
+    "request_state, counts", [("shared", [1, 2]), ("copy_on_write", [1, 1])]
+)
+async def test_request_state(request_state: str, counts: typing.List[int]) -> None:
+    app = create_app()
+
+    async with LifespanManager(app, request_state=request_state) as manager:
+        async with httpx.AsyncClient(
+            app=manager.app, base_url="http://testserver"
+        ) as client:
+            assert [(await client.get("/")).json() for _ in range(2)] == counts
+
+
+def test_request_state_invalid() -> None:
+    with pytest.raises(ValueError):
+        LifespanManager(create_app(), request_state="copy")
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import typing
+
+import pytest
+
+from asgi_lifespan import SyncLifespanManager
+from asgi_lifespan._types import Message, Receive, Scope, Send
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class App:
+    def __init__(self, fail_startup: bool = False) -> None:
+        self.startups = 0
+        self.shutdowns = 0
+        self.threads: typing.Set[int] = set()
+        self.fail_startup = fail_startup
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.threads.add(threading.get_ident())
+
+        if scope["type"] == "http":
+            await receive()
+            body = f"Hello, {scope['state']['name']}!".encode()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        assert scope["type"] == "lifespan"
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        self.startups += 1
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"]["name"] = "world"
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        self.shutdowns += 1
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+def test_sync_manager() -> None:
+    app = App()
+
+    with SyncLifespanManager(app) as manager:
+        assert app.startups == 1
+        assert manager.users == 1
+
+        messages: typing.List[Message] = []
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b""}
+
+        async def send(message: Message) -> None:
+            messages.append(message)
+
+        manager.call({"type": "http"}, receive, send)
+        assert messages[-1] == {"type": "http.response.body", "body": b"Hello, world!"}
+
+        async def add(x: int, y: int) -> int:
+            return x + y
+
+        assert manager.run(add, 1, 2) == 3
+        assert manager.submit(add, 2, 3).result() == 5
+
+    assert app.shutdowns == 1
+    assert manager.users == 0
+    # Everything ran on one thread, which isn't ours.
+    assert len(app.threads) == 1
+    assert threading.get_ident() not in app.threads
+
+
+def test_sync_manager_shared() -> None:
+    app = App()
+    manager = SyncLifespanManager(app)
+    barrier = threading.Barrier(5)
+    errors: typing.List[BaseException] = []
+
+    def use() -> None:
+        try:
+            with manager:
+                barrier.wait()
+                assert app.startups == 1
+        except BaseException as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=use) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert app.startups == 1
+    assert app.shutdowns == 1
+
+    # Can be started again afterwards.
+    with manager:
+        assert app.startups == 2
+    assert app.shutdowns == 2
+
+
+def test_sync_manager_startup_failure() -> None:
+    app = App(fail_startup=True)
+    manager = SyncLifespanManager(app)
+
+    with pytest.raises(StartupFailed):
+        manager.start()
+
+    assert manager.users == 0
+    with pytest.raises(AssertionError):
+        manager.app
+
+    app.fail_startup = False
+    with manager:
+        assert app.startups == 2
+
+
+def test_sync_manager_body_failure() -> None:
+    app = App()
+
+    with pytest.raises(StartupFailed):
+        with SyncLifespanManager(app) as manager:
+            raise StartupFailed()
+
+    # Same as 'LifespanManager': the app isn't shut down.
+    assert app.startups == 1
+    assert app.shutdowns == 0
+    assert manager.users == 0
+
+
+def test_sync_manager_unbalanced_stop() -> None:
+    with pytest.raises(AssertionError):
+        SyncLifespanManager(App()).stop()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_sync_manager_acall() -> None:
+    app = App()
+    messages: typing.List[Message] = []
+    caller = threading.get_ident()
+
+    async def receive() -> Message:
+        assert threading.get_ident() == caller
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        assert threading.get_ident() == caller
+        messages.append(message)
+
+    with SyncLifespanManager(app) as manager:
+        await manager.acall({"type": "http"}, receive, send)
+
+    assert messages[-1] == {"type": "http.response.body", "body": b"Hello, world!"}
+    assert threading.get_ident() not in app.threads
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_sync_manager_acall_exception() -> None:
+    app = App()
+
+    async def receive() -> Message:
+        raise StartupFailed()
+
+    async def send(message: Message) -> None:  # pragma: no cover
+        pass
+
+    with SyncLifespanManager(app) as manager:
+        with pytest.raises(StartupFailed):
+            await manager.acall({"type": "http"}, receive, send)
+
+
+@pytest.mark.trio
+async def test_sync_manager_acall_cancelled_on_trio() -> None:
+    import trio
+
+    cancelled = threading.Event()
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await App()(scope, receive, send)
+            return
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def receive() -> Message:  # pragma: no cover
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:  # pragma: no cover
+        pass
+
+    with SyncLifespanManager(app) as manager:
+        with trio.move_on_after(0.05) as scope:
+            await manager.acall({"type": "http"}, receive, send)
+        assert scope.cancelled_caught
+        # The call was cancelled on the loop of the manager too.
+        assert cancelled.wait(5)
@@ -0,0 +1,215 @@
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager, TeardownSupervisor
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class BodyFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class SlowShutdownApp:
+    running = 0
+    max_running = 0
+
+    def __init__(
+        self,
+        shutdown_duration: float = 0.02,
+        fail_startup: bool = False,
+        fail_shutdown: bool = False,
+        startup_duration: float = 0,
+    ) -> None:
+        self.startup_duration = startup_duration
+        self.shutdown_duration = shutdown_duration
+        self.fail_startup = fail_startup
+        self.fail_shutdown = fail_shutdown
+        self.log: typing.List[str] = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        message = await receive()
+        assert message["type"] == "lifespan.startup"
+        self.log.append(f"startup {sorted(scope['state'])}")
+        if self.startup_duration:
+            await concurrency.sleep(detect_concurrency_backend(), self.startup_duration)
+        if self.fail_startup:
+            raise StartupFailed()
+        scope["state"]["started"] = True
+        await send({"type": "lifespan.startup.complete"})
+
+        message = await receive()
+        assert message["type"] == "lifespan.shutdown"
+        cls = type(self)
+        cls.running += 1
+        cls.max_running = max(cls.max_running, cls.running)
+        try:
+            await concurrency.sleep(
+                detect_concurrency_backend(), self.shutdown_duration
+            )
+        finally:
+            cls.running -= 1
+        if self.fail_shutdown:
+            raise ShutdownFailed()
+        self.log.append("shutdown")
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_deferred_shutdown() -> None:
+    app = SlowShutdownApp()
+
+    async with TeardownSupervisor() as teardown:
+        async with LifespanManager(app, teardown=teardown) as manager:
+            assert app.log == ["startup []"]
+
+        assert app.log == ["startup []"]
+        assert teardown.pending == 1
+
+        await teardown.flush()
+        assert app.log == ["startup []", "shutdown"]
+        assert teardown.pending == 0
+        assert teardown.completed == 1
+        await manager.wait_closed()
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("max_concurrency", [1, 2, None])
+async def test_deferred_shutdown_concurrency(
+    max_concurrency: typing.Optional[int],
+) -> None:
+    class App(SlowShutdownApp):
+        pass
+
+    apps = [App() for _ in range(4)]
+
+    async with TeardownSupervisor(max_concurrency=max_concurrency) as teardown:
+        for app in apps:
+            async with LifespanManager(app, teardown=teardown):
+                pass
+
+    assert all(app.log == ["startup []", "shutdown"] for app in apps)
+    assert App.max_running == (max_concurrency or 4)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_deferred_shutdown_failed() -> None:
+    app = SlowShutdownApp(fail_shutdown=True)
+
+    with pytest.raises(ShutdownFailed):
+        async with TeardownSupervisor() as teardown:
+            async with LifespanManager(app, teardown=teardown) as manager:
+                pass
+
+            with pytest.raises(ShutdownFailed):
+                await manager.wait_closed()
+
+    # Errors are reported once.
+    await teardown.flush()
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_deferred_startup_failed() -> None:
+    app = SlowShutdownApp(fail_startup=True)
+
+    async with TeardownSupervisor() as teardown:
+        with pytest.raises(StartupFailed):
+            async with LifespanManager(app, teardown=teardown):
+                pass  # pragma: no cover
+
+    assert teardown.completed == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("fail_startup", [False, True])
+async def test_deferred_enter_cancelled(fail_startup: bool) -> None:
+    app = SlowShutdownApp(startup_duration=0.03, fail_startup=fail_startup)
+    backend = detect_concurrency_backend()
+
+    async with TeardownSupervisor() as teardown:
+        manager = LifespanManager(app, teardown=teardown)
+
+        async def enter() -> None:
+            await manager.__aenter__()
+
+        with pytest.raises(TimeoutError):
+            await backend.run_and_fail_after(0.01, enter)
+
+        # The supervisor shuts the app down once started.
+        assert teardown.pending == 1
+        if fail_startup:
+            with pytest.raises(StartupFailed):
+                await teardown.flush()
+        else:
+            await teardown.flush()
+            assert app.log == ["startup []", "shutdown"]
+        assert teardown.pending == 0
+        assert teardown.completed == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_deferred_body_failed() -> None:
+    app = SlowShutdownApp()
+
+    async with TeardownSupervisor() as teardown:
+        with pytest.raises(BodyFailed):
+            async with LifespanManager(app, teardown=teardown):
+                raise BodyFailed()
+
+    assert app.log == ["startup []"]
+    assert teardown.completed == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("clear_state", [True, False])
+async def test_deferred_restart(clear_state: bool) -> None:
+    app = SlowShutdownApp()
+
+    async with TeardownSupervisor() as teardown:
+        manager = LifespanManager(app, teardown=teardown)
+        async with manager:
+            await manager.restart(clear_state=clear_state)
+        async with manager:
+            pass
+
+    assert app.log == [
+        "startup []",
+        "shutdown",
+        "startup []" if clear_state else "startup ['started']",
+        "shutdown",
+        "startup []",
+        "shutdown",
+    ]
+    assert manager.cycles == 3
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_deferred_supervisor_failed() -> None:
+    apps = [SlowShutdownApp(shutdown_duration=1) for _ in range(3)]
+
+    with pytest.raises(BodyFailed):
+        async with TeardownSupervisor(max_concurrency=1) as teardown:
+            for app in apps:
+                async with LifespanManager(app, teardown=teardown):
+                    pass
+            await concurrency.sleep(detect_concurrency_backend(), 0.01)
+            raise BodyFailed()
+
+    # Pending shutdowns were cancelled.
+    assert all(app.log == ["startup []"] for app in apps)
+
+
+def test_lazy_with_teardown() -> None:
+    with pytest.raises(ValueError):
+        LifespanManager(SlowShutdownApp(), lazy=True, teardown=TeardownSupervisor())
@@ -0,0 +1,194 @@
+import sys
+import typing
+
+import pytest
+
+from asgi_lifespan import TenantRegistry
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._tenants import estimate_size
+from asgi_lifespan._types import Receive, Scope, Send
+
+from . import concurrency
+
+
+class StartupFailed(Exception):
+    pass
+
+
+class ShutdownFailed(Exception):
+    pass
+
+
+class Tenants:
+    """
+    A factory of tenant apps, which records their lifespan events.
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self.size = size
+        self.log: typing.List[str] = []
+        self.fail_startup: typing.Set[str] = set()
+        self.fail_shutdown: typing.Set[str] = set()
+
+    def __call__(self, tenant: str) -> typing.Any:
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await receive()
+            await concurrency.sleep(detect_concurrency_backend(), 0.01)
+            if tenant in self.fail_startup:
+                raise StartupFailed()
+            self.log.append(f"startup {tenant}")
+            scope["state"]["data"] = bytes(self.size)
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+            self.log.append(f"shutdown {tenant}")
+            if tenant in self.fail_shutdown:
+                raise ShutdownFailed()
+            await send({"type": "lifespan.shutdown.complete"})
+
+        return app
+
+
+def fixed_cost(manager: typing.Any) -> int:
+    return 100
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_starts_tenants_on_demand() -> None:
+    tenants = Tenants()
+    backend = detect_concurrency_backend()
+
+    async with TenantRegistry(tenants) as registry:
+        assert len(registry) == 0
+
+        async def use(tenant: str) -> None:
+            async with registry.acquire(tenant) as manager:
+                assert manager._state["data"] == b""
+
+        # Concurrent starts of the same tenant are collapsed into one.
+        async with backend.create_task_group() as task_group:
+            for _ in range(3):
+                task_group.start_soon(lambda: use("a"))
+        await use("b")
+        await use("a")
+
+        assert tenants.log == ["startup a", "startup b"]
+        assert registry.tenants == ["b", "a"]
+        assert "a" in registry
+        assert registry.cold_starts == 2
+        assert registry.hits == 3
+        assert registry.hit_rate == 3 / 5
+        assert registry.cold_start_duration > 0
+        assert registry.evictions == 0
+
+    assert sorted(tenants.log[2:]) == ["shutdown a", "shutdown b"]
+    assert len(registry) == 0
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_evicts_least_recently_used() -> None:
+    tenants = Tenants()
+    backend = detect_concurrency_backend()
+
+    async with TenantRegistry(tenants, memory_budget=250, cost=fixed_cost) as registry:
+        for tenant in ["a", "b", "a", "c"]:
+            async with registry.acquire(tenant):
+                pass
+
+        assert registry.tenants == ["a", "c"]
+        assert registry.costs == {"a": 100, "c": 100}
+        assert registry.total_cost == 200
+        assert registry.evictions == 1
+        assert registry.evicted_bytes == 100
+        await concurrency.sleep(backend, 0.01)
+        assert tenants.log == ["startup a", "startup b", "startup c", "shutdown b"]
+
+        # An evicted tenant is started again on demand.
+        async with registry.acquire("b"):
+            assert registry.tenants == ["c", "b"]
+        assert registry.cold_starts == 4
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_keeps_tenants_in_use() -> None:
+    tenants = Tenants()
+
+    async with TenantRegistry(tenants, memory_budget=150, cost=fixed_cost) as registry:
+        async with registry.acquire("a"):
+            async with registry.acquire("b"):
+                # Over budget, but both are in use.
+                assert registry.total_cost == 200
+            # Released, and least recently used of idle tenants.
+            assert registry.tenants == ["a"]
+        assert registry.tenants == ["a"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_default_cost() -> None:
+    tenants = Tenants(size=100_000)
+
+    async with TenantRegistry(tenants, memory_budget=150_000) as registry:
+        async with registry.acquire("a"):
+            assert registry.costs["a"] >= 100_000
+        async with registry.acquire("b"):
+            pass
+        assert registry.tenants == ["b"]
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_startup_failure() -> None:
+    tenants = Tenants()
+    tenants.fail_startup.add("a")
+
+    async with TenantRegistry(tenants) as registry:
+        with pytest.raises(StartupFailed):
+            async with registry.acquire("a"):
+                pass  # pragma: no cover
+        assert registry.failed_starts == 1
+        assert registry.cold_starts == 0
+        assert "a" not in registry
+
+        # Tried again on the next use.
+        tenants.fail_startup.clear()
+        async with registry.acquire("a"):
+            pass
+        assert registry.cold_starts == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_registry_shutdown_failure() -> None:
+    tenants = Tenants()
+    tenants.fail_shutdown.add("a")
+
+    with pytest.raises(ShutdownFailed):
+        async with TenantRegistry(tenants) as registry:
+            async with registry.acquire("a"):
+                pass
+
+
+def test_registry_invalid() -> None:
+    with pytest.raises(ValueError):
+        TenantRegistry(Tenants(), memory_budget=-1)
+
+
+class Holder:
+    def __init__(self, value: typing.Any) -> None:
+        self.value = value
+
+
+class Slotted:
+    __slots__ = ("value", "unset")
+
+    def __init__(self, value: typing.Any) -> None:
+        self.value = value
+
+
+def test_estimate_size() -> None:
+    data = bytes(10_000)
+    assert estimate_size(data) == sys.getsizeof(data)
+    # Shared objects are counted once.
+    assert estimate_size([data, data]) < 2 * sys.getsizeof(data)
+    assert estimate_size({"key": Slotted(data)}) > sys.getsizeof(data)
+    assert estimate_size(Holder(data)) > sys.getsizeof(data)
+    # Classes, modules and functions are shared by all tenants.
+    shared = [sys, Slotted, test_estimate_size]
+    assert estimate_size(shared) == sys.getsizeof(shared)
@@ -0,0 +1,104 @@
+import typing
+
+import pytest
+
+from asgi_lifespan import LifespanManager, PhaseTimer
+from asgi_lifespan._types import Receive, Scope, Send
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    assert scope["type"] == "lifespan"
+    message = await receive()
+    assert message["type"] == "lifespan.startup"
+    await send({"type": "lifespan.startup.complete"})
+    message = await receive()
+    assert message["type"] == "lifespan.shutdown"
+    await send({"type": "lifespan.shutdown.complete"})
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_on_event() -> None:
+    events: typing.List[typing.Tuple[str, float]] = []
+
+    def on_event(event: str, timestamp: float) -> None:
+        events.append((event, timestamp))
+
+    async with LifespanManager(app, on_event=on_event):
+        names = [event for event, _ in events]
+        assert names[0] == "enter.start"
+        assert names[-1] == "enter.end"
+        assert set(names) == {
+            "enter.start",
+            "startup.start",
+            "startup.queued",
+            "run_app.start",
+            "receive.start",
+            "receive.lifespan.startup",
+            "send.lifespan.startup.complete",
+            "startup.end",
+            "enter.end",
+        }
+        assert names.index("startup.start") < names.index("startup.end")
+        assert names.index("receive.lifespan.startup") < names.index(
+            "send.lifespan.startup.complete"
+        )
+        del events[:]
+
+    names = [event for event, _ in events]
+    assert names[0] == "exit.start"
+    assert names[-1] == "exit.end"
+    assert set(names) == {
+        "exit.start",
+        "shutdown.start",
+        "shutdown.queued",
+        "receive.lifespan.shutdown",
+        "send.lifespan.shutdown.complete",
+        "shutdown.end",
+        "run_app.end",
+        "exit.end",
+    }
+
+    timestamps = [timestamp for _, timestamp in events]
+    assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_phase_timer() -> None:
+    timer = PhaseTimer()
+
+    async with LifespanManager(app, on_event=timer):
+        pass
+
+    phases = timer.phases
+    assert set(phases) == {
+        "enter",
+        "app_first_receive",
+        "startup",
+        "startup_app",
+        "exit",
+        "shutdown",
+        "shutdown_app",
+        "teardown",
+        "run_app",
+    }
+    assert all(duration >= 0 for duration in phases.values())
+    assert phases["startup"] <= phases["enter"]
+    assert phases["shutdown"] <= phases["exit"]
+
+    timer.clear()
+    assert timer.phases == {}
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_phase_timer_startup_failure() -> None:
+    async def failing_app(scope: Scope, receive: Receive, send: Send) -> None:
+        await receive()
+        raise RuntimeError()
+
+    timer = PhaseTimer()
+
+    with pytest.raises(RuntimeError):
+        async with LifespanManager(failing_app, on_event=timer):
+            pass  # pragma: no cover
+
+    assert set(timer.phases) == {"enter", "app_first_receive", "startup", "run_app"}
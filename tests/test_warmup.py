@@ -0,0 +1,124 @@
+import contextlib
+import math
+import typing
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket
+
+from asgi_lifespan import LifespanManager, LifespanTimeout
+from asgi_lifespan._concurrency import detect_concurrency_backend
+from asgi_lifespan._types import ASGIApp
+
+from . import concurrency
+
+
+class WarmupFailed(Exception):
+    pass
+
+
+def create_app(delay: float = 0.01) -> Starlette:
+    stats = {"running": 0, "max_running": 0}
+    hits: typing.List[str] = []
+
+    async def home(request: Request) -> Response:
+        stats["running"] += 1
+        stats["max_running"] = max(stats["max_running"], stats["running"])
+        await concurrency.sleep(detect_concurrency_backend(), delay)
+        stats["running"] -= 1
+        hits.append(f"{request.method} {request.url.path}")
+        assert request.state.ready
+        return PlainTextResponse("Hello")
+
+    async def fail(request: Request) -> Response:
+        raise WarmupFailed()
+
+    async def ws(websocket: WebSocket) -> None:
+        await websocket.accept()
+        hits.append("WS /ws")
+        await websocket.close()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> typing.AsyncIterator[dict]:
+        yield {"ready": True}
+
+    app = Starlette(
+        routes=[
+            Route("/", home, methods=["GET", "POST"]),
+            Route("/fail", fail),
+            WebSocketRoute("/ws", ws),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.stats = stats
+    app.state.hits = hits
+    return app
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_warmup_requests() -> None:
+    app = create_app()
+    warmup = [
+        {"type": "http", "path": "/"},
+        {"type": "http", "path": "/", "method": "POST"},
+        {"type": "websocket", "path": "/ws"},
+    ]
+
+    async with LifespanManager(app, warmup=warmup) as manager:
+        assert sorted(app.state.hits) == ["GET /", "POST /", "WS /ws"]
+        assert len(manager.warmup_latencies) == 3
+        assert all(latency >= 0 for latency in manager.warmup_latencies)
+        assert manager.warmup_latencies[0] >= 0.01
+
+
+@pytest.mark.usefixtures("concurrency")
+@pytest.mark.parametrize("warmup_concurrency", [1, 2, 10])
+async def test_warmup_concurrency(warmup_concurrency: int) -> None:
+    app = create_app()
+    warmup = [{"type": "http", "path": "/"}] * 5
+
+    async with LifespanManager(
+        app, warmup=warmup, warmup_concurrency=warmup_concurrency
+    ) as manager:
+        assert len(app.state.hits) == 5
+        assert app.state.stats["max_running"] == min(warmup_concurrency, 5)
+        assert not any(math.isnan(latency) for latency in manager.warmup_latencies)
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_warmup_coroutine() -> None:
+    app = create_app()
+    called_with: typing.List[ASGIApp] = []
+
+    async def warmup(app: ASGIApp) -> None:
+        called_with.append(app)
+
+    async with LifespanManager(app, warmup=warmup) as manager:
+        assert called_with == [manager.app]
+        assert len(manager.warmup_latencies) == 1
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_warmup_timeout() -> None:
+    app = create_app(delay=1)
+
+    with pytest.raises(LifespanTimeout) as ctx:
+        async with LifespanManager(
+            app, warmup=[{"type": "http", "path": "/"}], warmup_timeout=0.01
+        ):
+            pass  # pragma: no cover
+
+    assert ctx.value.phase == "warmup"
+    assert str(ctx.value).startswith("Application warmup timed out after")
+
+
+@pytest.mark.usefixtures("concurrency")
+async def test_warmup_failed() -> None:
+    app = create_app()
+
+    with pytest.raises(WarmupFailed):
+        async with LifespanManager(app, warmup=[{"type": "http", "path": "/fail"}]):
+            pass  # pragma: no cover